@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Query, UploadFile, File, Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.controllers.image_to_pdf_controller import image_to_pdf_controller, pdf_to_image_controller
+from app.controllers.image_to_pdf_controller import (
+    image_to_pdf_controller,
+    images_to_pdf_controller,
+    pdf_to_image_controller,
+)
 from app.core.database import get_db
 from app.core.limiter import limiter
 from app.core.config import RATE_LIMIT
+from app.services.pdf_rasterizer import DEFAULT_DPI, MIN_DPI, MAX_DPI
 
 router = APIRouter()
 
@@ -23,17 +28,35 @@ async def image_to_pdf(
     )
 
 
+@router.post("/images-to-pdf")
+@limiter.limit(RATE_LIMIT)
+async def images_to_pdf(
+    request: Request,
+    files: List[UploadFile] = File(..., description="Images, one page each, in upload order"),
+    db: AsyncSession = Depends(get_db)
+):
+    return await images_to_pdf_controller(
+        files=files,
+        request=request,
+        db=db
+    )
+
+
 @router.post("/pdf-to-image")
 @limiter.limit(RATE_LIMIT)
 async def pdf_to_image(
     request: Request,
     file: UploadFile = File(...),
     format: str = Query("png", enum=["png", "jpg"]),
+    dpi: int = Query(DEFAULT_DPI, ge=MIN_DPI, le=MAX_DPI, description="Render resolution"),
+    pages: str = Query(None, description="Pages to render, e.g. 1-3,7 (default: all)"),
     db: AsyncSession = Depends(get_db)
 ):
     return await pdf_to_image_controller(
         file=file,
         format=format,
+        dpi=dpi,
+        pages=pages,
         request=request,
         db=db
     )
\ No newline at end of file
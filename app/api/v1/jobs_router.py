@@ -0,0 +1,108 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.controllers.job_controller import (
+    submit_video_to_gif_job_controller,
+    submit_video_to_sticker_job_controller,
+    submit_pdf_compress_job_controller,
+    submit_pdf_compress_pro_job_controller,
+    get_job_controller,
+    get_job_result_controller,
+)
+from app.core.database import get_db
+from app.core.limiter import limiter
+from app.core.config import RATE_LIMIT
+
+router = APIRouter(prefix="/jobs")
+
+
+@router.post("/video-to-gif", status_code=202)
+@limiter.limit(RATE_LIMIT)
+async def video_to_gif_job(
+    request: Request,
+    file: UploadFile = File(...),
+    fps: int = Query(10, ge=1, le=30),
+    width: int = Query(480, ge=100, le=1000),
+    start_time: float = Query(0, ge=0),
+    end_time: float = Query(5, gt=0),
+    quality: str = Query("medium", pattern="^(hd|high|medium|low)$"),
+    reverse: bool = Query(False),
+    db: AsyncSession = Depends(get_db)
+):
+    if end_time - start_time > 15:
+        raise HTTPException(
+            status_code=400,
+            detail="Maximum GIF duration is 15 seconds"
+        )
+
+    return await submit_video_to_gif_job_controller(
+        file, fps, width, start_time, end_time, quality, reverse, request, db
+    )
+
+
+@router.post("/video-to-sticker", status_code=202)
+@limiter.limit(RATE_LIMIT)
+async def video_to_sticker_job(
+    request: Request,
+    file: UploadFile = File(...),
+    fps: int = Query(12, ge=1, le=20),
+    start_time: float = Query(0, ge=0),
+    end_time: float = Query(5, gt=0),
+    quality: str = Query("medium", pattern="^(hd|high|medium|low)$"),
+    reverse: bool = Query(False),
+    db: AsyncSession = Depends(get_db)
+):
+    if end_time - start_time > 6:
+        raise HTTPException(
+            status_code=400,
+            detail="Maximum sticker duration is 6 seconds"
+        )
+
+    return await submit_video_to_sticker_job_controller(
+        file, fps, start_time, end_time, quality, reverse, request, db
+    )
+
+
+@router.post("/compress-pdf", status_code=202)
+@limiter.limit(RATE_LIMIT)
+async def compress_pdf_job(
+    request: Request,
+    file: UploadFile = File(...),
+    compression_level: str = Query("medium"),
+    db: AsyncSession = Depends(get_db)
+):
+    return await submit_pdf_compress_job_controller(file, compression_level, request, db)
+
+
+@router.post("/compress-pdf/pro", status_code=202)
+@limiter.limit(RATE_LIMIT)
+async def compress_pdf_pro_job(
+    request: Request,
+    file: UploadFile = File(...),
+    quality: int = Query(70),
+    dpi: int = Query(150),
+    db: AsyncSession = Depends(get_db)
+):
+    return await submit_pdf_compress_pro_job_controller(file, quality, dpi, request, db)
+
+
+@router.get("/{job_id}", name="get_job")
+async def get_job(
+    request: Request,
+    job_id: str,
+    wait: float = Query(
+        0,
+        ge=0,
+        le=30,
+        description="Long-poll: seconds to wait for the job to finish"
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_job_controller(job_id, wait, request, db)
+
+
+@router.get("/{job_id}/result", name="get_job_result")
+async def get_job_result(
+    job_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_job_result_controller(job_id, db)
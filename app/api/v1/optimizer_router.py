@@ -1,3 +1,4 @@
+from typing import List
 from fastapi import APIRouter, UploadFile, File, Request, Query, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
@@ -11,6 +12,7 @@ from app.controllers.optimizer_controller import (
     optimize_web_controller,
     optimize_custom_controller,
     optimize_youtube_controller,
+    optimize_batch_controller,
 )
 
 router = APIRouter(prefix="/optimize")
@@ -91,6 +93,39 @@ async def optimize_youtube(
 async def optimize_seo(
     request: Request,
     file: UploadFile = File(...),
+    sizes: str = Query(
+        "480,768,1200",
+        description="Comma-separated longest-side sizes for the srcset"
+    ),
+    formats: str = Query(
+        "webp,avif",
+        description="Comma-separated output formats (webp, avif, jpeg)"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
-    return await optimize_seo_controller(file, request, db)
\ No newline at end of file
+    return await optimize_seo_controller(file, sizes, formats, request, db)
+
+
+@router.post("/batch")
+@limiter.limit(RATE_LIMIT)
+async def optimize_batch(
+    request: Request,
+    files: List[UploadFile] = File(..., description="Images, or a single .zip of images"),
+    preset: str = Query(
+        "web",
+        description="twitter, whatsapp, web, instagram, youtube or custom"
+    ),
+    target_kb: int = Query(None),
+    quality: int = Query(85),
+    resize_percent: int = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
+    return await optimize_batch_controller(
+        files,
+        preset,
+        target_kb,
+        quality,
+        resize_percent,
+        request,
+        db
+    )
@@ -13,11 +13,13 @@ async def compress_pdf(
     request: Request,
     file: UploadFile = File(...),
     compression_level: str = Query("medium"),
+    image_stats: bool = Query(False),  # per-image X-PDF-Image-Stats header
     db: AsyncSession = Depends(get_db)
 ):
     return await compress_pdf_controller(
         file=file,
         compression_level=compression_level,
+        image_stats=image_stats,
         request=request,
         db=db
     )
@@ -29,12 +31,14 @@ async def compress_pdf_pro(
     file: UploadFile = File(...),
     quality: int = Query(70),  # JPEG quality
     dpi: int = Query(150),     # target DPI
+    image_stats: bool = Query(False),  # per-image X-PDF-Image-Stats header
     db: AsyncSession = Depends(get_db)
 ):
     return await compress_pdf_pro_controller(
         file=file,
         quality=quality,
         dpi=dpi,
+        image_stats=image_stats,
         request=request,
         db=db
     )
\ No newline at end of file
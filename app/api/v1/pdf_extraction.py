@@ -13,10 +13,15 @@ router = APIRouter()
 async def extract_pdf_images(
     request: Request,
     file: UploadFile = File(...),
+    normalize: bool = Query(
+        False,
+        description="Convert images to web formats: CMYK JPEG to RGB, soft masks merged into PNG, other codecs to PNG"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
     return await extract_pdf_images_controller(
         file=file,
+        normalize=normalize,
         request=request,
         db=db
     )
\ No newline at end of file
@@ -18,6 +18,7 @@ from app.api.v1.pdf_compression_router import router as pdf_compression_router
 from app.api.v1.heic_convert import router as heic_convert
 from app.api.v1.pdf_extraction import router as pdf_extraction
 from app.api.v1.image_color_effect_router import router as image_color_effect_router
+from app.api.v1.jobs_router import router as jobs_router
 # from app.api.v1.background_router import router as background_router
 
 api_router = APIRouter(prefix="/api/v1")
@@ -41,5 +42,6 @@ api_router.include_router(image_dpi_router, tags=["Image DPI Changer"])
 api_router.include_router(password_generator_router, tags=["Password Generator"])
 api_router.include_router(video_gif_router, tags=["Video to GIF Converter"])
 api_router.include_router(sticker_router, tags=["Sticker Generator"])
+api_router.include_router(jobs_router, tags=["Background Jobs"])
 
 # api_router.include_router(background_router, tags=["Background Removal"])
@@ -46,6 +46,13 @@ async def video_to_sticker(
         description="Reverse sticker animation"
     ),
 
+    stream: bool = Query(
+        False,
+        description="Pipe the video through ffmpeg without temp files "
+                    "(single attempt; falls back to the temp file path "
+                    "when the sticker exceeds 512KB)"
+    ),
+
     db: AsyncSession = Depends(get_db)
 
 ):
@@ -62,6 +69,7 @@ async def video_to_sticker(
         end_time=end_time,
         quality=quality,
         reverse=reverse,
+        stream=stream,
         request=request,
         db=db
     )
@@ -52,6 +52,12 @@ async def video_to_gif(
         description="Reverse the video before converting to GIF"
     ),
 
+    stream: bool = Query(
+        False,
+        description="Pipe the video through ffmpeg and stream the GIF as it is encoded "
+                    "(single pass, no target-size adaptation)"
+    ),
+
     db: AsyncSession = Depends(get_db)
 
 ):
@@ -69,6 +75,7 @@ async def video_to_gif(
         end_time=end_time,
         quality=quality,
         reverse=reverse,
+        stream=stream,
         request=request,
         db=db
     )
@@ -6,6 +6,7 @@ from app.core.logging import logger
 from app.services.log_service import log_action
 from app.enums.action_type import ActionType
 import time
+from starlette.concurrency import run_in_threadpool
 
 
 async def analyze_controller(
@@ -21,8 +22,8 @@ async def analyze_controller(
         validate_file_extension(file.filename)
         await validate_file_size(file)
 
-        contents = await file.read()
-        result = analyze_image(contents)
+        # Pillow reads the spooled upload directly, off the event loop
+        result = await run_in_threadpool(analyze_image, file.file)
 
         await file.close()
 
@@ -37,7 +38,7 @@ async def analyze_controller(
             request=request,
             success=True,
             status_code=200,
-            file_size=len(contents),
+            file_size=file.size,
             original_format=basic_info.get("format"),
             target_format=None,
             width=basic_info.get("width"),
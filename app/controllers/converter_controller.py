@@ -1,8 +1,12 @@
+import io
 from fastapi import UploadFile, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.file_validators import validate_file_size, validate_file_extension
 from app.services.image_converter import convert_image
 from app.core.logging import logger
+from app.core.cache import result_cache, generate_cache_key, CachedResult
 from app.services.log_service import log_action
 from app.enums.action_type import ActionType
 
@@ -19,7 +23,40 @@ async def convert_controller(
         validate_file_extension(file.filename)
         await validate_file_size(file)
 
-        result_data = convert_image(file.file, target_format)
+        cache_key = await run_in_threadpool(
+            generate_cache_key, file.file, "convert", {"target_format": target_format.lower()}
+        )
+        cached = await run_in_threadpool(result_cache.get, cache_key)
+
+        if cached is not None:
+            # Served straight from the cache, Pillow is never touched
+            result_data = {
+                "content": cached.content,
+                "media_type": cached.media_type,
+                "headers": cached.headers,
+                **cached.meta,
+                "processing_time_ms": 0,
+            }
+            cache_status = "HIT"
+        else:
+            result_data = convert_image(file.file, target_format)
+
+            await run_in_threadpool(
+                result_cache.set,
+                cache_key,
+                CachedResult(
+                    result_data["content"],
+                    result_data["media_type"],
+                    result_data["headers"],
+                    meta={
+                        "original_format": result_data["original_format"],
+                        "target_format": result_data["target_format"],
+                        "width": result_data["width"],
+                        "height": result_data["height"],
+                    },
+                ),
+            )
+            cache_status = "MISS"
 
         logger.info(f"Successfully converted to {target_format}")
 
@@ -38,7 +75,11 @@ async def convert_controller(
             processing_time_ms=result_data["processing_time_ms"],
         )
 
-        return result_data["response"]
+        return StreamingResponse(
+            io.BytesIO(result_data["content"]),
+            media_type=result_data["media_type"],
+            headers={**result_data["headers"], "X-Cache": cache_status}
+        )
 
     except HTTPException as e:
 
@@ -25,13 +25,6 @@ async def exif_scrubber_controller(
 
         await validate_file_size(file)
 
-        # read file once for logging
-        await file.seek(0)
-        file_bytes = await file.read()
-
-        # reset pointer before sending to service
-        await file.seek(0)
-
         result_data = await exif_scrubber_service(file)
 
         logger.info("EXIF metadata removed successfully")
@@ -42,7 +35,7 @@ async def exif_scrubber_controller(
             request=request,
             success=True,
             status_code=200,
-            file_size=len(file_bytes),
+            file_size=file.size,
             original_format=file.filename.split(".")[-1].lower(),
             target_format=file.filename.split(".")[-1].lower(),
             width=None,
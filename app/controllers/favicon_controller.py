@@ -26,8 +26,6 @@ async def generate_favicon_controller(
         validate_file_extension(file.filename, ALLOWED_EXTENSIONS)
         await validate_file_size(file)
 
-        file_bytes = await file.read()
-
         response = await generate_favicon_service(
             file.file,
             extension,
@@ -44,7 +42,7 @@ async def generate_favicon_controller(
             request=request,
             success=True,
             status_code=200,
-            file_size=len(file_bytes),
+            file_size=file.size,
             original_format=file.filename.split(".")[-1].lower(),
             target_format=extension,
             width=None,
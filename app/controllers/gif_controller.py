@@ -16,6 +16,7 @@ async def video_to_gif_controller(
     end_time: float,
     quality: str,
     reverse: bool,
+    stream: bool,
     request: Request,
     db: AsyncSession,
 ):
@@ -49,7 +50,9 @@ async def video_to_gif_controller(
             start_time=start_time,
             end_time=end_time,
             quality=quality,
-            reverse=reverse
+            reverse=reverse,
+            request=request,
+            stream=stream
         )
 
         logger.info("Video converted to GIF successfully")
@@ -29,8 +29,6 @@ async def image_to_base64_controller(
         validate_file_extension(file.filename, ALLOWED_EXTENSIONS)
         await validate_file_size(file)
 
-        file_bytes = await file.read()
-
         result = await image_to_base64_service(file.file)
 
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
@@ -41,7 +39,7 @@ async def image_to_base64_controller(
             request=request,
             success=True,
             status_code=200,
-            file_size=len(file_bytes),
+            file_size=file.size,
             original_format=result.get("format"),
             target_format="base64",
             width=None,
@@ -28,17 +28,12 @@ async def _prepare_file(file: UploadFile):
     # Validate extension FIRST (cheap)
     validate_file_extension(file.filename, ALLOWED_EXTENSIONS)
 
-    # Read ONCE
-    await file.seek(0)
-    image_bytes = await file.read()
+    # Size from the spooled upload, header-only format check (no full read)
+    await validate_file_size(file)
+    await validate_real_image(file)
 
-    # Validate size using bytes (no re-read)
-    validate_file_size(image_bytes)
-
-    # Validate real file
-    validate_real_image(file.filename, image_bytes)
-
-    return image_bytes
+    # Services read the spooled file directly
+    return file.file
 
 async def image_dpi_controller(
     file: UploadFile,
@@ -50,10 +45,10 @@ async def image_dpi_controller(
 
         logger.info(f"Changing DPI to {dpi} for: {file.filename}")
 
-        image_bytes = await _prepare_file(file)
+        file_obj = await _prepare_file(file)
 
         result_data = await image_dpi_service(
-            image_bytes=image_bytes,   # 🔥 pass bytes
+            file_obj=file_obj,
             filename=file.filename,
             dpi=dpi,
         )
@@ -119,10 +114,10 @@ async def image_dpi_checker_controller(
 
         logger.info(f"Checking DPI for: {file.filename}")
 
-        image_bytes = await _prepare_file(file)
+        file_obj = await _prepare_file(file)
 
         result_data = await image_dpi_checker_service(
-            image_bytes=image_bytes  # 🔥 pass bytes
+            file_obj=file_obj
         )
 
         logger.info("Image DPI checked successfully")
@@ -2,12 +2,21 @@ from fastapi import UploadFile, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.utils.file_validators import validate_file_size, validate_file_extension
-from app.services.image_to_pdf_service import image_to_pdf_service, pdf_to_image_service
+from app.core.config import IMAGES_TO_PDF_MAX_FILES
+from app.services.image_to_pdf_service import (
+    image_to_pdf_service,
+    images_to_pdf_service,
+    pdf_to_image_service,
+)
+from app.services.pdf_rasterizer import DEFAULT_DPI
 from app.services.log_service import log_action
 from app.enums.action_type import ActionType
 from app.core.logging import logger
 
 
+IMAGE_TO_PDF_EXTENSIONS = ["jpg", "jpeg", "png", "jp2"]
+
+
 async def image_to_pdf_controller(
     file: UploadFile,
     request: Request,
@@ -19,7 +28,7 @@ async def image_to_pdf_controller(
 
         validate_file_extension(
             file.filename,
-            allowed_extensions=["jpg", "jpeg", "png"]
+            allowed_extensions=IMAGE_TO_PDF_EXTENSIONS
         )
 
         await validate_file_size(file)
@@ -78,11 +87,92 @@ async def image_to_pdf_controller(
         )
 
 
+async def images_to_pdf_controller(
+    files: list,
+    request: Request,
+    db: AsyncSession,
+):
+    try:
+
+        logger.info(f"Converting {len(files)} images to PDF")
+
+        if not files:
+            raise HTTPException(status_code=400, detail="No images uploaded.")
+
+        if len(files) > IMAGES_TO_PDF_MAX_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many files. Maximum is {IMAGES_TO_PDF_MAX_FILES} per PDF."
+            )
+
+        for file in files:
+            validate_file_extension(
+                file.filename,
+                allowed_extensions=IMAGE_TO_PDF_EXTENSIONS
+            )
+            await validate_file_size(file)
+
+        result_data = await images_to_pdf_service(files)
+
+        logger.info("Images converted to PDF successfully")
+
+        await log_action(
+            db=db,
+            action_type=ActionType.IMAGE_TO_PDF,
+            request=request,
+            success=True,
+            status_code=200,
+            file_size=result_data["original_size"],
+            original_format=files[0].filename.split(".")[-1].lower(),
+            target_format="pdf",
+            width=None,
+            height=None,
+            processing_time_ms=result_data["processing_time_ms"],
+        )
+
+        return result_data["response"]
+
+    except HTTPException as e:
+
+        await log_action(
+            db=db,
+            action_type=ActionType.IMAGE_TO_PDF,
+            request=request,
+            success=False,
+            status_code=e.status_code,
+            error_type="http_exception",
+            error_message=str(e.detail),
+        )
+
+        raise e
+
+    except Exception as e:
+
+        logger.error(f"Images to PDF error: {str(e)}")
+
+        await log_action(
+            db=db,
+            action_type=ActionType.IMAGE_TO_PDF,
+            request=request,
+            success=False,
+            status_code=500,
+            error_type="internal_error",
+            error_message=str(e),
+        )
+
+        raise HTTPException(
+            status_code=500,
+            detail="Images to PDF conversion failed."
+        )
+
+
 async def pdf_to_image_controller(
     file: UploadFile,
     format: str,
     request: Request,
     db: AsyncSession,
+    dpi: int = DEFAULT_DPI,
+    pages: str = None,
 ):
     try:
 
@@ -95,7 +185,7 @@ async def pdf_to_image_controller(
 
         await validate_file_size(file)
 
-        result_data = await pdf_to_image_service(file, format)
+        result_data = await pdf_to_image_service(file, format, dpi, pages)
 
         logger.info("PDF converted to images successfully")
 
@@ -32,10 +32,8 @@ async def resize_image_controller(
         validate_file_extension(file.filename, ALLOWED_EXTENSIONS)
         await validate_file_size(file)
 
-        file_bytes = await file.read()
-
         response, metadata = resize_image_service(
-            file_bytes,
+            file.file,
             width,
             height,
             keep_aspect
@@ -49,7 +47,7 @@ async def resize_image_controller(
             request=request,
             success=True,
             status_code=200,
-            file_size=len(file_bytes),
+            file_size=file.size,
             original_format=metadata["format"],
             target_format=None,
             width=metadata["width"],
@@ -111,10 +109,8 @@ async def crop_image_controller(
         validate_file_extension(file.filename, ALLOWED_EXTENSIONS)
         await validate_file_size(file)
 
-        file_bytes = await file.read()
-
         response, metadata = crop_image_service(
-            file_bytes,
+            file.file,
             left,
             top,
             right,
@@ -129,7 +125,7 @@ async def crop_image_controller(
             request=request,
             success=True,
             status_code=200,
-            file_size=len(file_bytes),
+            file_size=file.size,
             original_format=metadata["format"],
             target_format=None,
             width=metadata["width"],
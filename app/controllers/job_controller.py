@@ -0,0 +1,195 @@
+from fastapi import UploadFile, HTTPException, Request
+from fastapi.responses import JSONResponse, FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import MAX_FILE_SIZE
+from app.enums.action_type import ActionType
+from app.services import gif_service, sticker_service
+from app.services.pdf_compressor import COMPRESSION_PRESETS
+from app.services.job_service import (
+    submit_job,
+    get_job_or_404,
+    wait_for_job,
+    result_path_or_error,
+    job_progress,
+)
+from app.services.log_service import log_action
+from app.utils.file_validators import validate_file_extension
+from app.core.logging import logger
+
+
+MAX_WAIT_SECONDS = 30
+
+
+def _job_response(request: Request, job, status_code=200):
+    body = job.to_dict()
+    body["progress"] = job_progress(job)
+    status_url = str(request.url_for("get_job", job_id=job.id))
+    body["status_url"] = status_url
+    body["result_url"] = str(request.url_for("get_job_result", job_id=job.id))
+
+    headers = {"Location": status_url} if status_code == 202 else None
+    return JSONResponse(status_code=status_code, content=body, headers=headers)
+
+
+async def _submit_wrapper(
+    file: UploadFile,
+    request: Request,
+    db: AsyncSession,
+    action_type: ActionType,
+    allowed_extensions,
+    max_size: int,
+    target_format: str,
+    params: dict,
+):
+    try:
+        logger.info(f"Queueing {action_type.value} job: {file.filename}")
+
+        validate_file_extension(file.filename, allowed_extensions=allowed_extensions)
+
+        job = await submit_job(db, file, action_type, params, max_size)
+
+        await log_action(
+            db=db,
+            action_type=action_type,
+            request=request,
+            success=True,
+            status_code=202,
+            file_size=job.original_size,
+            original_format=file.filename.split(".")[-1].lower(),
+            target_format=target_format,
+        )
+
+        return _job_response(request, job, status_code=202)
+
+    except HTTPException as e:
+
+        await log_action(
+            db=db,
+            action_type=action_type,
+            request=request,
+            success=False,
+            status_code=e.status_code,
+            error_type="http_exception",
+            error_message=str(e.detail),
+        )
+
+        raise e
+
+    except Exception as e:
+
+        logger.error(f"{action_type.value} job submit error: {str(e)}")
+
+        await log_action(
+            db=db,
+            action_type=action_type,
+            request=request,
+            success=False,
+            status_code=500,
+            error_type="internal_error",
+            error_message=str(e),
+        )
+
+        raise HTTPException(status_code=500, detail="Could not queue the job.")
+
+
+async def submit_video_to_gif_job_controller(
+    file, fps, width, start_time, end_time, quality, reverse, request, db
+):
+    if width > gif_service.MAX_WIDTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum GIF width is {gif_service.MAX_WIDTH}px"
+        )
+
+    if start_time < 0 or end_time <= start_time:
+        raise HTTPException(status_code=400, detail="Invalid trim range.")
+
+    return await _submit_wrapper(
+        file, request, db,
+        ActionType.VIDEO_TO_GIF,
+        ["mp4", "mov", "avi", "webm"],
+        gif_service.MAX_FILE_SIZE,
+        "gif",
+        {
+            "fps": fps,
+            "width": width,
+            "start_time": start_time,
+            "end_time": end_time,
+            "quality": quality,
+            "reverse": reverse,
+        },
+    )
+
+
+async def submit_video_to_sticker_job_controller(
+    file, fps, start_time, end_time, quality, reverse, request, db
+):
+    if start_time < 0 or end_time <= start_time:
+        raise HTTPException(status_code=400, detail="Invalid trim range.")
+
+    return await _submit_wrapper(
+        file, request, db,
+        ActionType.VIDEO_TO_STICKER,
+        ["mp4", "mov", "webm"],
+        sticker_service.MAX_FILE_SIZE,
+        "webp",
+        {
+            "fps": fps,
+            "start_time": start_time,
+            "end_time": end_time,
+            "quality": quality,
+            "reverse": reverse,
+        },
+    )
+
+
+async def submit_pdf_compress_job_controller(file, compression_level, request, db):
+    # Parameters are checked up front so the job cannot fail on them later
+    if compression_level.lower() not in COMPRESSION_PRESETS:
+        raise HTTPException(status_code=400, detail="Invalid compression level")
+
+    return await _submit_wrapper(
+        file, request, db,
+        ActionType.PDF_COMPRESS,
+        ["pdf"],
+        MAX_FILE_SIZE,
+        "pdf",
+        {"compression_level": compression_level},
+    )
+
+
+async def submit_pdf_compress_pro_job_controller(file, quality, dpi, request, db):
+    if not (30 <= quality <= 95):
+        raise HTTPException(status_code=400, detail="Quality must be 30-95")
+    if not (72 <= dpi <= 300):
+        raise HTTPException(status_code=400, detail="DPI must be 72-300")
+
+    return await _submit_wrapper(
+        file, request, db,
+        ActionType.PDF_COMPRESS_PRO,
+        ["pdf"],
+        MAX_FILE_SIZE,
+        "pdf",
+        {"quality": quality, "dpi": dpi},
+    )
+
+
+async def get_job_controller(job_id: str, wait: float, request: Request, db: AsyncSession):
+    if wait:
+        job = await wait_for_job(db, job_id, min(wait, MAX_WAIT_SECONDS))
+    else:
+        job = await get_job_or_404(db, job_id)
+
+    return _job_response(request, job)
+
+
+async def get_job_result_controller(job_id: str, db: AsyncSession):
+    job = await get_job_or_404(db, job_id)
+    path = result_path_or_error(job)
+
+    return FileResponse(
+        path=path,
+        media_type=job.media_type,
+        filename=job.output_filename,
+    )
@@ -1,6 +1,8 @@
 import io
 import time
 from fastapi import UploadFile, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils.file_validators import validate_file_extension, validate_file_size
 from app.services.image_optimizer import (
@@ -10,9 +12,14 @@ from app.services.image_optimizer import (
     optimize_custom,
     optimize_for_instagram,
     optimize_for_youtube,
-    optimize_for_seo,
+    stream_seo_variants,
+    seo_cache_params,
 )
+from app.services.batch_optimizer import collect_batch_items, resolve_preset, stream_batch
 from app.core.logging import logger
+from app.core.worker_pool import run_cpu_bound
+from app.core.cache import result_cache, generate_cache_key, CachedResult
+from app.utils.zip_stream import prime_chunks
 from app.services.log_service import log_action
 from app.enums.action_type import ActionType
 
@@ -21,14 +28,34 @@ from app.enums.action_type import ActionType
 # Shared Logging Wrapper
 # -----------------------------
 
+def _cache_chunks(chunks, cache_key, media_type, headers):
+    """Passes the chunks through and caches the whole body at the end."""
+    collected = []
+
+    for chunk in chunks:
+        collected.append(chunk)
+        yield chunk
+
+    result_cache.set(cache_key, CachedResult(b"".join(collected), media_type, headers))
+
+
 async def _optimize_wrapper(
     file: UploadFile,
     request: Request,
     db: AsyncSession,
     action_type: ActionType,
     optimize_function,
-    *args
+    *args,
+    stream=False,
+    cache_params=None
 ):
+    """
+    With stream=True, optimize_function returns (chunk generator, media type,
+    headers) and runs in the threadpool while the response streams; the
+    joined chunks are cached once the last one has been produced.
+    cache_params(*args) gives normalized key parameters, so equivalent
+    requests share an entry.
+    """
     start_time = time.perf_counter()
 
     try:
@@ -36,11 +63,38 @@ async def _optimize_wrapper(
         await validate_file_size(file)
 
         contents = await file.read()
-        image_data = io.BytesIO(contents)
 
         logger.info(f"Optimizing using {action_type.value}")
 
-        response = optimize_function(image_data, *args)
+        params = cache_params(*args) if cache_params else {"args": list(args)}
+        cache_key = await run_in_threadpool(
+            generate_cache_key, contents, action_type.value, params
+        )
+        cached = await run_in_threadpool(result_cache.get, cache_key)
+
+        if cached is not None:
+            # Served straight from the cache, Pillow is never touched
+            content, media_type, headers = cached.content, cached.media_type, cached.headers
+            cache_status = "HIT"
+        elif stream:
+            chunks, media_type, headers = optimize_function(contents, *args)
+            content = await prime_chunks(_cache_chunks(chunks, cache_key, media_type, headers))
+            cache_status = "MISS"
+        else:
+            # Pillow work runs in the shared process pool, off the event loop
+            content, media_type, headers = await run_cpu_bound(
+                optimize_function, contents, *args
+            )
+            await run_in_threadpool(
+                result_cache.set, cache_key, CachedResult(content, media_type, headers)
+            )
+            cache_status = "MISS"
+
+        response = StreamingResponse(
+            io.BytesIO(content) if isinstance(content, bytes) else content,
+            media_type=media_type,
+            headers={**headers, "X-Cache": cache_status}
+        )
 
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
 
@@ -129,11 +183,15 @@ async def optimize_youtube_controller(file, request, db):
     )
 
 
-async def optimize_seo_controller(file, request, db):
+async def optimize_seo_controller(file, sizes, formats, request, db):
     return await _optimize_wrapper(
         file, request, db,
         ActionType.OPTIMIZE_SEO,
-        optimize_for_seo
+        stream_seo_variants,
+        sizes,
+        formats,
+        stream=True,
+        cache_params=seo_cache_params
     )
 
 
@@ -147,4 +205,71 @@ async def optimize_custom_controller(file, target_kb, quality, resize_percent, r
         target_kb,
         quality,
         resize_percent
-    )
\ No newline at end of file
+    )
+
+
+async def optimize_batch_controller(files, preset, target_kb, quality, resize_percent, request, db):
+    start_time = time.perf_counter()
+
+    try:
+        resolve_preset(preset)
+        items = await collect_batch_items(files)
+
+        # Only the custom preset takes parameters
+        args = (target_kb, quality, resize_percent) if preset.lower() == "custom" else ()
+
+        logger.info(f"Optimizing batch of {len(items)} files with preset {preset}")
+
+        response = StreamingResponse(
+            stream_batch(items, preset, args),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": "attachment; filename=optimized-batch.zip",
+                "X-Batch-Files": str(len(items)),
+            }
+        )
+
+        # Per-file sizes and timings are in the manifest; this logs the submission
+        await log_action(
+            db=db,
+            action_type=ActionType.OPTIMIZE_BATCH,
+            request=request,
+            success=True,
+            status_code=200,
+            file_size=sum(f.size or 0 for f in files),
+            original_format="batch",
+            target_format=preset.lower(),
+            processing_time_ms=int((time.perf_counter() - start_time) * 1000),
+        )
+
+        return response
+
+    except HTTPException as e:
+
+        await log_action(
+            db=db,
+            action_type=ActionType.OPTIMIZE_BATCH,
+            request=request,
+            success=False,
+            status_code=e.status_code,
+            error_type="http_exception",
+            error_message=str(e.detail),
+        )
+
+        raise e
+
+    except Exception as e:
+
+        logger.error(f"{ActionType.OPTIMIZE_BATCH.value} error: {str(e)}")
+
+        await log_action(
+            db=db,
+            action_type=ActionType.OPTIMIZE_BATCH,
+            request=request,
+            success=False,
+            status_code=500,
+            error_type="internal_error",
+            error_message=str(e),
+        )
+
+        raise HTTPException(status_code=500, detail="Batch optimization failed.")
@@ -9,6 +9,7 @@ from app.enums.action_type import ActionType
 async def compress_pdf_controller(
     file: UploadFile,
     compression_level: str,
+    image_stats: bool,
     request: Request,
     db: AsyncSession,
 ):
@@ -18,7 +19,7 @@ async def compress_pdf_controller(
         validate_file_extension(file.filename, allowed_extensions=["pdf"])
         await validate_file_size(file)
 
-        result_data = await compress_pdf_file(file.file, compression_level)
+        result_data = await compress_pdf_file(file.file, compression_level, image_stats)
 
         logger.info("PDF compressed successfully")
 
@@ -68,6 +69,7 @@ async def compress_pdf_pro_controller(
     file: UploadFile,
     quality: int,
     dpi: int,
+    image_stats: bool,
     request: Request,
     db: AsyncSession,
 ):
@@ -80,7 +82,8 @@ async def compress_pdf_pro_controller(
         result_data = await compress_pdf_pro_service(
             file=file.file,
             quality=quality,
-            dpi=dpi
+            dpi=dpi,
+            image_stats=image_stats
         )
 
         await log_action(
@@ -12,6 +12,7 @@ async def extract_pdf_images_controller(
     file: UploadFile,
     request: Request,
     db: AsyncSession,
+    normalize: bool = False,
 ):
     try:
 
@@ -24,7 +25,7 @@ async def extract_pdf_images_controller(
 
         await validate_file_size(file)
 
-        result_data = await extract_pdf_images_service(file)
+        result_data = await extract_pdf_images_service(file, normalize)
 
         logger.info(f"Successfully extracted images from {file.filename}")
 
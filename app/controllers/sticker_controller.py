@@ -15,6 +15,7 @@ async def video_to_sticker_controller(
     end_time: float,
     quality: str,
     reverse: bool,
+    stream: bool,
     request: Request,
     db: AsyncSession,
 ):
@@ -35,7 +36,9 @@ async def video_to_sticker_controller(
             start_time=start_time,
             end_time=end_time,
             quality=quality,
-            reverse=reverse
+            reverse=reverse,
+            request=request,
+            stream=stream
         )
 
         logger.info("Video converted to sticker successfully")
@@ -100,7 +103,7 @@ async def image_to_sticker_controller(
 
         validate_file_extension(
             file.filename,
-            allowed_extensions=["jpg", "jpeg", "png", "webp"]
+            allowed_extensions=["jpg", "jpeg", "png", "webp", "gif"]
         )
 
         await validate_file_size(file)
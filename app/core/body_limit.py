@@ -0,0 +1,53 @@
+from fastapi import FastAPI, HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import MAX_REQUEST_SIZE
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects request bodies over max_size while they are being received, so an
+    oversized upload is never fully spooled before the size check runs.
+
+    The cap is on the whole body (every file and form field of a multipart
+    request together), not per file: the per-file limits are still enforced
+    by app.utils.file_validators once the body is parsed. Register it before
+    the CORS middleware so its 413s carry the CORS headers.
+    """
+
+    def __init__(self, app, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        # Declared size: reject before reading anything
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_size:
+                response = JSONResponse(
+                    status_code=413,
+                    content={"detail": "Request body too large"},
+                )
+                return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    # Raised inside body parsing; FastAPI turns it into a 413 response
+                    raise HTTPException(status_code=413, detail="Request body too large")
+
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def setup_body_limit(app: FastAPI) -> None:
+    app.add_middleware(BodySizeLimitMiddleware, max_size=MAX_REQUEST_SIZE)
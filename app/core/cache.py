@@ -1,7 +1,262 @@
-from functools import lru_cache
 import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
 
-def generate_cache_key(content: bytes):
-    return hashlib.md5(content).hexdigest()
+from app.core.config import (
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MAX_ENTRY_BYTES,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_DISK_MAX_BYTES,
+)
+from app.core.logging import logger
 
-cache_store = {}
\ No newline at end of file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# The disk tier is shared by every worker, so its budget is enforced from
+# the directory itself: after writing this fraction of the budget, a worker
+# rescans the directory and evicts the least recently used files (reads
+# touch their mtime). The directory exceeds the budget by at most
+# workers x budget / DISK_RESCAN_FRACTION between scans.
+DISK_RESCAN_FRACTION = 20
+
+
+def hash_content(source) -> str:
+    """sha256 of raw bytes or of a seekable file object (read in chunks, pointer restored)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+
+    digest = hashlib.sha256()
+    source.seek(0)
+    while chunk := source.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+def generate_cache_key(content, endpoint: str = "", params: dict = None) -> str:
+    """Content-addressed key: input hash + endpoint + normalized parameters."""
+    normalized = json.dumps(
+        {k: v for k, v in (params or {}).items() if v is not None},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(
+        f"{endpoint}|{hash_content(content)}|{normalized}".encode()
+    ).hexdigest()
+
+
+class CachedResult:
+    __slots__ = ("content", "media_type", "headers", "meta")
+
+    def __init__(self, content: bytes, media_type: str, headers: dict = None, meta: dict = None):
+        self.content = content
+        self.media_type = media_type
+        self.headers = headers or {}
+        self.meta = meta or {}
+
+    @property
+    def size(self):
+        return len(self.content)
+
+
+class ResultCache:
+    """
+    Byte-budgeted LRU cache of finished responses, with an optional disk tier.
+    Entries are written through to disk (when enabled) so they survive
+    restarts and are shared between uvicorn workers.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes, disk_dir=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # As of the last directory scan, plus this worker's writes since
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        self._disk_written = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._enforce_disk_budget()
+
+    # -----------------------
+    # MEMORY TIER
+    # -----------------------
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._disk_get(key)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+
+        self._memory_set(key, entry)
+        return entry
+
+    def set(self, key, entry: CachedResult):
+        if entry.size > self.max_entry_bytes:
+            return
+
+        self._memory_set(key, entry)
+        self._disk_set(key, entry)
+
+    def _memory_set(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+
+            self._entries[key] = entry
+            self._bytes += entry.size
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    # -----------------------
+    # DISK TIER
+    # -----------------------
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.bin")
+
+    def _enforce_disk_budget(self):
+        """Scans the shared directory and evicts the oldest files over budget."""
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if name.endswith(".bin"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue  # evicted by another worker meanwhile
+                    files.append((stat.st_mtime, path, stat.st_size))
+
+        total = sum(size for _, _, size in files)
+        entries = len(files)
+
+        # Oldest first, so eviction order follows last use across workers
+        for _, path, size in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            entries -= 1
+
+        with self._lock:
+            self._disk_entries = entries
+            self._disk_bytes = total
+            self._disk_written = 0
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                header_len = int.from_bytes(f.read(4), "big")
+                header = json.loads(f.read(header_len))
+                content = f.read()
+            # mtime is the shared last-use time eviction goes by
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another worker sharing the directory
+            return None
+        except Exception as e:
+            logger.warning(f"Result cache: unreadable disk entry {key}: {e}")
+            return None
+
+        return CachedResult(content, header["media_type"], header["headers"], header["meta"])
+
+    def _disk_set(self, key, entry):
+        if not self.disk_dir:
+            return
+
+        header = json.dumps({
+            "media_type": entry.media_type,
+            "headers": entry.headers,
+            "meta": entry.meta,
+        }).encode()
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Atomic publish: other workers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(len(header).to_bytes(4, "big"))
+                f.write(header)
+                f.write(entry.content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Result cache: disk write failed: {e}")
+            return
+
+        size = 4 + len(header) + entry.size
+        with self._lock:
+            self._disk_entries += 1
+            self._disk_bytes += size
+            self._disk_written += size
+            rescan = self._disk_written >= self.disk_max_bytes // DISK_RESCAN_FRACTION
+
+        if rescan:
+            self._enforce_disk_budget()
+
+    # -----------------------
+    # STATS
+    # -----------------------
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_entries": self._disk_entries,
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+result_cache = ResultCache(
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    max_entry_bytes=RESULT_CACHE_MAX_ENTRY_BYTES,
+    disk_dir=RESULT_CACHE_DIR,
+    disk_max_bytes=RESULT_CACHE_DISK_MAX_BYTES,
+)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,10 +7,42 @@ load_dotenv()
 # MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10485760))
 MAX_FILE_SIZE_VIDEO = 50 * 1024 * 1024  # 50MB
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 50MB
+# Whole request body, enforced while it is received (batch uploads included)
+MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE") or 256 * 1024 * 1024)
 RATE_LIMIT = os.getenv("RATE_LIMIT", "10/minute")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+# CPU worker pool (per uvicorn worker)
+CPU_WORKERS = int(os.getenv("CPU_WORKERS") or 2)
+CPU_QUEUE_DEPTH = int(os.getenv("CPU_QUEUE_DEPTH") or 8)
+CPU_JOB_TIMEOUT = float(os.getenv("CPU_JOB_TIMEOUT") or 60)
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES") or 50)
+IMAGES_TO_PDF_MAX_FILES = int(os.getenv("IMAGES_TO_PDF_MAX_FILES") or 300)
+
+# Background jobs (video -> GIF / sticker, PDF compression)
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "image-processor-jobs")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or 2)
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT") or 300)
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL") or 3600)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS") or 2)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL") or 2)
+
+# ffmpeg scheduling, shared by every uvicorn worker on the host
+FFMPEG_SLOTS = int(os.getenv("FFMPEG_SLOTS") or 2)
+FFMPEG_LOCK_DIR = os.getenv("FFMPEG_LOCK_DIR") or os.path.join(tempfile.gettempdir(), "image-processor-ffmpeg")
+FFMPEG_QUEUE_TIMEOUT = float(os.getenv("FFMPEG_QUEUE_TIMEOUT") or 60)
+# Extra slots are only used below this 1-minute load per CPU ...
+FFMPEG_MAX_LOAD = float(os.getenv("FFMPEG_MAX_LOAD") or 1.5)
+# ... and with at least this much memory available
+FFMPEG_MIN_FREE_MEMORY = int(os.getenv("FFMPEG_MIN_FREE_MEMORY") or 256 * 1024 * 1024)
+
+# Result cache (memory LRU + optional disk tier)
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES") or 64 * 1024 * 1024)
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES") or 8 * 1024 * 1024)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "")
+RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES") or 1024 * 1024 * 1024)
+
 
 # Expanded allowed extensions for validation
 ALLOWED_EXTENSIONS = {
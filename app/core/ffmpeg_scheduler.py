@@ -0,0 +1,352 @@
+import asyncio
+import heapq
+import itertools
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app.core.config import (
+    FFMPEG_SLOTS,
+    FFMPEG_LOCK_DIR,
+    FFMPEG_QUEUE_TIMEOUT,
+    FFMPEG_MAX_LOAD,
+    FFMPEG_MIN_FREE_MEMORY,
+)
+from app.core.logging import logger
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: slots are only enforced within this process
+    fcntl = None
+
+
+# ─────────────────────────────────────────────
+# FFMPEG SCHEDULER
+# ─────────────────────────────────────────────
+# ffmpeg runs are limited to FFMPEG_SLOTS across every uvicorn worker on the
+# host. A slot is an flock on FFMPEG_LOCK_DIR/slot-<n>.lock; the kernel drops
+# it if the holder dies, so a crashed worker never leaks capacity.
+#
+# Within a process, waiters form a priority queue keyed by
+# clip seconds + enqueue time: short clips go first, and a long clip gains one
+# position-second per second waited so it is never starved. Only the head of
+# the queue competes for a slot. Slots beyond the first are only taken while
+# the host has CPU and memory headroom, so a busy container keeps working at
+# reduced parallelism instead of swapping.
+
+SLOT_POLL_INTERVAL = 0.25
+DISCONNECT_POLL_INTERVAL = 1.0
+PIPE_CHUNK_SIZE = 64 * 1024
+STDERR_TAIL_BYTES = 4096
+
+_queue = []
+_sequence = itertools.count()
+_slot_files = {}
+_held = set()
+
+# Replaced on every release; the queue head waits on the current one
+_released = asyncio.Event()
+
+_stats = {
+    "admitted": 0,
+    "rejected": 0,
+    "disconnects": 0,
+    "total_wait_ms": 0,
+    "max_wait_ms": 0,
+}
+
+
+def _notify_released():
+    global _released
+    _released.set()
+    _released = asyncio.Event()
+
+
+def _slot_file(index):
+    if index not in _slot_files:
+        os.makedirs(FFMPEG_LOCK_DIR, exist_ok=True)
+        _slot_files[index] = open(os.path.join(FFMPEG_LOCK_DIR, f"slot-{index}.lock"), "a+")
+    return _slot_files[index]
+
+
+def _try_lock(index):
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(_slot_file(index), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _unlock(index):
+    if fcntl is not None:
+        fcntl.flock(_slot_file(index), fcntl.LOCK_UN)
+
+
+# -----------------------
+# ADMISSION
+# -----------------------
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+        return int(value) if value.isdigit() else None
+    except OSError:
+        return None
+
+
+def available_memory():
+    """Bytes available to this container: cgroup limit if set, else MemAvailable."""
+    candidates = []
+
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        limit, usage = _read_int(limit_path), _read_int(usage_path)
+        if limit is not None and usage is not None and limit < 1 << 60:
+            candidates.append(limit - usage)
+
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except OSError:
+        pass
+
+    return min(candidates) if candidates else None
+
+
+def has_headroom():
+    try:
+        load = os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        load = 0.0
+
+    if load > FFMPEG_MAX_LOAD:
+        return False
+
+    memory = available_memory()
+    return memory is None or memory >= FFMPEG_MIN_FREE_MEMORY
+
+
+def _acquire_slot():
+    """Non-blocking: index of a free slot this process may take, or None."""
+    for index in range(FFMPEG_SLOTS):
+        if index in _held or not _try_lock(index):
+            continue
+
+        # The first slot is always admitted so work keeps moving
+        if index > 0 and not has_headroom():
+            _unlock(index)
+            return None
+
+        _held.add(index)
+        return index
+
+    return None
+
+
+def _release_slot(index):
+    _held.discard(index)
+    _unlock(index)
+    _notify_released()
+
+
+def scheduler_stats():
+    admitted = _stats["admitted"]
+    return {
+        "slots": FFMPEG_SLOTS,
+        "running": len(_held),
+        "queued": len(_queue),
+        "admitted": admitted,
+        "rejected": _stats["rejected"],
+        "disconnects": _stats["disconnects"],
+        "avg_wait_ms": int(_stats["total_wait_ms"] / admitted) if admitted else 0,
+        "max_wait_ms": _stats["max_wait_ms"],
+    }
+
+
+# -----------------------
+# SLOTS
+# -----------------------
+
+@asynccontextmanager
+async def ffmpeg_slot(cost: float, timeout=FFMPEG_QUEUE_TIMEOUT):
+    """
+    Holds one global ffmpeg slot for the block. `cost` is the clip length in
+    seconds (shorter runs first). Raises 503 if no slot frees up within
+    `timeout` seconds (None waits indefinitely).
+    """
+    loop = asyncio.get_running_loop()
+    enqueued = loop.time()
+    entry = [cost + enqueued, next(_sequence)]
+    heapq.heappush(_queue, entry)
+
+    index = None
+
+    try:
+        while True:
+            if _queue[0] is entry:
+                index = _acquire_slot()
+                if index is not None:
+                    break
+
+            remaining = None if timeout is None else enqueued + timeout - loop.time()
+            if remaining is not None and remaining <= 0:
+                _stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server is busy, please retry shortly.",
+                    headers={"Retry-After": "10"},
+                )
+
+            # Releases in other processes are only seen by polling
+            wait = SLOT_POLL_INTERVAL if remaining is None else min(remaining, SLOT_POLL_INTERVAL)
+            try:
+                await asyncio.wait_for(_released.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    finally:
+        _queue.remove(entry)
+        heapq.heapify(_queue)
+        # The next waiter is head now and may take another slot
+        _notify_released()
+
+    wait_ms = int((loop.time() - enqueued) * 1000)
+    _stats["admitted"] += 1
+    _stats["total_wait_ms"] += wait_ms
+    _stats["max_wait_ms"] = max(_stats["max_wait_ms"], wait_ms)
+
+    if wait_ms > 1000:
+        logger.info(f"ffmpeg slot {index} granted after {wait_ms}ms in queue ({cost:.1f}s clip)")
+
+    # Streamed responses leave the block in another task than they entered
+    # it, so the slot holds no task-bound state and only releases the lock
+    try:
+        yield index
+    finally:
+        _release_slot(index)
+
+
+# -----------------------
+# RUNNER
+# -----------------------
+
+async def _wait_or_disconnect(awaitable, request):
+    """Awaits `awaitable`, raising 499 if the request's client disconnects first."""
+    if request is None:
+        return await awaitable
+
+    task = asyncio.ensure_future(awaitable)
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+
+            if await request.is_disconnected():
+                _stats["disconnects"] += 1
+                raise HTTPException(status_code=499, detail="Client closed request.")
+    finally:
+        task.cancel()
+
+
+async def run_ffmpeg(command, request=None):
+    """
+    Runs one ffmpeg command. The child is killed if the caller is cancelled
+    (timeouts, shutdown) or, with a request, if its client disconnects.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    try:
+        _, stderr = await _wait_or_disconnect(process.communicate(), request)
+
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
+        raise
+
+    if process.returncode != 0:
+        raise Exception(f"FFmpeg failed: {stderr.decode()}")
+
+
+async def stream_ffmpeg(command, upload, request=None):
+    """
+    Runs ffmpeg with the upload on stdin (pipe:0) and yields its stdout
+    (pipe:1) as it is produced. stdin writes wait for ffmpeg to consume them,
+    and stdout is only read as fast as the consumer takes chunks, so a slow
+    client pauses ffmpeg instead of buffering output. The child is killed if
+    the generator is closed early or, with a request, if its client
+    disconnects while ffmpeg has not produced output yet.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+
+    stderr_tail = bytearray()
+
+    async def feed():
+        try:
+            await upload.seek(0)
+            while chunk := await upload.read(PIPE_CHUNK_SIZE):
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg stops reading once it has the requested segment
+        finally:
+            process.stdin.close()
+
+    async def collect_stderr():
+        while chunk := await process.stderr.read(PIPE_CHUNK_SIZE):
+            stderr_tail.extend(chunk)
+            del stderr_tail[:-STDERR_TAIL_BYTES]
+
+    helpers = [asyncio.ensure_future(feed()), asyncio.ensure_future(collect_stderr())]
+
+    try:
+        while chunk := await _wait_or_disconnect(process.stdout.read(PIPE_CHUNK_SIZE), request):
+            yield chunk
+
+        await process.wait()
+        await asyncio.gather(*helpers)
+
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
+        for task in helpers:
+            task.cancel()
+
+    if process.returncode != 0:
+        raise Exception(f"FFmpeg failed: {stderr_tail.decode(errors='replace')}")
+
+
+async def prime_stream(chunks):
+    """
+    Waits for the first output chunk, so slot rejections and ffmpeg start-up
+    failures still become normal error responses, then returns the full body.
+    """
+    first = await chunks.__anext__()
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return body()
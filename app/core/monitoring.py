@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from app.core.worker_pool import pool_stats
+from app.core.cache import result_cache
+from app.core.ffmpeg_scheduler import scheduler_stats
 
 router = APIRouter()
 
@@ -7,5 +10,8 @@ def health_check():
     return {
         "status": "healthy",
         "service": "image-processor",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "worker_pool": pool_stats(),
+        "ffmpeg": scheduler_stats(),
+        "result_cache": result_cache.stats()
     }
\ No newline at end of file
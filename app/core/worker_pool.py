@@ -0,0 +1,221 @@
+import asyncio
+import multiprocessing
+from collections import deque
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+from app.core.config import CPU_WORKERS, CPU_QUEUE_DEPTH, CPU_JOB_TIMEOUT
+from app.core.logging import logger
+
+
+# ─────────────────────────────────────────────
+# SHARED CPU WORKER POOL
+# ─────────────────────────────────────────────
+# One process pool per uvicorn worker. Jobs beyond
+# CPU_WORKERS running + CPU_QUEUE_DEPTH waiting are rejected with 503.
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+class _JobHTTPError(Exception):
+    """Picklable carrier for HTTPExceptions raised inside a worker."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _invoke(func, args):
+    try:
+        return func(*args)
+    except HTTPException as e:
+        # FastAPI's HTTPException does not survive pickling
+        raise _JobHTTPError(e.status_code, e.detail) from None
+
+
+def get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that runs an event loop + threadpool is unsafe
+            _executor = ProcessPoolExecutor(
+                max_workers=CPU_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"CPU worker pool started ({CPU_WORKERS} workers)")
+
+    return _executor
+
+
+def _release(_future):
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def pool_stats():
+    return {
+        "workers": CPU_WORKERS,
+        "queue_depth": CPU_QUEUE_DEPTH,
+        "in_flight": _in_flight,
+    }
+
+
+def _admit():
+    global _in_flight
+
+    with _in_flight_lock:
+        if _in_flight >= CPU_WORKERS + CPU_QUEUE_DEPTH:
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+        _in_flight += 1
+
+
+@contextmanager
+def cpu_admission():
+    """
+    Holds one admission slot for the block, for requests that fan out with
+    imap / imap_unordered instead of going through run_cpu_bound. Raises 503
+    when the pool is saturated.
+    """
+    _admit()
+    try:
+        yield
+    finally:
+        _release(None)
+
+
+async def run_cpu_bound(func, *args, timeout=CPU_JOB_TIMEOUT):
+    """
+    Run a picklable, module-level function in the shared process pool.
+    Raises 503 when the pool is saturated and 504 when the job times out.
+    """
+    global _executor
+
+    _admit()
+
+    try:
+        future = get_executor().submit(_invoke, func, args)
+    except Exception:
+        _release(None)
+        raise
+
+    # The slot is only freed once the worker is done, even after a timeout
+    future.add_done_callback(_release)
+
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+
+    except asyncio.TimeoutError:
+        logger.error(f"CPU job {func.__name__} timed out after {timeout}s")
+        raise HTTPException(status_code=504, detail="Processing timed out.")
+
+    except _JobHTTPError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM killed); start a fresh pool for the next job
+        logger.error("CPU worker pool broken, restarting")
+        with _executor_lock:
+            _executor = None
+        raise
+
+
+def _reset_broken_pool():
+    global _executor
+
+    logger.error("CPU worker pool broken, restarting")
+    with _executor_lock:
+        _executor = None
+
+
+def _result(future):
+    try:
+        return future.result()
+    except _JobHTTPError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+def imap_unordered(func, items, window=CPU_WORKERS * 2):
+    """
+    Synchronous fan-out for code already running in a worker thread: calls
+    func(*item) in the shared pool for every tuple in `items` and yields the
+    results as they complete. At most `window` items are submitted at once,
+    so `items` can be a generator that produces large payloads lazily.
+    Not subject to the 503 admission check; callers are already admitted
+    (run_cpu_bound or cpu_admission).
+    """
+    items = iter(items)
+    pending = set()
+
+    try:
+        while True:
+            for item in items:
+                pending.add(get_executor().submit(_invoke, func, item))
+                if len(pending) >= window:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield _result(future)
+
+    except BrokenProcessPool:
+        _reset_broken_pool()
+        raise
+
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def imap(func, items, window=CPU_WORKERS * 2):
+    """
+    Like imap_unordered, but yields results in the order of `items`. A slow
+    item holds back the ones after it, so at most `window` results wait.
+    """
+    items = iter(items)
+    pending = deque()
+
+    try:
+        while True:
+            for item in items:
+                pending.append(get_executor().submit(_invoke, func, item))
+                if len(pending) >= window:
+                    break
+
+            if not pending:
+                return
+
+            yield _result(pending.popleft())
+
+    except BrokenProcessPool:
+        _reset_broken_pool()
+        raise
+
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def shutdown_worker_pool():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
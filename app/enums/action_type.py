@@ -17,6 +17,7 @@ class ActionType(str, Enum):
     OPTIMIZE_INSTAGRAM = "optimize_instagram"
     OPTIMIZE_YOUTUBE = "optimize_youtube"
     OPTIMIZE_SEO = "optimize_seo"
+    OPTIMIZE_BATCH = "optimize_batch"
 
 
     PDF_COMPRESS = "pdf_compress"
@@ -5,15 +5,24 @@ from app.api.v1.routes import api_router
 from app.core.logging import setup_logging
 from app.core.monitoring import router as monitoring_router
 from app.core.cors import setup_cors
+from app.core.body_limit import setup_body_limit
+from app.core.worker_pool import shutdown_worker_pool
+from app.services.job_service import start_job_workers, stop_job_workers
 
 setup_logging()
 
 app = FastAPI(title="Image Format Converter API")
 
+app.add_event_handler("startup", start_job_workers)
+app.add_event_handler("shutdown", stop_job_workers)
+app.add_event_handler("shutdown", shutdown_worker_pool)
+
 # -----------------------------
 # MIDDLEWARES
 # -----------------------------
 
+# Added first so CORS wraps it: 413s still carry the CORS headers
+setup_body_limit(app)
 setup_cors(app) 
 
 app.state.limiter = limiter
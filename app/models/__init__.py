@@ -1 +1,2 @@
-from app.models.log_model import UsageLog
\ No newline at end of file
+from app.models.log_model import UsageLog
+from app.models.job_model import Job
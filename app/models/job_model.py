@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Text
+from sqlalchemy.sql import func
+from app.models.base import Base
+from app.enums.action_type import ActionType
+from app.enums.job_status import JobStatus
+
+
+TERMINAL_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.EXPIRED)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(36), primary_key=True)
+
+    # What to run
+    action_type = Column(Enum(ActionType), nullable=False, index=True)
+    params = Column(Text, nullable=True)  # JSON encoded
+
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # Spooled files
+    input_path = Column(String(500), nullable=True)
+    output_path = Column(String(500), nullable=True)
+    original_filename = Column(String(255), nullable=True)
+    output_filename = Column(String(255), nullable=True)
+    media_type = Column(String(100), nullable=True)
+
+    # Result tracking
+    original_size = Column(Integer, nullable=True)
+    output_size = Column(Integer, nullable=True)
+    error_message = Column(Text, nullable=True)
+    processing_time_ms = Column(Integer, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
+
+    @property
+    def is_finished(self):
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "action": self.action_type.value,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "original_filename": self.original_filename,
+            "original_size": self.original_size,
+            "output_size": self.output_size,
+            "processing_time_ms": self.processing_time_ms,
+            "error": self.error_message,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        }
+
+    # -----------------------
+    # DB METHODS
+    # -----------------------
+
+    @classmethod
+    async def create_job(cls, db, **kwargs):
+        job = cls(status=JobStatus.QUEUED, attempts=0, **kwargs)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    @classmethod
+    async def get(cls, db, job_id):
+        return await db.get(cls, job_id, populate_existing=True)
+
+    @classmethod
+    async def claim_next(cls, db):
+        """
+        Atomically moves the oldest queued job to RUNNING.
+        SKIP LOCKED lets several app processes share one queue.
+        """
+        from sqlalchemy import select
+        result = await db.execute(
+            select(cls)
+            .where(cls.status == JobStatus.QUEUED)
+            .order_by(cls.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+
+        if job is None:
+            await db.rollback()
+            return None
+
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = datetime.now(timezone.utc)
+        await db.commit()
+        return job
+
+    @classmethod
+    async def finish(cls, db, job, ttl_seconds, **kwargs):
+        now = datetime.now(timezone.utc)
+        for key, value in kwargs.items():
+            setattr(job, key, value)
+        job.finished_at = now
+        job.expires_at = now + timedelta(seconds=ttl_seconds)
+        await db.commit()
+        return job
+
+    @classmethod
+    async def requeue_interrupted(cls, db, max_attempts, stale_after):
+        """
+        Jobs still RUNNING long after the job timeout were lost to a crash or
+        restart: they go back to the queue, or fail after max_attempts.
+        """
+        from sqlalchemy import update
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=stale_after)
+        stale = (cls.status == JobStatus.RUNNING, cls.started_at < cutoff)
+
+        await db.execute(
+            update(cls)
+            .where(*stale, cls.attempts < max_attempts)
+            .values(status=JobStatus.QUEUED, started_at=None)
+        )
+        await db.execute(
+            update(cls)
+            .where(*stale)
+            .values(
+                status=JobStatus.FAILED,
+                error_message="Job was interrupted too many times.",
+                finished_at=func.now(),
+                expires_at=func.now(),
+            )
+        )
+        await db.commit()
+
+    @classmethod
+    async def expired(cls, db, limit=100):
+        from sqlalchemy import select
+        result = await db.execute(
+            select(cls)
+            .where(
+                cls.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]),
+                cls.expires_at < datetime.now(timezone.utc),
+            )
+            .limit(limit)
+        )
+        return result.scalars().all()
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import time
+import zipfile
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import result_cache, generate_cache_key, CachedResult
+from app.core.config import ALLOWED_EXTENSIONS, MAX_FILE_SIZE, CPU_WORKERS, BATCH_MAX_FILES
+from app.core.logging import logger
+from app.core.worker_pool import run_cpu_bound
+from app.enums.action_type import ActionType
+from app.services.image_optimizer import (
+    optimize_for_twitter,
+    optimize_for_whatsapp,
+    optimize_for_web,
+    optimize_custom,
+    optimize_for_instagram,
+    optimize_for_youtube,
+)
+from app.utils.zip_stream import ZipStreamWriter
+
+
+# ─────────────────────────────────────────────
+# BATCH OPTIMIZATION
+# ─────────────────────────────────────────────
+# Files are optimized concurrently in the shared CPU pool and written into the
+# response zip as they finish, so the first results reach the client while the
+# rest of the batch is still running. A manifest.json closes the archive.
+
+# Preset -> (action type used for the per-file cache key, preset function)
+BATCH_PRESETS = {
+    "twitter": (ActionType.OPTIMIZE_TWITTER, optimize_for_twitter),
+    "whatsapp": (ActionType.OPTIMIZE_WHATSAPP, optimize_for_whatsapp),
+    "web": (ActionType.OPTIMIZE_WEB, optimize_for_web),
+    "instagram": (ActionType.OPTIMIZE_INSTAGRAM, optimize_for_instagram),
+    "youtube": (ActionType.OPTIMIZE_YOUTUBE, optimize_for_youtube),
+    "custom": (ActionType.OPTIMIZE_CUSTOM, optimize_custom),
+}
+
+MEDIA_EXTENSIONS = {"image/jpeg": "jpg", "image/webp": "webp", "image/png": "png"}
+
+# One batch never holds more than a worker's worth of slots, so single-file
+# requests keep getting through while a batch is running
+BATCH_CONCURRENCY = max(1, CPU_WORKERS)
+
+BUSY_RETRY_DELAY = 0.5
+BUSY_RETRIES = 20
+
+
+class BatchItem:
+    __slots__ = ("name", "size", "load", "error")
+
+    def __init__(self, name, size, load, error=None):
+        self.name = name
+        self.size = size
+        self.load = load
+        self.error = error
+
+
+def resolve_preset(preset: str):
+    entry = BATCH_PRESETS.get((preset or "").lower())
+    if entry is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported preset. Choose one of: {', '.join(BATCH_PRESETS)}."
+        )
+    return entry
+
+
+def _extension(filename: str) -> str:
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def _check_limits(count: int):
+    if count == 0:
+        raise HTTPException(status_code=400, detail="No images found in the upload.")
+    if count > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum is {BATCH_MAX_FILES} per batch."
+        )
+
+
+def _items_from_archive(archive: zipfile.ZipFile):
+    items = []
+
+    for info in archive.infolist():
+        name = os.path.basename(info.filename)
+
+        if info.is_dir() or not name or name.startswith(".") or "__MACOSX" in info.filename:
+            continue
+        if _extension(name) not in ALLOWED_EXTENSIONS:
+            continue
+
+        # Declared size is checked before anything is inflated (zip bombs)
+        error = "File too large" if info.file_size > MAX_FILE_SIZE else None
+
+        def load(info=info):
+            return run_in_threadpool(archive.read, info)
+
+        items.append(BatchItem(name, info.file_size, load, error))
+
+    return items
+
+
+async def collect_batch_items(files):
+    """
+    Builds the work list from either several uploaded images or one zip.
+    Per-file problems are reported in the manifest instead of failing the batch.
+    """
+    if len(files) == 1 and _extension(files[0].filename) == "zip":
+        try:
+            archive = await run_in_threadpool(zipfile.ZipFile, files[0].file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Invalid zip archive.")
+
+        items = await run_in_threadpool(_items_from_archive, archive)
+        _check_limits(len(items))
+        return items
+
+    _check_limits(len(files))
+
+    items = []
+    for upload in files:
+        error = None
+        if _extension(upload.filename) not in ALLOWED_EXTENSIONS:
+            error = "Unsupported file type"
+        elif upload.size is not None and upload.size > MAX_FILE_SIZE:
+            error = "File too large"
+
+        items.append(BatchItem(upload.filename, upload.size, upload.read, error))
+
+    return items
+
+
+async def _run_preset(func, data, args):
+    """Waits for room in the pool instead of failing the file on a 503."""
+    for _ in range(BUSY_RETRIES):
+        try:
+            return await run_cpu_bound(func, data, *args)
+        except HTTPException as e:
+            if e.status_code != 503:
+                raise
+            await asyncio.sleep(BUSY_RETRY_DELAY)
+
+    return await run_cpu_bound(func, data, *args)
+
+
+async def _optimize_item(item: BatchItem, action_type, func, args):
+    start_time = time.perf_counter()
+    entry = {"source": item.name, "original_size": item.size}
+
+    try:
+        if item.error:
+            raise HTTPException(status_code=400, detail=item.error)
+
+        data = await item.load()
+        entry["original_size"] = len(data)
+
+        if len(data) > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large")
+
+        # Same key as the single-file endpoint, so both share cached results
+        cache_key = await run_in_threadpool(
+            generate_cache_key, data, action_type.value, {"args": list(args)}
+        )
+        cached = await run_in_threadpool(result_cache.get, cache_key)
+
+        if cached is not None:
+            content, media_type = cached.content, cached.media_type
+            entry["cache"] = "HIT"
+        else:
+            content, media_type, headers = await _run_preset(func, data, args)
+            await run_in_threadpool(
+                result_cache.set, cache_key, CachedResult(content, media_type, headers)
+            )
+            entry["cache"] = "MISS"
+
+        saved = len(data) - len(content)
+        entry.update({
+            "status": "ok",
+            "optimized_size": len(content),
+            "saved_bytes": saved,
+            "saved_percent": round(saved / len(data) * 100, 2) if data else 0.0,
+        })
+        result = (content, media_type)
+
+    except HTTPException as e:
+        entry.update({"status": "error", "error": str(e.detail)})
+        result = None
+
+    except Exception as e:
+        logger.error(f"Batch item {item.name} failed: {e}")
+        entry.update({"status": "error", "error": "Optimization failed."})
+        result = None
+
+    entry["processing_time_ms"] = int((time.perf_counter() - start_time) * 1000)
+    return entry, result
+
+
+async def stream_batch(items, preset: str, args=()):
+    """Async generator yielding zip bytes as each file finishes."""
+    action_type, func = resolve_preset(preset)
+    start_time = time.perf_counter()
+
+    writer = ZipStreamWriter()
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    # Bounded: a slow client holds workers back instead of piling up results
+    done = asyncio.Queue(maxsize=BATCH_CONCURRENCY)
+
+    async def worker(item):
+        async with semaphore:
+            await done.put(await _optimize_item(item, action_type, func, args))
+
+    tasks = [asyncio.create_task(worker(item)) for item in items]
+    manifest = []
+
+    try:
+        for _ in range(len(tasks)):
+            entry, result = await done.get()
+
+            if result is not None:
+                content, media_type = result
+                stem = os.path.splitext(entry["source"])[0] or "image"
+                ext = MEDIA_EXTENSIONS.get(media_type, "bin")
+                entry["output"] = writer.unique_name(f"{stem}.{ext}")
+
+                # Outputs are already compressed images: stored by the policy
+                yield writer.add(entry["output"], content)
+
+            manifest.append(entry)
+
+        succeeded = [e for e in manifest if e["status"] == "ok"]
+        original_total = sum(e["original_size"] for e in succeeded)
+        optimized_total = sum(e["optimized_size"] for e in succeeded)
+
+        summary = {
+            "preset": preset.lower(),
+            "files": manifest,
+            "totals": {
+                "files": len(manifest),
+                "succeeded": len(succeeded),
+                "failed": len(manifest) - len(succeeded),
+                "original_size": original_total,
+                "optimized_size": optimized_total,
+                "saved_bytes": original_total - optimized_total,
+                "saved_percent": round(
+                    (original_total - optimized_total) / original_total * 100, 2
+                ) if original_total else 0.0,
+                "elapsed_ms": int((time.perf_counter() - start_time) * 1000),
+            },
+        }
+
+        yield writer.add(
+            writer.unique_name("manifest.json"),
+            json.dumps(summary, indent=2).encode(),
+        )
+        yield writer.close()
+
+    finally:
+        # Client went away (or we are done): stop anything still queued
+        for task in tasks:
+            task.cancel()
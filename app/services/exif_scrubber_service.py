@@ -1,73 +1,67 @@
 import io
 import time
+import tempfile
 from PIL import Image
 from pillow_heif import register_heif_opener
 from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
 from starlette.concurrency import run_in_threadpool
 from app.core.logging import logger
+from app.utils.metadata_scrubber import scrub_stream, strip_image_metadata, COPY_CHUNK_SIZE
 
 register_heif_opener()
 
+# Outputs larger than this spill from memory to a temp file
+OUTPUT_SPOOL_SIZE = 4 * 1024 * 1024
+
+LOSSLESS_OUTPUTS = {
+    "jpeg": ("jpg", "image/jpeg"),
+    "png": ("png", "image/png"),
+    "webp": ("webp", "image/webp"),
+}
+
 def _strip_exif(img: Image.Image) -> Image.Image:
     """Remove EXIF metadata safely."""
-    data = list(img.getdata())
-    clean_img = Image.new(img.mode, img.size)
-    clean_img.putdata(data)
-    return clean_img
+    return strip_image_metadata(img)
 
 
-def _sync_exif_scrub(image_bytes: bytes, filename: str):
-    start_time = time.perf_counter()
-
+def _iter_file(file_obj, chunk_size=COPY_CHUNK_SIZE):
     try:
-        img = Image.open(io.BytesIO(image_bytes))
+        while chunk := file_obj.read(chunk_size):
+            yield chunk
+    finally:
+        file_obj.close()
 
-        original_format = img.format if img.format else "JPEG"
 
-        # Remove EXIF
-        img = _strip_exif(img)
-
-        output_buffer = io.BytesIO()
-
-        if original_format.upper() in ["JPEG", "JPG"]:
-            img = img.convert("RGB")
+def _sync_exif_scrub(file_obj, filename: str):
+    start_time = time.perf_counter()
 
-            img.save(
-                output_buffer,
-                format="JPEG",
-                quality=95,
-                optimize=True,
-                progressive=True
-            )
+    try:
+        file_obj.seek(0)
 
-            ext = "jpg"
-            media_type = "image/jpeg"
+        # JPEG / PNG / WebP: segment-level scrub, streamed input -> spooled output
+        output_file = tempfile.SpooledTemporaryFile(max_size=OUTPUT_SPOOL_SIZE)
+        fmt = scrub_stream(file_obj, output_file)
 
-        elif original_format.upper() == "PNG":
+        if fmt:
+            output_file.seek(0)
+            ext, media_type = LOSSLESS_OUTPUTS[fmt]
+            processing_time_ms = int((time.perf_counter() - start_time) * 1000)
+            return output_file, ext, media_type, processing_time_ms
 
-            img.save(
-                output_buffer,
-                format="PNG",
-                optimize=True
-            )
+        output_file.close()
+        file_obj.seek(0)
 
-            ext = "png"
-            media_type = "image/png"
+        img = Image.open(file_obj)
 
-        elif original_format.upper() == "WEBP":
+        original_format = img.format if img.format else "JPEG"
 
-            img.save(
-                output_buffer,
-                format="WEBP",
-                quality=95,
-                method=6
-            )
+        # Remove EXIF
+        img = _strip_exif(img)
 
-            ext = "webp"
-            media_type = "image/webp"
+        output_buffer = io.BytesIO()
 
-        elif original_format.upper() in ["HEIF", "HEIC"]:
+        if original_format.upper() in ["HEIF", "HEIC"]:
 
             img.save(
                 output_buffer,
@@ -96,17 +90,17 @@ async def exif_scrubber_service(file):
 
     try:
         await file.seek(0)
-        image_bytes = await file.read()
 
-        output_buffer, ext, media_type, processing_time_ms = await run_in_threadpool(
+        # The spooled upload is read as a stream, never loaded whole
+        output_file, ext, media_type, processing_time_ms = await run_in_threadpool(
             _sync_exif_scrub,
-            image_bytes,
+            file.file,
             file.filename
         )
 
         return {
             "response": StreamingResponse(
-                output_buffer,
+                _iter_file(output_file),
                 media_type=media_type,
                 headers={
                     "Content-Disposition": f"attachment; filename={file.filename.split('.')[0]}_clean.{ext}"
@@ -1,12 +1,11 @@
 import io
 import json
-import zipfile
 from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
-from fastapi.concurrency import run_in_threadpool
 from PIL import Image, ImageOps
 from app.utils.image_validators import validate_image_safety
 from app.utils.profiler import profile_performance
+from app.utils.zip_stream import stream_zip, prime_chunks
 
 # Decompression bomb guard (50MP limit)
 Image.MAX_IMAGE_PIXELS = 50_000_000
@@ -100,62 +99,60 @@ def _generate_html(extension):
 
 
 def _build_zip(canvas, image, extension, padding, background, brand_color):
+    """Yields the package zip chunk by chunk, each file as soon as it is encoded."""
+    yield from stream_zip(_package_files(canvas, image, extension, padding, background, brand_color))
 
-    zip_buffer = io.BytesIO()
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+def _package_files(canvas, image, extension, padding, background, brand_color):
 
-        for size in FAVICON_SIZES:
-            resized = canvas.resize((size, size), Image.LANCZOS)
+    for size in FAVICON_SIZES:
+        resized = canvas.resize((size, size), Image.LANCZOS)
 
-            with io.BytesIO() as buf:
-                if extension == "ico":
-                    resized.save(buf, format="PNG")
-                    filename = f"favicon-{size}x{size}.png"
-                else:
-                    resized.save(buf, format=extension.upper())
-                    filename = f"favicon-{size}x{size}.{extension}"
-
-                zip_file.writestr(filename, buf.getvalue())
-
-        # Multi-resolution ICO
         with io.BytesIO() as buf:
-            canvas.save(
-                buf,
-                format="ICO",
-                sizes=[(16, 16), (32, 32), (48, 48), (64, 64)]
-            )
-            zip_file.writestr("favicon.ico", buf.getvalue())
+            if extension == "ico":
+                resized.save(buf, format="PNG")
+                filename = f"favicon-{size}x{size}.png"
+            else:
+                resized.save(buf, format=extension.upper())
+                filename = f"favicon-{size}x{size}.{extension}"
 
-        # Dark mode variant (fixed LANCZOS)
-        dark_canvas = _safe_square_canvas(image, padding, "#000000")
-        with io.BytesIO() as buf:
-            dark_canvas.resize((32, 32), Image.LANCZOS).save(buf, format="PNG")
-            zip_file.writestr("favicon-dark-32x32.png", buf.getvalue())
+            yield filename, buf.getvalue()
 
-        # OG letterbox (no distortion)
-        og_canvas = Image.new("RGBA", (1200, 630), brand_color)
-        thumb = canvas.copy()
-        thumb.thumbnail((630, 630), Image.LANCZOS)
+    # Multi-resolution ICO
+    with io.BytesIO() as buf:
+        canvas.save(
+            buf,
+            format="ICO",
+            sizes=[(16, 16), (32, 32), (48, 48), (64, 64)]
+        )
+        yield "favicon.ico", buf.getvalue()
 
-        x = (1200 - thumb.width) // 2
-        y = (630 - thumb.height) // 2
+    # Dark mode variant (fixed LANCZOS)
+    dark_canvas = _safe_square_canvas(image, padding, "#000000")
+    with io.BytesIO() as buf:
+        dark_canvas.resize((32, 32), Image.LANCZOS).save(buf, format="PNG")
+        yield "favicon-dark-32x32.png", buf.getvalue()
 
-        og_canvas.paste(thumb, (x, y), thumb)
+    # OG letterbox (no distortion)
+    og_canvas = Image.new("RGBA", (1200, 630), brand_color)
+    thumb = canvas.copy()
+    thumb.thumbnail((630, 630), Image.LANCZOS)
 
-        with io.BytesIO() as buf:
-            og_canvas.save(buf, format="PNG")
-            zip_file.writestr("social-preview-1200x630.png", buf.getvalue())
+    x = (1200 - thumb.width) // 2
+    y = (630 - thumb.height) // 2
+
+    og_canvas.paste(thumb, (x, y), thumb)
 
-        # Manifest
-        bg_color = background if background != "transparent" else brand_color
-        zip_file.writestr("site.webmanifest", _generate_manifest(brand_color, bg_color))
+    with io.BytesIO() as buf:
+        og_canvas.save(buf, format="PNG")
+        yield "social-preview-1200x630.png", buf.getvalue()
 
-        # HTML
-        zip_file.writestr("favicon-html-code.txt", _generate_html(extension))
+    # Manifest
+    bg_color = background if background != "transparent" else brand_color
+    yield "site.webmanifest", _generate_manifest(brand_color, bg_color).encode()
 
-    zip_buffer.seek(0)
-    return zip_buffer
+    # HTML
+    yield "favicon-html-code.txt", _generate_html(extension).encode()
 
 
 # ------------------------------------------------
@@ -188,7 +185,7 @@ async def generate_favicon_service(file, extension, background, padding):
 
             canvas = _safe_square_canvas(image, padding, background)
 
-            return _build_zip(
+            yield from _build_zip(
                 canvas,
                 image,
                 extension,
@@ -197,10 +194,12 @@ async def generate_favicon_service(file, extension, background, padding):
                 brand_color
             )
 
-    zip_buffer = await run_in_threadpool(process)
+    # The image is validated and the first file encoded before responding;
+    # the rest of the package streams as it is encoded
+    body = await prime_chunks(process())
 
     return StreamingResponse(
-        zip_buffer,
+        body,
         media_type="application/zip",
         headers={
             "Content-Disposition": "attachment; filename=favicon-package.zip"
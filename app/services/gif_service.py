@@ -1,14 +1,17 @@
 import io
 import os
 import tempfile
-import asyncio
 import time
 
 from PIL import Image
 from fastapi.responses import StreamingResponse, FileResponse
 from fastapi import HTTPException, BackgroundTasks
 from app.core.logging import logger
+from app.core.ffmpeg_scheduler import ffmpeg_slot, run_ffmpeg, stream_ffmpeg, prime_stream
+from app.core.cache import result_cache, generate_cache_key, hash_content, CachedResult
 from app.utils.profiler import profile_performance
+from app.utils.upload_buffer import upload_size, pipe_readable_video
+from app.utils.gif_stream import write_animated_gif
 from starlette.concurrency import run_in_threadpool
 
 # ─────────────────────────────────────────────
@@ -21,8 +24,6 @@ MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
 
 TARGET_SIZE = 1 * 1024 * 1024  # 1MB
 
-FFMPEG_SEMAPHORE = asyncio.Semaphore(2)
-
 QUALITY_PRESETS = {
     "hd": [(15, 600, 256), (12, 600, 256), (10, 600, 128)],
     "high": [(12, 600, 256), (10, 600, 128)],
@@ -33,18 +34,67 @@ QUALITY_PRESETS = {
 # ─────────────────────────────────────────────
 # ASYNC FFMPEG
 # ─────────────────────────────────────────────
-async def run_ffmpeg_async(input_path, output_path, fps, width, colors, start_time, duration, reverse):
-    filters = f"fps={fps},scale={width}:-1:flags=lanczos"
+PALETTE_DITHER = "paletteuse=dither=bayer:bayer_scale=3"
 
-    if reverse:
-        filters += ",reverse"
+# Palettes are computed on a small copy of the frames: the colour histogram
+# barely changes with scale, and one palette then serves every output width.
+PALETTE_WIDTH = 320
 
-    filters += (
-        f",split[s0][s1];"
-        f"[s0]palettegen=max_colors={colors}[p];"
-        f"[s1][p]paletteuse=dither=bayer:bayer_scale=3"
+
+def _gif_filter(fps, width, colors, label_in="", label_out=""):
+    """fps/scale once, then palettegen + paletteuse on the same decoded frames."""
+    suffix = label_out.strip("[]")
+    return (
+        f"{label_in}fps={fps},scale={width}:-1:flags=lanczos,"
+        f"split[s0{suffix}][s1{suffix}];"
+        f"[s0{suffix}]palettegen=max_colors={colors}[p{suffix}];"
+        f"[s1{suffix}][p{suffix}]{PALETTE_DITHER}{label_out}"
+    )
+
+
+def hash_input(input_path):
+    with open(input_path, "rb") as f:
+        return hash_content(f)
+
+
+# ─────────────────────────────────────────────
+# PALETTE STAGE
+# ─────────────────────────────────────────────
+# Palette PNGs are cached per (input hash, start, duration, fps, colors), so
+# ladder retries at another width and repeat requests for the same clip skip
+# palettegen entirely. On a miss the palette is generated inside the encode
+# run itself, from the same decoded frames, and written out for the cache:
+# an uncached encode is still a single ffmpeg process.
+def _palette_key(input_hash, start_time, duration, fps, colors):
+    return generate_cache_key(
+        input_hash.encode(),
+        "gif_palette",
+        {"start": start_time, "duration": duration, "fps": fps, "colors": colors},
     )
 
+
+async def run_ffmpeg_async(
+    input_path, output_path, fps, width, colors, start_time, duration, reverse, input_hash=None,
+    request=None
+):
+    if input_hash is None:
+        input_hash = await run_in_threadpool(hash_input, input_path)
+
+    key = _palette_key(input_hash, start_time, duration, fps, colors)
+
+    # The disk tier does file IO: kept off the event loop
+    cached = await run_in_threadpool(result_cache.get, key)
+
+    # Palette applied before reverse: ffmpeg buffers 8-bit paletted frames
+    # for the reversal instead of full RGB ones
+    reverse_filter = ",reverse" if reverse else ""
+
+    fd, palette_path = tempfile.mkstemp(suffix=".png")
+
+    with os.fdopen(fd, "wb") as f:
+        if cached is not None:
+            f.write(cached.content)
+
     command = [
         "ffmpeg",
         "-y",
@@ -52,27 +102,90 @@ async def run_ffmpeg_async(input_path, output_path, fps, width, colors, start_ti
         "-ss", str(start_time),
         "-t", str(duration),
         "-i", input_path,
-        "-vf", filters,
-        "-loop", "0",
-        output_path
     ]
 
-    process = await asyncio.create_subprocess_exec(
-        *command,
-        stdout=asyncio.subprocess.DEVNULL,
-        stderr=asyncio.subprocess.PIPE
-    )
+    if cached is not None:
+        command += [
+            "-i", palette_path,
+            "-lavfi",
+            f"[0:v]fps={fps},scale={width}:-1:flags=lanczos[v];"
+            f"[v][1:v]{PALETTE_DITHER}{reverse_filter}",
+            "-loop", "0",
+            output_path,
+        ]
+    else:
+        # One decode feeds the palette (on a PALETTE_WIDTH copy) and the encode
+        command += [
+            "-filter_complex",
+            f"[0:v]fps={fps},split[a][b];"
+            f"[a]scale={PALETTE_WIDTH}:-1:flags=lanczos,"
+            f"palettegen=max_colors={colors},split[p][pc];"
+            f"[b]scale={width}:-1:flags=lanczos[v];"
+            f"[v][p]{PALETTE_DITHER}{reverse_filter}[out]",
+            "-map", "[out]", "-loop", "0", output_path,
+            "-map", "[pc]", palette_path,
+        ]
 
-    _, stderr = await process.communicate()
+    try:
+        await run_ffmpeg(command, request)
 
-    if process.returncode != 0:
-        raise Exception(f"FFmpeg failed: {stderr.decode()}")
+        if cached is None:
+            with open(palette_path, "rb") as f:
+                palette = f.read()
+            await run_in_threadpool(result_cache.set, key, CachedResult(palette, "image/png"))
+    finally:
+        os.remove(palette_path)
 
 
 # ─────────────────────────────────────────────
-# ADAPTIVE ENCODER
+# ENCODING LADDER
 # ─────────────────────────────────────────────
-async def adaptive_gif_encode_async(input_path, start_time, duration, quality, reverse, file_size):
+# Instead of a full transcode per QUALITY_PRESETS rung, a short segment from
+# the middle of the clip is decoded once and encoded at every rung in the
+# same ffmpeg run. GIF size grows ~linearly with duration, so the sample
+# sizes predict the full output; the best rung predicted to fit is encoded
+# once. A second full encode only happens when the prediction was wrong.
+SAMPLE_DURATION = 1.5
+TARGET_MARGIN = 0.9  # aim a bit under TARGET_SIZE to absorb estimate error
+
+
+async def sample_ladder_sizes(input_path, attempts, sample_start, sample_duration, request=None):
+    """Encodes the sample at every rung in one ffmpeg run; returns byte sizes."""
+    branches = "".join(f"[v{i}]" for i in range(len(attempts)))
+    graph = [f"[0:v]split={len(attempts)}{branches}"]
+
+    for i, (fps, width, colors) in enumerate(attempts):
+        graph.append(_gif_filter(fps, width, colors, label_in=f"[v{i}]", label_out=f"[o{i}]"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs = [os.path.join(tmp_dir, f"rung{i}.gif") for i in range(len(attempts))]
+
+        command = [
+            "ffmpeg",
+            "-y",
+            "-loglevel", "error",
+            "-ss", str(sample_start),
+            "-t", str(sample_duration),
+            "-i", input_path,
+            "-filter_complex", ";".join(graph),
+        ]
+        for i, output in enumerate(outputs):
+            command += ["-map", f"[o{i}]", "-loop", "0", output]
+
+        await run_ffmpeg(command, request)
+
+        return [os.path.getsize(output) for output in outputs]
+
+
+def choose_rung(attempts, estimates, target):
+    """Index of the best-quality rung predicted to fit, else the smallest."""
+    for i, estimate in enumerate(estimates):
+        if estimate <= target:
+            return i
+    return min(range(len(attempts)), key=lambda i: estimates[i])
+
+
+def _ladder_for(quality, file_size):
     attempts = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["medium"])
 
     # Reduce quality attempts for large files
@@ -81,50 +194,84 @@ async def adaptive_gif_encode_async(input_path, start_time, duration, quality, r
     elif file_size > 2 * 1024 * 1024:
         attempts = QUALITY_PRESETS["medium"]
 
-    # Avoid multiple passes for short clips
-    if duration < 2:
-        attempts = attempts[:1]
+    return attempts
+
+
+# ─────────────────────────────────────────────
+# ADAPTIVE ENCODER
+# ─────────────────────────────────────────────
+async def adaptive_gif_encode_async(
+    input_path, start_time, duration, quality, reverse, file_size, request=None
+):
+    attempts = _ladder_for(quality, file_size)
+    input_hash = await run_in_threadpool(hash_input, input_path)
+
+    # Short clips: the sample would be the whole clip, encode straight away
+    if duration < 2 * SAMPLE_DURATION or len(attempts) == 1:
+        choice = 0
+        estimates = None
+    else:
+        sample_start = start_time + (duration - SAMPLE_DURATION) / 2
+        sample_sizes = await sample_ladder_sizes(
+            input_path, attempts, sample_start, SAMPLE_DURATION, request
+        )
+        scale = duration / SAMPLE_DURATION
+        estimates = [size * scale for size in sample_sizes]
+        choice = choose_rung(attempts, estimates, TARGET_SIZE * TARGET_MARGIN)
+
+        logger.info(
+            f"GIF ladder estimates {[int(e) for e in estimates]}, chose rung {choice}"
+        )
+
+    fd, output_path = tempfile.mkstemp(suffix=".gif")
+    os.close(fd)
+
+    try:
+        fps, width, colors = attempts[choice]
+        await run_ffmpeg_async(
+            input_path, output_path, fps, width, colors, start_time, duration, reverse,
+            input_hash, request
+        )
+        size = os.path.getsize(output_path)
+
+        if size <= TARGET_SIZE or estimates is None or choice == len(attempts) - 1:
+            return output_path
 
-    best_output = None
-    best_size = float("inf")
+        # Missed: correct the estimates by the observed error, encode once more
+        correction = size / estimates[choice]
+        corrected = [e * correction for e in estimates]
+        retry = choose_rung(attempts, corrected, TARGET_SIZE * TARGET_MARGIN)
 
-    for fps, width, colors in attempts:
-        fd, output_path = tempfile.mkstemp(suffix=".gif")
+        if retry <= choice:
+            retry = choice + 1
+
+        logger.info(f"GIF {size} bytes over target, retrying at rung {retry}")
+
+        fd, retry_path = tempfile.mkstemp(suffix=".gif")
         os.close(fd)
 
         try:
+            fps, width, colors = attempts[retry]
             await run_ffmpeg_async(
-                input_path,
-                output_path,
-                fps,
-                width,
-                colors,
-                start_time,
-                duration,
-                reverse
+                input_path, retry_path, fps, width, colors, start_time, duration, reverse,
+                input_hash, request
             )
+        except Exception:
+            os.remove(retry_path)
+            raise
 
-            size = os.path.getsize(output_path)
-
-            if size < best_size:
-                if best_output and os.path.exists(best_output):
-                    os.remove(best_output)
-
-                best_output = output_path
-                best_size = size
-            else:
-                os.remove(output_path)
-
-            if size <= TARGET_SIZE:
-                logger.info(f"Target GIF size reached: {size}")
-                return best_output
+        # Keep whichever is smaller, as the old loop did
+        if os.path.getsize(retry_path) < size:
+            os.remove(output_path)
+            return retry_path
 
-        except Exception as e:
-            if os.path.exists(output_path):
-                os.remove(output_path)
-            raise e
+        os.remove(retry_path)
+        return output_path
 
-    return best_output
+    except Exception as e:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise e
 
 
 # ─────────────────────────────────────────────
@@ -138,7 +285,8 @@ async def process_video_to_gif_async(
     start_time,
     end_time,
     quality,
-    reverse
+    reverse,
+    request=None
 ):
     start = time.perf_counter()
 
@@ -156,7 +304,8 @@ async def process_video_to_gif_async(
         duration,
         quality,
         reverse,
-        file_size
+        file_size,
+        request
     )
 
     processing_time = int((time.perf_counter() - start) * 1000)
@@ -164,6 +313,76 @@ async def process_video_to_gif_async(
     return output_path, file_size, processing_time
 
 
+# ─────────────────────────────────────────────
+# PIPE MODE (stream=true)
+# ─────────────────────────────────────────────
+# The upload is fed to ffmpeg's stdin and the GIF is sent to the client from
+# stdout as it is produced: no temp files and no size ladder. It is one
+# encode at the requested fps/width. Per-frame palettes
+# (palettegen stats_mode=single + paletteuse new=1) let ffmpeg emit every
+# frame as soon as it is encoded. MP4/MOV files with the moov atom at the end
+# need seeking, so they take the temp-file path instead.
+async def _stream_video_to_gif(file, fps, width, colors, start_time, duration, reverse, request):
+    filters = f"fps={fps},scale={width}:-1:flags=lanczos"
+
+    if reverse:
+        filters += ",reverse"
+
+    filters += (
+        f",split[s0][s1];[s0]palettegen=max_colors={colors}:stats_mode=single[p];"
+        f"[s1][p]paletteuse=new=1:dither=bayer:bayer_scale=3"
+    )
+
+    command = [
+        "ffmpeg",
+        "-loglevel", "error",
+        "-ss", str(start_time),
+        "-t", str(duration),
+        "-i", "pipe:0",
+        "-vf", filters,
+        "-loop", "0",
+        "-f", "gif",
+        "pipe:1"
+    ]
+
+    async with ffmpeg_slot(duration):
+        async for chunk in stream_ffmpeg(command, file, request):
+            yield chunk
+
+
+async def _video_to_gif_stream_response(
+    file, fps, width, start_time, end_time, quality, reverse, request
+):
+    start = time.perf_counter()
+    file_size = upload_size(file.file)
+
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large")
+
+    duration = min(end_time - start_time, MAX_DURATION)
+    colors = _ladder_for(quality, file_size)[0][2]
+
+    body = await prime_stream(_stream_video_to_gif(
+        file, min(fps, MAX_FPS), min(width, MAX_WIDTH), colors,
+        start_time, duration, reverse, request
+    ))
+
+    filename = os.path.splitext(file.filename)[0]
+
+    return {
+        "response": StreamingResponse(
+            body,
+            media_type="image/gif",
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}.gif"'
+            }
+        ),
+        "original_size": file_size,
+        # Time to first byte; the rest streams
+        "processing_time_ms": int((time.perf_counter() - start) * 1000)
+    }
+
+
 @profile_performance
 async def video_to_gif_service(
     file,
@@ -172,12 +391,21 @@ async def video_to_gif_service(
     start_time: float,
     end_time: float,
     quality: str,
-    reverse: bool
+    reverse: bool,
+    request=None,
+    stream: bool = False
 ):
     input_path = None
     output_path = None
 
     try:
+        if stream:
+            if pipe_readable_video(file.file):
+                return await _video_to_gif_stream_response(
+                    file, fps, width, start_time, end_time, quality, reverse, request
+                )
+            logger.info("Video needs seeking (moov at end), using temp file path")
+
         await file.seek(0)
         file_size = 0
 
@@ -194,7 +422,8 @@ async def video_to_gif_service(
 
             input_path = tmp.name
 
-        async with FFMPEG_SEMAPHORE:
+        # One global ffmpeg slot; shorter clips are scheduled first
+        async with ffmpeg_slot(min(end_time - start_time, MAX_DURATION)):
             output_path, original_size, processing_time_ms = await process_video_to_gif_async(
                 input_path,
                 file_size,
@@ -203,7 +432,8 @@ async def video_to_gif_service(
                 start_time,
                 end_time,
                 quality,
-                reverse
+                reverse,
+                request
             )
 
         filename = os.path.splitext(file.filename)[0]
@@ -226,6 +456,9 @@ async def video_to_gif_service(
             "processing_time_ms": processing_time_ms
         }
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"Video → GIF error: {e}")
 
@@ -250,25 +483,9 @@ def _sync_image_to_gif(file_obj, file_size, duration):
 
         img = Image.open(file_obj)
 
-        frames = []
-
-        if getattr(img, "is_animated", False):
-            for i in range(img.n_frames):
-                img.seek(i)
-                frames.append(img.copy())
-        else:
-            frames = [img]
-
+        # Frames are decoded, diffed and written one at a time
         output = io.BytesIO()
-
-        frames[0].save(
-            output,
-            format="GIF",
-            save_all=True,
-            append_images=frames[1:],
-            duration=duration,
-            loop=0
-        )
+        write_animated_gif(img, output, duration=duration)
 
         output.seek(0)
 
@@ -284,8 +501,8 @@ async def image_to_gif_service(file, duration: int):
     try:
         await file.seek(0)
 
-        content = await file.read()
-        file_size = len(content)
+        # Size from the spool; Pillow reads the file handle itself
+        file_size = upload_size(file.file)
 
         if file_size > MAX_FILE_SIZE:
             raise HTTPException(status_code=400, detail="Image too large")
@@ -8,6 +8,7 @@ from fastapi import HTTPException
 from starlette.concurrency import run_in_threadpool
 from app.core.logging import logger
 from app.utils.profiler import profile_performance
+from app.utils.image_loader import open_for_target_size
 
 register_heif_opener()
 
@@ -40,7 +41,8 @@ def _process_heic_to_image(temp_input_path, target_format, settings):
     start_time = time.perf_counter()
 
     try:
-        img = Image.open(temp_input_path)
+        # JPEG inputs decode at reduced scale when far above max_width
+        img = open_for_target_size(temp_input_path, settings["max_width"])
         # Normalize orientation
         img = ImageOps.exif_transpose(img)
 
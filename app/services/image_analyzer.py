@@ -7,6 +7,11 @@ import io
 import numpy as np
 from fastapi import HTTPException
 import exiftool
+from app.utils.image_loader import open_for_target_size
+from app.utils.upload_buffer import upload_size
+
+# Longest side of the decode the visual statistics are computed on
+ANALYSIS_SIZE = 512
 
 def get_hex_color(rgb):
     return '#%02x%02x%02x' % rgb
@@ -181,18 +186,28 @@ def calculate_visual_metrics(image):
     contrast = stat.stddev[0] # Standard deviation represents contrast
     return round(brightness, 2), round(contrast, 2)
 
-def analyze_image(file_bytes: bytes):
+def analyze_image(file_obj):
     try:
-        image = Image.open(io.BytesIO(file_bytes))
+        if isinstance(file_obj, (bytes, bytearray)):
+            file_obj = io.BytesIO(file_obj)
+
+        file_obj.seek(0)
+        image = Image.open(file_obj)
         width, height = image.size
         
         # 1. Basic properties
         aspect_ratio = round(width / height, 2)
-        size_kb = round(len(file_bytes) / 1024, 2)
+        size_kb = round(upload_size(file_obj) / 1024, 2)
         
         # 2. Visual Analysis
-        palette = get_color_palette(image)
-        brightness, contrast = calculate_visual_metrics(image)
+        # Brightness, contrast and palette are whole-image statistics: one
+        # reduced-scale decode serves all three (the header above is never
+        # decoded at full resolution)
+        file_obj.seek(0)
+        sample = open_for_target_size(file_obj, ANALYSIS_SIZE)
+        sample.load()
+        palette = get_color_palette(sample)
+        brightness, contrast = calculate_visual_metrics(sample)
         
         # 3. Metadata Extraction
         metadata = get_image_metadata(image)
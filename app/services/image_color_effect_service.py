@@ -86,7 +86,7 @@ def _rotate_hue(img_np, degrees):
 
 
 def _apply_color_effects(
-    image_bytes,
+    file_obj,
     brightness,
     contrast,
     saturation,
@@ -102,7 +102,8 @@ def _apply_color_effects(
 
     start_time = time.perf_counter()
 
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    file_obj.seek(0)
+    img = Image.open(file_obj).convert("RGB")
 
     if preset and preset in FILTER_PRESETS:
         p = FILTER_PRESETS[preset]
@@ -219,11 +220,11 @@ async def image_color_effect_service(
 ):
 
     await file.seek(0)
-    image_bytes = await file.read()
 
+    # Pillow reads the spooled upload directly
     output_buffer, processing_time = await run_in_threadpool(
         _apply_color_effects,
-        image_bytes,
+        file.file,
         brightness,
         contrast,
         saturation,
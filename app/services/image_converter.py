@@ -1,11 +1,11 @@
-from PIL import Image, ImageOps, UnidentifiedImageError, ImageSequence
+from PIL import Image, ImageOps, UnidentifiedImageError
 
 import io
 import time
-from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
 from app.core.logging import logger
 from app.utils.image_validators import validate_image_safety
+from app.utils.gif_stream import write_animated_gif
 
 
 SUPPORTED_FORMATS = {
@@ -60,19 +60,8 @@ def _prepare_image_for_format(image: Image.Image, target_format: str) -> Image.I
 
 
 def _save_animated_gif(image: Image.Image, buffer: io.BytesIO):
-    frames = []
-    for frame in ImageSequence.Iterator(image):
-        frames.append(frame.convert("P", palette=Image.ADAPTIVE))
-
-    frames[0].save(
-        buffer,
-        format="GIF",
-        save_all=True,
-        append_images=frames[1:],
-        loop=0,
-        optimize=True,
-        duration=image.info.get("duration", 100),
-    )
+    # Global palette + changed-region delta frames, streamed frame by frame
+    write_animated_gif(image, buffer, loop=image.info.get("loop", 0))
 
 
 def convert_image(file, target_format: str):
@@ -93,6 +82,8 @@ def convert_image(file, target_format: str):
         original_format = image.format.lower() if image.format else None
         width, height = image.size
 
+        # exif_transpose returns a single-frame copy; keep the animated source
+        source = image
         image = ImageOps.exif_transpose(image)
 
         buffer = io.BytesIO()
@@ -100,8 +91,8 @@ def convert_image(file, target_format: str):
         # ---------------------------------
         # Animated GIF preservation
         # ---------------------------------
-        if getattr(image, "is_animated", False) and target_format == "gif":
-            _save_animated_gif(image, buffer)
+        if getattr(source, "is_animated", False) and target_format == "gif":
+            _save_animated_gif(source, buffer)
 
         else:
             image = _prepare_image_for_format(image, target_format)
@@ -129,13 +120,11 @@ def convert_image(file, target_format: str):
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
 
         return {
-            "response": StreamingResponse(
-                buffer,
-                media_type=f"image/{target_format}",
-                headers={
-                    "Content-Disposition": f"attachment; filename=converted.{target_format}"
-                }
-            ),
+            "content": buffer.getvalue(),
+            "media_type": f"image/{target_format}",
+            "headers": {
+                "Content-Disposition": f"attachment; filename=converted.{target_format}"
+            },
             "original_format": original_format,
             "target_format": target_format,
             "width": width,
@@ -37,12 +37,13 @@ FORMAT_MAP = {
 # ─────────────────────────────────────────────
 # DPI CHANGE (SYNC CORE)
 # ─────────────────────────────────────────────
-def _sync_change_dpi(image_bytes: bytes, dpi: int, filename: str):
+def _sync_change_dpi(file_obj, dpi: int, filename: str):
 
     start_time = time.perf_counter()
 
     try:
-        img = Image.open(io.BytesIO(image_bytes))
+        file_obj.seek(0)
+        img = Image.open(file_obj)
         format = (img.format or "JPEG").upper()
 
         if format not in FORMAT_MAP:
@@ -131,12 +132,12 @@ def _sync_change_dpi(image_bytes: bytes, dpi: int, filename: str):
 # ─────────────────────────────────────────────
 # ASYNC WRAPPER (NO FILE READ)
 # ─────────────────────────────────────────────
-async def image_dpi_service(image_bytes: bytes, filename: str, dpi: int):
+async def image_dpi_service(file_obj, filename: str, dpi: int):
 
     try:
         output_buffer, ext, media_type, processing_time_ms = await run_in_threadpool(
             _sync_change_dpi,
-            image_bytes,
+            file_obj,
             dpi,
             filename
         )
@@ -173,12 +174,13 @@ def _convert_rational(value):
 # ─────────────────────────────────────────────
 # DPI CHECK (SYNC)
 # ─────────────────────────────────────────────
-def _sync_check_dpi(image_bytes: bytes):
+def _sync_check_dpi(file_obj):
 
     start_time = time.perf_counter()
 
     try:
-        img = Image.open(io.BytesIO(image_bytes))
+        file_obj.seek(0)
+        img = Image.open(file_obj)
 
         format = (img.format or "").upper()
 
@@ -218,7 +220,7 @@ def _sync_check_dpi(image_bytes: bytes):
 
         width, height = img.size
 
-        img.close()
+        # No img.close(): the file pointer is the upload itself
 
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
 
@@ -239,12 +241,12 @@ def _sync_check_dpi(image_bytes: bytes):
 # ─────────────────────────────────────────────
 # ASYNC CHECK WRAPPER
 # ─────────────────────────────────────────────
-async def image_dpi_checker_service(image_bytes: bytes):
+async def image_dpi_checker_service(file_obj):
 
     try:
         return await run_in_threadpool(
             _sync_check_dpi,
-            image_bytes
+            file_obj
         )
 
     except Exception as e:
@@ -1,11 +1,14 @@
-import zipfile
+import math
 
 from PIL import Image, ImageOps, UnidentifiedImageError
 import io
-from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
 from app.core.logging import logger
 from app.utils.image_validators import validate_image_safety
+from app.utils.image_loader import open_for_target_size
+from app.utils.metadata_scrubber import strip_image_metadata
+from app.utils.zip_stream import stream_zip
+from app.core.worker_pool import cpu_admission, imap_unordered
 
 def detect_avif_support():
     try:
@@ -19,10 +22,7 @@ AVIF_SUPPORTED = detect_avif_support()
 MAX_ITERATIONS = 10
 
 def strip_metadata(image):
-    data = list(image.getdata())
-    clean = Image.new(image.mode, image.size)
-    clean.putdata(data)
-    return clean
+    return strip_image_metadata(image)
 
 def resize_longest_side(image, max_size):
     width, height = image.size
@@ -34,33 +34,166 @@ def resize_longest_side(image, max_size):
     return image
 
 
-def compress_to_target(image, target_kb, min_q=20, max_q=95):
-    best_buffer = io.BytesIO()
-    
+# Predictive target-size search: a small probe is encoded across a quality grid
+# to fit a quality -> bytes curve, so the full-size image is only encoded once or
+# twice instead of once per binary-search step. Images no bigger than the probe
+# would be encoded at every grid point, which costs more than bisecting them.
+PROBE_MAX_PIXELS = 250_000
+PROBE_GRID = 4
+PROBE_QUALITIES = (20, 35, 50, 65, 75, 85, 95)
+TARGET_SAFETY = 0.95
+
+
+def _encode_jpeg(image, quality):
+    buffer = io.BytesIO()
+    # Using progressive=True makes JPEGs load better on social media
+    image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer
+
+
+def _build_probe(image):
+    """
+    Mosaic of full-resolution tiles sampled across the image.
+    Tiles keep the native detail level (a plain downscale would not),
+    so probe bytes scale linearly with pixel count. None when the image is
+    too small for a probe to be cheaper than the image itself.
+    """
+    width, height = image.size
+    pixels = width * height
+
+    # Tiles are aligned to the 16px JPEG MCU grid
+    side = int((PROBE_MAX_PIXELS / PROBE_GRID ** 2) ** 0.5) // 16 * 16
+    if pixels <= PROBE_MAX_PIXELS or side > min(width, height):
+        return None
+
+    probe = Image.new(image.mode, (side * PROBE_GRID, side * PROBE_GRID))
+    for i in range(PROBE_GRID):
+        for j in range(PROBE_GRID):
+            x = (width - side) * i // (PROBE_GRID - 1) // 16 * 16
+            y = (height - side) * j // (PROBE_GRID - 1) // 16 * 16
+            probe.paste(image.crop((x, y, x + side, y + side)), (i * side, j * side))
+
+    return probe, pixels / (probe.width * probe.height)
+
+
+def _fit_size_curve(probe, scale, min_q, max_q):
+    """Returns [(quality, predicted_bytes)] for the full-size image."""
+    qualities = sorted({min_q, max_q, *(q for q in PROBE_QUALITIES if min_q < q < max_q)})
+    return [(q, _encode_jpeg(probe, q).tell() * scale) for q in qualities]
+
+
+def _predict_quality(curve, target_bytes, correction=1.0):
+    """Highest quality whose corrected prediction fits, interpolated in log space."""
+    fitting = None
+    for (q0, b0), (q1, b1) in zip(curve, curve[1:]):
+        b0, b1 = b0 * correction, b1 * correction
+        if b1 <= target_bytes:
+            fitting = q1
+            continue
+        if b0 <= target_bytes:
+            # Target lies between two probe points
+            span = math.log(b1) - math.log(b0)
+            t = (math.log(target_bytes) - math.log(b0)) / span if span > 0 else 0
+            return int(q0 + t * (q1 - q0))
+        break
+
+    # Even the lowest quality may be predicted too big; let the real encode decide
+    return fitting if fitting is not None else curve[0][0]
+
+
+def _interpolate(curve, quality):
+    for (q0, b0), (q1, b1) in zip(curve, curve[1:]):
+        if q0 <= quality <= q1:
+            t = (quality - q0) / (q1 - q0)
+            return math.exp(math.log(b0) + t * (math.log(b1) - math.log(b0)))
+    return curve[-1][1]
+
+
+def _bisect_quality(image, target_bytes, min_q, max_q):
+    """
+    Highest quality that fits, by binary search on real encodes. If none
+    does, the search ends on min_q and that encode is returned instead.
+    """
+    best_buffer = None
+    lowest_buffer = None
+
     while min_q <= max_q:
         mid_q = (min_q + max_q) // 2
-        tmp_buffer = io.BytesIO()
-        # Using progressive=True makes JPEGs load better on social media
-        image.save(tmp_buffer, format="JPEG", quality=mid_q, optimize=True, progressive=True)
-        size_kb = tmp_buffer.tell() / 1024
+        tmp_buffer = _encode_jpeg(image, mid_q)
 
-        if size_kb <= target_kb:
-            best_buffer = tmp_buffer # Found a candidate!
+        if tmp_buffer.tell() <= target_bytes:
+            best_buffer = tmp_buffer
             min_q = mid_q + 1
         else:
+            lowest_buffer = tmp_buffer
             max_q = mid_q - 1
 
-    if best_buffer.tell() == 0:
-        # Fallback if target_kb is impossible
-        image.save(best_buffer, format="JPEG", quality=20, optimize=True)
-        
+    return best_buffer or lowest_buffer
+
+
+def compress_to_target(image, target_kb, min_q=20, max_q=95):
+    target_bytes = target_kb * 1024
+    probe = _build_probe(image)
+
+    if probe is None:
+        # Falls back to min_q if target_kb is impossible
+        best_buffer = _bisect_quality(image, target_bytes, min_q, max_q)
+        best_buffer.seek(0)
+        return best_buffer
+
+    curve = _fit_size_curve(*probe, min_q, max_q)
+
+    best_buffer = None
+    smallest_buffer = None
+    too_big_q = max_q + 1
+    correction = 1.0
+    tried = set()
+
+    # At most two real encodes: the first one calibrates the probe curve
+    for _ in range(2):
+        quality = _predict_quality(curve, target_bytes * TARGET_SAFETY, correction)
+        if quality in tried:
+            break
+        tried.add(quality)
+
+        tmp_buffer = _encode_jpeg(image, quality)
+        size = tmp_buffer.tell()
+        correction = size / _interpolate(curve, quality)
+
+        if smallest_buffer is None or size < smallest_buffer.tell():
+            smallest_buffer = tmp_buffer
+
+        if size > target_bytes:
+            too_big_q = min(too_big_q, quality)
+
+        if size <= target_bytes:
+            if best_buffer is None or size > best_buffer.tell():
+                best_buffer = tmp_buffer # Found a candidate!
+            # Close enough to the target (or already at max quality)
+            if size >= target_bytes * 0.85 or quality >= max_q:
+                break
+        elif best_buffer is not None:
+            break
+
+    if best_buffer is None:
+        if min_q < too_big_q:
+            # Both predictions overshot: search below the lowest one tried,
+            # down to min_q if target_kb is impossible
+            best_buffer = _bisect_quality(image, target_bytes, min_q, too_big_q - 1)
+        else:
+            best_buffer = smallest_buffer
+
     best_buffer.seek(0)
     return best_buffer
 
 
-def prepare_image(file):
+def prepare_image(file, target_size=None, cover=False):
     try:
-        image = Image.open(file)
+        if isinstance(file, (bytes, bytearray)):
+            file = io.BytesIO(file)
+
+        # JPEGs headed for a much smaller output are decoded at reduced scale
+        image = open_for_target_size(file, target_size, cover=cover)
         image = ImageOps.exif_transpose(image)
         
         # Combined Transparency handling and metadata stripping
@@ -76,36 +209,39 @@ def prepare_image(file):
         raise HTTPException(status_code=400, detail="Invalid image file.")
     
 
+# ─────────────────────────────────────────────
+# PRESETS
+# ─────────────────────────────────────────────
+# Presets run inside the CPU worker pool (app.core.worker_pool), so they take
+# raw upload bytes and return a picklable (content, media_type, headers) tuple
+# instead of a response object.
+
 def optimize_for_twitter(file):
-    image = prepare_image(file)
+    image = prepare_image(file, 1600)
 
     image = resize_longest_side(image, 1600)
     image = image.convert("RGB")
 
     buffer = compress_to_target(image, target_kb=1000)
 
-    return StreamingResponse(
-        buffer,
-        media_type="image/jpeg",
-        headers={"Content-Disposition": "attachment; filename=twitter.jpg"}
-    )
+    return buffer.getvalue(), "image/jpeg", {
+        "Content-Disposition": "attachment; filename=twitter.jpg"
+    }
 
 def optimize_for_whatsapp(file):
-    image = prepare_image(file)
+    image = prepare_image(file, 1600)
 
     image = resize_longest_side(image, 1600)
     image = image.convert("RGB")
 
     buffer = compress_to_target(image, target_kb=1000)
 
-    return StreamingResponse(
-        buffer,
-        media_type="image/jpeg",
-        headers={"Content-Disposition": "attachment; filename=whatsapp.jpg"}
-    )
+    return buffer.getvalue(), "image/jpeg", {
+        "Content-Disposition": "attachment; filename=whatsapp.jpg"
+    }
 
 def optimize_for_web(file):
-    image = prepare_image(file)
+    image = prepare_image(file, 1920)
     image = resize_longest_side(image, 1920)
 
     buffer = io.BytesIO()
@@ -113,14 +249,10 @@ def optimize_for_web(file):
     image.save(buffer, format="WEBP", quality=75, method=6, optimize=True)
     buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
-        media_type="image/webp",
-        headers={
-            "Content-Disposition": "attachment; filename=optimized_web.webp",
-            "Cache-Control": "public, max-age=31536000" # Good for SEO
-        }
-    )
+    return buffer.getvalue(), "image/webp", {
+        "Content-Disposition": "attachment; filename=optimized_web.webp",
+        "Cache-Control": "public, max-age=31536000" # Good for SEO
+    }
 
 def optimize_custom(file, target_kb=None, quality=85, resize_percent=None):
     image = prepare_image(file)
@@ -138,10 +270,10 @@ def optimize_custom(file, target_kb=None, quality=85, resize_percent=None):
         image.save(buffer, format="JPEG", quality=quality, optimize=True)
         buffer.seek(0)
 
-    return StreamingResponse(buffer, media_type="image/jpeg", headers={"Content-Disposition": "attachment; filename=custom.jpg"})
+    return buffer.getvalue(), "image/jpeg", {"Content-Disposition": "attachment; filename=custom.jpg"}
 
 def optimize_for_instagram(file):
-    image = prepare_image(file)
+    image = prepare_image(file, 1080)
 
     # Instagram prefers 1080px max
     image = resize_longest_side(image, 1080)
@@ -156,56 +288,115 @@ def optimize_for_instagram(file):
     )
     buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
-        media_type="image/jpeg",
-        headers={"Content-Disposition": "attachment; filename=instagram.jpg"}
-    )
+    return buffer.getvalue(), "image/jpeg", {
+        "Content-Disposition": "attachment; filename=instagram.jpg"
+    }
 
 def optimize_for_youtube(file):
-    image = prepare_image(file)
+    image = prepare_image(file, (1280, 720), cover=True)
     # Use 'fit' to maintain aspect ratio without stretching
     image = ImageOps.fit(image, (1280, 720), Image.LANCZOS)
 
     buffer = io.BytesIO()
     image.save(buffer, format="JPEG", quality=90, optimize=True, progressive=True)
     buffer.seek(0)
-    return StreamingResponse(buffer, media_type="image/jpeg", headers={"Content-Disposition": "attachment; filename=youtube.jpg"})
+    return buffer.getvalue(), "image/jpeg", {"Content-Disposition": "attachment; filename=youtube.jpg"}
 
 
-def optimize_for_seo(file):
-    image = prepare_image(file)
+# ─────────────────────────────────────────────
+# RESPONSIVE VARIANT PIPELINE
+# ─────────────────────────────────────────────
+SEO_SIZES = [480, 768, 1200]
+SEO_FORMATS = ["webp", "avif"]
+MAX_VARIANT_SIZES = 8
+MAX_VARIANT_SIZE = 4000
+
+VARIANT_ENCODERS = {
+    "webp": ("WEBP", "webp", {"quality": 75, "method": 6}),
+    "avif": ("AVIF", "avif", {"quality": 50}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
 
-    sizes = [480, 768, 1200]
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-        for size in sizes:
-            resized = resize_longest_side(image, size)
-            
-            buffer = io.BytesIO()
-            resized.save(
-                buffer,
-                format="WEBP",
-                quality=75,
-                method=6,
-                optimize=True
-            )
-            buffer.seek(0)
-
-            zip_file.writestr(f"image-{size}.webp", buffer.read())
-
-        # AVIF version (if supported)
-        if AVIF_SUPPORTED:
-            buffer = io.BytesIO()
-            image.save(buffer, format="AVIF", quality=50)
-            buffer.seek(0)
-            zip_file.writestr("image.avif", buffer.read())
-
-    zip_buffer.seek(0)
-
-    return StreamingResponse(
-        zip_buffer,
-        media_type="application/zip",
-        headers={"Content-Disposition": "attachment; filename=seo-images.zip"}
-    )
\ No newline at end of file
+
+def parse_variant_options(sizes=None, formats=None):
+    """Normalize comma-separated size / format lists from the query string."""
+    try:
+        size_list = [int(s) for s in str(sizes).split(",") if s.strip()] if sizes else SEO_SIZES
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Sizes must be comma-separated integers.")
+
+    if not size_list or len(size_list) > MAX_VARIANT_SIZES:
+        raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_VARIANT_SIZES} sizes.")
+    if any(s < 16 or s > MAX_VARIANT_SIZE for s in size_list):
+        raise HTTPException(status_code=400, detail=f"Sizes must be between 16 and {MAX_VARIANT_SIZE}px.")
+
+    format_list = [f.strip().lower() for f in formats.split(",") if f.strip()] if formats else SEO_FORMATS
+    format_list = ["jpeg" if f == "jpg" else f for f in format_list]
+
+    unsupported = [f for f in format_list if f not in VARIANT_ENCODERS]
+    if unsupported or not format_list:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formats must be any of: {', '.join(VARIANT_ENCODERS)}."
+        )
+
+    if not AVIF_SUPPORTED:
+        format_list = [f for f in format_list if f != "avif"] or ["webp"]
+
+    # Largest first: the slowest encodes are submitted first
+    return sorted(set(size_list), reverse=True), list(dict.fromkeys(format_list))
+
+
+def seo_cache_params(sizes=None, formats=None):
+    """Cache key parameters: equivalent size / format lists give the same key."""
+    size_list, format_list = parse_variant_options(sizes, formats)
+    return {"sizes": size_list, "formats": sorted(format_list)}
+
+
+def _encode_variant(image, fmt):
+    pil_format, _, options = VARIANT_ENCODERS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def _encode_size_level(file, size, formats):
+    """Pool worker: [(filename, bytes)] of every format at one size."""
+    image = resize_longest_side(prepare_image(file, size), size)
+    return [
+        (f"image-{size}.{VARIANT_ENCODERS[fmt][1]}", _encode_variant(image, fmt))
+        for fmt in formats
+    ]
+
+
+def encode_variants(file, sizes, formats):
+    """
+    Encodes every (size, format) variant in the shared process pool, one job
+    per size, and yields (filename, bytes) as each level finishes. Each job
+    decodes the upload itself, JPEGs at the reduced scale its size allows.
+    """
+    levels = ((file, size, formats) for size in sizes)
+
+    for encoded in imap_unordered(_encode_size_level, levels):
+        yield from encoded
+
+
+def stream_seo_variants(file, sizes=None, formats=None):
+    """
+    Like optimize_for_seo, but the zip is a lazy generator of chunks: each
+    size level is sent as soon as its encodes finish. Options, pool admission
+    and the image are only checked once the first chunk is requested.
+    """
+    def chunks():
+        size_list, format_list = parse_variant_options(sizes, formats)
+        with cpu_admission():
+            yield from stream_zip(encode_variants(file, size_list, format_list))
+
+    return chunks(), "application/zip", {
+        "Content-Disposition": "attachment; filename=seo-images.zip"
+    }
+
+
+def optimize_for_seo(file, sizes=None, formats=None):
+    chunks, media_type, headers = stream_seo_variants(file, sizes, formats)
+    return b"".join(chunks), media_type, headers
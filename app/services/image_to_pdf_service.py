@@ -1,119 +1,196 @@
 import io
 import time
 import fitz
-from PIL import Image
-import zipfile
+from PIL import Image, ImageOps
 from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
 from starlette.concurrency import run_in_threadpool
 from app.core.logging import logger
+from app.services.pdf_rasterizer import (
+    DEFAULT_DPI,
+    FORMATS,
+    parse_page_range,
+    page_count,
+    render_pages,
+)
+from app.utils.temp_files import temp_path, remove_file, temp_file_response
+from app.utils.upload_buffer import spooled_path, upload_size
+from app.utils.zip_stream import stream_zip, prime_chunks
 
-def _sync_image_to_pdf(image_bytes: bytes, filename: str):
-    """Synchronously converts image bytes to PDF bytes."""
+# ─────────────────────────────────────────────
+# IMAGES → PDF
+# ─────────────────────────────────────────────
+# Every image becomes one page, sized at PAGE_DPI. Encoded streams are
+# embedded as they are wherever PDF can hold them:
+#   - JPEG / JPEG 2000: the file itself becomes the DCTDecode / JPXDecode
+#     stream, no decode or re-encode (EXIF rotations are applied by rotating
+#     the placement instead of the pixels)
+#   - PNG: handed to PyMuPDF, stored as Flate, never turned into JPEG
+#   - anything else: decoded and embedded losslessly as PNG
+# Pages are written to the output file in batches: the document is saved,
+# then reopened and extended with incremental saves, so memory holds one
+# batch of images rather than the whole album.
+
+PAGE_DPI = 100  # Pillow's former resolution=100.0
+PASSTHROUGH_FORMATS = {"JPEG", "JPEG2000", "PNG"}
+
+# EXIF orientation -> placement rotation (PyMuPDF degrees). Mirrored
+# orientations (2, 4, 5, 7) cannot be expressed and are decoded instead.
+EXIF_ROTATION = {1: 0, 3: 180, 6: 270, 8: 90}
+
+# A batch is flushed after this many pages or this many image bytes
+PAGES_PER_SAVE = 16
+BYTES_PER_SAVE = 64 * 1024 * 1024
+
+
+def _image_page(file_obj):
+    """(image stream, page width, page height, rotation) for one upload."""
+    file_obj.seek(0)
+
+    # Header only: Pillow decodes nothing until pixels are accessed
+    img = Image.open(file_obj)
+    fmt = img.format
+    width, height = img.size
+    orientation = img.getexif().get(0x0112, 1) if fmt == "JPEG" else 1
+
+    if fmt in PASSTHROUGH_FORMATS and orientation in EXIF_ROTATION:
+        rotate = EXIF_ROTATION[orientation]
+        if rotate in (90, 270):
+            width, height = height, width
+
+        file_obj.seek(0)
+        return file_obj.read(), width, height, rotate
+
+    img = ImageOps.exif_transpose(img)
+    buffer = io.BytesIO()
+
+    if fmt == "JPEG" or img.mode == "CMYK":
+        # Mirrored JPEG: lossy input stays lossy
+        img.convert("RGB").save(buffer, format="JPEG", quality=95)
+    else:
+        if img.mode not in ("1", "L", "LA", "RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img.save(buffer, format="PNG")
+
+    return buffer.getvalue(), img.width, img.height, 0
+
+
+def _sync_images_to_pdf(file_objs, output_path: str):
+    """
+    Writes one page per image to output_path, batch by batch.
+    Returns (total input size, processing time ms).
+    """
     start_time = time.perf_counter()
+    scale = 72 / PAGE_DPI
+    original_size = 0
+
+    doc = fitz.open()
+    saved = False
+    batch_pages = batch_bytes = 0
+
     try:
-        # Load image
-        img = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB (required for PDF if image is PNG with alpha or CMYK)
-        if img.mode in ("RGBA", "P", "CMYK"):
-            img = img.convert("RGB")
-            
-        # Create a PDF in memory using PyMuPDF
-        pdf_bytes = img.save_all if hasattr(img, 'is_animated') and img.is_animated else None # handle multi-frame if needed
-        
-        output_buffer = io.BytesIO()
-        # PIL can save directly to PDF
-        img.save(output_buffer, format="PDF", resolution=100.0, save_all=True)
-        
-        output_buffer.seek(0)
-        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
-        
-        return output_buffer, len(image_bytes), processing_time_ms
+        for index, file_obj in enumerate(file_objs, start=1):
+            stream, width, height, rotate = _image_page(file_obj)
+            original_size += upload_size(file_obj)
 
-    except Exception as e:
-        logger.error(f"Sync Image Conversion Error: {str(e)}")
-        raise e
+            page = doc.new_page(width=width * scale, height=height * scale)
+            page.insert_image(page.rect, stream=stream, rotate=rotate)
+
+            batch_pages += 1
+            batch_bytes += len(stream)
+
+            if index < len(file_objs) and batch_pages < PAGES_PER_SAVE and batch_bytes < BYTES_PER_SAVE:
+                continue
+
+            if saved:
+                doc.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=True)
+            else:
+                doc.save(output_path, deflate=True)
+                saved = True
+
+            # Reopening releases the batch's image streams
+            doc.close()
+            doc = fitz.open(output_path) if index < len(file_objs) else None
+            batch_pages = batch_bytes = 0
+
+    finally:
+        if doc is not None:
+            doc.close()
+
+    processing_time_ms = int((time.perf_counter() - start_time) * 1000)
+    return original_size, processing_time_ms
+
+
+async def images_to_pdf_service(files):
+    """One PDF page per upload, in upload order, streamed back from disk."""
+    output_path = temp_path(".pdf")
 
-async def image_to_pdf_service(file):
     try:
-        # Safe Byte Extraction (Matching your Pro logic)
-        await file.seek(0)
-        image_bytes = await file.read()
-        
-        output_buffer, original_size, processing_time_ms = await run_in_threadpool(
-            _sync_image_to_pdf, image_bytes, file.filename
+        original_size, processing_time_ms = await run_in_threadpool(
+            _sync_images_to_pdf, [file.file for file in files], output_path
         )
 
         return {
-            "response": StreamingResponse(
-                output_buffer,
+            "response": temp_file_response(
+                output_path,
                 media_type="application/pdf",
-                headers={
-                    "Content-Disposition": f"attachment; filename={file.filename.split('.')[0]}.pdf",
-                    "Content-Type": "application/pdf"
-                }
+                filename=f"{files[0].filename.split('.')[0]}.pdf",
             ),
             "original_size": original_size,
             "processing_time_ms": processing_time_ms,
         }
 
     except Exception as e:
+        remove_file(output_path)
         logger.error(f"Image to PDF Wrapper Error: {str(e)}")
         raise HTTPException(status_code=500, detail="Error during image conversion.")
-    
 
-def _sync_pdf_to_images(file_bytes: bytes, img_format: str):
-    """Synchronously renders PDF pages to images and zips them."""
-    start_time = time.perf_counter()
-    try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        zip_buffer = io.BytesIO()
-        
-        # Determine image format for PyMuPDF
-        ext = "png" if img_format.lower() == "png" else "jpg"
-        
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-            for page_index in range(len(doc)):
-                page = doc[page_index]
-                
-                # Increase resolution (2.0 = 2x zoom/DPI)
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                
-                img_data = pix.tobytes(ext)
-                zip_file.writestr(f"page_{page_index + 1}.{ext}", img_data)
-
-        doc.close()
-        zip_buffer.seek(0)
-        
-        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
-        return zip_buffer, len(file_bytes), processing_time_ms
 
-    except Exception as e:
-        logger.error(f"Sync PDF to Image Error: {str(e)}")
-        raise e
+async def image_to_pdf_service(file):
+    return await images_to_pdf_service([file])
 
-async def pdf_to_image_service(file, img_format: str):
-    try:
-        await file.seek(0)
-        pdf_bytes = await file.read()
-        
-        zip_buffer, original_size, processing_time_ms = await run_in_threadpool(
-            _sync_pdf_to_images, pdf_bytes, img_format
+
+def _sync_pdf_to_images(file_obj, img_format: str, dpi: int, pages):
+    """
+    Renders the selected PDF pages to images and yields a zip of them chunk
+    by chunk, in page order. Pages are rendered in the process pool from a
+    disk spool of the upload; only the pages in flight are held in memory.
+    """
+    ext = FORMATS.get(img_format.lower(), "png")
+
+    with spooled_path(file_obj, ".pdf") as input_path:
+        selected = parse_page_range(pages, page_count(input_path))
+
+        yield from stream_zip(
+            (f"page_{page_index + 1}.{ext}", img_data)
+            for page_index, img_data in render_pages(input_path, selected, dpi, ext)
         )
 
-        return {
-            "response": StreamingResponse(
-                zip_buffer,
-                media_type="application/zip",
-                headers={
-                    "Content-Disposition": f"attachment; filename={file.filename.split('.')[0]}_images.zip"
-                }
-            ),
-            "original_size": original_size,
-            "processing_time_ms": processing_time_ms,
-        }
+async def pdf_to_image_service(file, img_format: str, dpi: int = DEFAULT_DPI, pages: str = None):
+    start_time = time.perf_counter()
+    chunks = _sync_pdf_to_images(file.file, img_format, dpi, pages)
+
+    try:
+        # The first page is rendered before responding, so a bad range or a
+        # broken PDF is still a normal error response
+        body = await prime_chunks(chunks)
+
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
 
     except Exception as e:
         logger.error(f"PDF to Image Wrapper Error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error during image conversion.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error during image conversion.")
+
+    return {
+        "response": StreamingResponse(
+            body,
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename={file.filename.split('.')[0]}_images.zip"
+            }
+        ),
+        "original_size": upload_size(file.file),
+        # Time to first page; the rest is rendered while the zip streams
+        "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
+    }
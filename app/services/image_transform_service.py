@@ -26,9 +26,9 @@ def _prepare_image(file):
         raise HTTPException(status_code=500, detail="Image processing failed.")
     
 
-def resize_image_service(file_bytes, width: int, height: int, keep_aspect: bool):
+def resize_image_service(file_obj, width: int, height: int, keep_aspect: bool):
 
-    image = _prepare_image(io.BytesIO(file_bytes))
+    image = _prepare_image(file_obj)
     original_format = image.format if image.format else "PNG"
 
     if keep_aspect:
@@ -47,9 +47,9 @@ def resize_image_service(file_bytes, width: int, height: int, keep_aspect: bool)
     return response, metadata
     
 
-def crop_image_service(file_bytes, left: int, top: int, right: int, bottom: int):
+def crop_image_service(file_obj, left: int, top: int, right: int, bottom: int):
 
-    image = _prepare_image(io.BytesIO(file_bytes))
+    image = _prepare_image(file_obj)
     original_format = image.format if image.format else "PNG"
 
     cropped = image.crop((left, top, right, bottom))
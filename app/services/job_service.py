@@ -0,0 +1,385 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import (
+    JOB_SPOOL_DIR,
+    JOB_WORKERS,
+    JOB_TIMEOUT,
+    JOB_RESULT_TTL,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+)
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.enums.action_type import ActionType
+from app.enums.job_status import JobStatus
+from app.models.job_model import Job
+from app.core.ffmpeg_scheduler import ffmpeg_slot
+from app.services import gif_service, sticker_service
+from app.services.pdf_compressor import _sync_compress_pdf, _sync_pro_compression
+
+
+# ─────────────────────────────────────────────
+# BACKGROUND JOB QUEUE
+# ─────────────────────────────────────────────
+# Long conversions are submitted as jobs: the upload is spooled to
+# JOB_SPOOL_DIR/<job id>/, a row is written to the jobs table and the request
+# returns immediately. Worker tasks in every app process claim queued rows
+# (SELECT ... FOR UPDATE SKIP LOCKED), run them and keep the result on disk
+# for JOB_RESULT_TTL seconds. Queued work survives restarts.
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+JANITOR_INTERVAL = 60
+PROGRESS_WRITE_INTERVAL = 1.0
+
+_workers = []
+
+# Set on submit so idle workers start right away instead of at the next poll
+_wake = asyncio.Event()
+
+# Replaced on every completion; long-pollers wait on the current one
+_job_finished = asyncio.Event()
+
+
+def _notify_finished():
+    global _job_finished
+    _job_finished.set()
+    _job_finished = asyncio.Event()
+
+
+def _job_dir(job_id):
+    return os.path.join(JOB_SPOOL_DIR, job_id)
+
+
+def _remove_file(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+# -----------------------
+# HANDLERS
+# -----------------------
+# Each handler turns the spooled input into output_path.
+
+async def _run_video_to_gif(input_path, output_path, params, file_size):
+    duration = min(params["end_time"] - params["start_time"], gif_service.MAX_DURATION)
+
+    # Jobs wait for a slot as long as it takes; JOB_TIMEOUT bounds the whole run
+    async with ffmpeg_slot(duration, timeout=None):
+        result_path, _, _ = await gif_service.process_video_to_gif_async(
+            input_path,
+            file_size,
+            params["fps"],
+            params["width"],
+            params["start_time"],
+            params["end_time"],
+            params["quality"],
+            params["reverse"],
+        )
+    shutil.move(result_path, output_path)
+
+
+async def _run_video_to_sticker(input_path, output_path, params, file_size):
+    duration = min(params["end_time"] - params["start_time"], sticker_service.MAX_DURATION)
+
+    async with ffmpeg_slot(duration, timeout=None):
+        result_path, _, _ = await sticker_service.process_video_to_sticker_async(
+            input_path,
+            file_size,
+            params["fps"],
+            params["start_time"],
+            params["end_time"],
+            params["quality"],
+            params["reverse"],
+        )
+    shutil.move(result_path, output_path)
+
+
+def _progress_path(job_dir):
+    return os.path.join(job_dir, "progress.json")
+
+
+def _progress_writer(job_dir):
+    """
+    progress(done, total) callback that publishes to the job's spool dir, so
+    status requests served by any app process can read it. Writes are
+    throttled and atomic (temp file + rename).
+    """
+    path = _progress_path(job_dir)
+    last_write = 0.0
+
+    def progress(done, total):
+        nonlocal last_write
+        now = time.monotonic()
+        if done < total and now - last_write < PROGRESS_WRITE_INTERVAL:
+            return
+        last_write = now
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"done": done, "total": total}, f)
+        os.replace(tmp_path, path)
+
+    return progress
+
+
+def job_progress(job: Job):
+    """{"done", "total"} for a running job that reports progress, else None."""
+    if job.status != JobStatus.RUNNING:
+        return None
+
+    try:
+        with open(_progress_path(_job_dir(job.id))) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _sync_pdf_job(compress, input_path, output_path, *args):
+    # PyMuPDF reads the spool file and writes the result next to it
+    progress = _progress_writer(os.path.dirname(output_path))
+    compress(input_path, output_path, *args, progress=progress)
+
+
+async def _run_pdf_compress(input_path, output_path, params, file_size):
+    await run_in_threadpool(
+        _sync_pdf_job, _sync_compress_pdf, input_path, output_path, params["compression_level"]
+    )
+
+
+async def _run_pdf_compress_pro(input_path, output_path, params, file_size):
+    await run_in_threadpool(
+        _sync_pdf_job, _sync_pro_compression, input_path, output_path,
+        params["quality"], params["dpi"]
+    )
+
+
+# action type -> (handler, media type, output extension)
+JOB_HANDLERS = {
+    ActionType.VIDEO_TO_GIF: (_run_video_to_gif, "image/gif", "gif"),
+    ActionType.VIDEO_TO_STICKER: (_run_video_to_sticker, "image/webp", "webp"),
+    ActionType.PDF_COMPRESS: (_run_pdf_compress, "application/pdf", "pdf"),
+    ActionType.PDF_COMPRESS_PRO: (_run_pdf_compress_pro, "application/pdf", "pdf"),
+}
+
+
+# -----------------------
+# SUBMIT / STATUS
+# -----------------------
+
+async def submit_job(db, file, action_type: ActionType, params: dict, max_size: int) -> Job:
+    job_id = str(uuid.uuid4())
+    job_dir = _job_dir(job_id)
+    os.makedirs(job_dir, exist_ok=True)
+
+    ext = file.filename.split(".")[-1].lower()
+    input_path = os.path.join(job_dir, f"input.{ext}")
+
+    try:
+        await file.seek(0)
+        file_size = 0
+
+        # Stream to the spool dir in chunks, never the whole upload in RAM
+        with open(input_path, "wb") as spool:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise HTTPException(status_code=413, detail="File too large")
+                spool.write(chunk)
+
+        job = await Job.create_job(
+            db,
+            id=job_id,
+            action_type=action_type,
+            params=json.dumps(params),
+            input_path=input_path,
+            original_filename=file.filename,
+            original_size=file_size,
+        )
+
+    except Exception:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+
+    _wake.set()
+    logger.info(f"Job {job_id} queued ({action_type.value})")
+    return job
+
+
+async def get_job_or_404(db, job_id) -> Job:
+    job = await Job.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+async def wait_for_job(db, job_id, timeout: float) -> Job:
+    """
+    Long-poll: returns as soon as the job finishes or the timeout passes.
+    Completions in this process wake waiters immediately; jobs finished by
+    another process are picked up on the next JOB_POLL_INTERVAL check.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while True:
+        job = await get_job_or_404(db, job_id)
+        remaining = deadline - loop.time()
+
+        if job.is_finished or remaining <= 0:
+            return job
+
+        try:
+            await asyncio.wait_for(
+                _job_finished.wait(), timeout=min(remaining, JOB_POLL_INTERVAL)
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+def result_path_or_error(job: Job) -> str:
+    if job.status == JobStatus.EXPIRED:
+        raise HTTPException(status_code=410, detail="Job result has expired.")
+
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error_message}")
+
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status.value}.")
+
+    if not job.output_path or not os.path.exists(job.output_path):
+        raise HTTPException(status_code=410, detail="Job result has expired.")
+
+    return job.output_path
+
+
+# -----------------------
+# WORKERS
+# -----------------------
+
+async def _run_job(db, job: Job):
+    handler, media_type, ext = JOB_HANDLERS[job.action_type]
+    output_path = os.path.join(_job_dir(job.id), f"output.{ext}")
+    start = time.perf_counter()
+
+    logger.info(f"Job {job.id} started ({job.action_type.value}, attempt {job.attempts})")
+
+    try:
+        await asyncio.wait_for(
+            handler(job.input_path, output_path, json.loads(job.params or "{}"), job.original_size),
+            timeout=JOB_TIMEOUT,
+        )
+
+        filename_base = os.path.splitext(job.original_filename or "output")[0]
+
+        await Job.finish(
+            db, job, JOB_RESULT_TTL,
+            status=JobStatus.SUCCEEDED,
+            output_path=output_path,
+            output_filename=f"{filename_base}.{ext}",
+            media_type=media_type,
+            output_size=os.path.getsize(output_path),
+            processing_time_ms=int((time.perf_counter() - start) * 1000),
+        )
+
+    except asyncio.CancelledError:
+        # Shutdown: the row stays RUNNING and is requeued once it goes stale
+        raise
+
+    except Exception as e:
+        if isinstance(e, asyncio.TimeoutError):
+            error_message = "Processing timed out."
+        elif isinstance(e, HTTPException):
+            error_message = str(e.detail)
+        else:
+            logger.error(f"Job {job.id} failed: {e}")
+            error_message = "Processing failed."
+
+        _remove_file(output_path)
+
+        await Job.finish(
+            db, job, JOB_RESULT_TTL,
+            status=JobStatus.FAILED,
+            error_message=error_message,
+            processing_time_ms=int((time.perf_counter() - start) * 1000),
+        )
+
+    _remove_file(job.input_path)
+    _remove_file(_progress_path(_job_dir(job.id)))
+    _notify_finished()
+
+
+async def _worker_loop(worker_id):
+    while True:
+        try:
+            _wake.clear()
+
+            async with AsyncSessionLocal() as db:
+                job = await Job.claim_next(db)
+                if job is not None:
+                    await _run_job(db, job)
+                    continue
+
+            try:
+                await asyncio.wait_for(_wake.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Job worker {worker_id} error: {e}")
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def _janitor_loop():
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await Job.requeue_interrupted(
+                    db, max_attempts=JOB_MAX_ATTEMPTS, stale_after=JOB_TIMEOUT * 2
+                )
+
+                for job in await Job.expired(db):
+                    await run_in_threadpool(shutil.rmtree, _job_dir(job.id), True)
+                    job.status = JobStatus.EXPIRED
+                    job.input_path = None
+                    job.output_path = None
+
+                await db.commit()
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Job janitor error: {e}")
+
+        await asyncio.sleep(JANITOR_INTERVAL)
+
+
+async def start_job_workers():
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+
+    _workers.extend(
+        asyncio.create_task(_worker_loop(i)) for i in range(JOB_WORKERS)
+    )
+    _workers.append(asyncio.create_task(_janitor_loop()))
+
+    logger.info(f"Job workers started ({JOB_WORKERS} workers, spool {JOB_SPOOL_DIR})")
+
+
+async def stop_job_workers():
+    for task in _workers:
+        task.cancel()
+
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
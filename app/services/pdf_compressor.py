@@ -1,21 +1,36 @@
 import fitz
-import io
+import os
 import time
-from PIL import Image
-from fastapi.responses import StreamingResponse
 from fastapi import HTTPException
 from fastapi.concurrency import run_in_threadpool
 from app.core.logging import logger
+from app.services.pdf_image_recompressor import recompress_images, stats_headers
+from app.utils.temp_files import temp_path, remove_file, temp_file_response
+from app.utils.upload_buffer import spooled_path
 
 
+# min_dpi: images are not scaled below this effective resolution on the page
 COMPRESSION_PRESETS = {
-    "low": {"scale": 1.0, "quality": 85},
-    "medium": {"scale": 0.6, "quality": 60},
-    "high": {"scale": 0.4, "quality": 40},
+    "low": {"scale": 1.0, "quality": 85, "min_dpi": None},
+    "medium": {"scale": 0.6, "quality": 60, "min_dpi": 150},
+    "high": {"scale": 0.4, "quality": 40, "min_dpi": 96},
 }
 
 
-def _sync_compress_pdf(file_bytes: bytes, compression_level: str):
+def _save_compressed(doc, output_path: str):
+    """
+    Full rewrite straight to disk. An incremental save would keep the
+    replaced image streams in the file, so garbage collection is required.
+    """
+    doc.save(
+        output_path,
+        garbage=4,
+        deflate=True,
+        clean=True,
+    )
+
+
+def _sync_compress_pdf(input_path: str, output_path: str, compression_level: str, progress=None):
     start_time = time.perf_counter()
 
     settings = COMPRESSION_PRESETS.get(compression_level.lower())
@@ -24,92 +39,63 @@ def _sync_compress_pdf(file_bytes: bytes, compression_level: str):
 
     scale = settings["scale"]
     quality = settings["quality"]
+    min_dpi = settings["min_dpi"]
 
     try:
-        # Open from bytes
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-
-        for page in doc:
-            # get_images returns a list of tuples
-            image_list = page.get_images(full=True)
-
-            for img in image_list:
-                xref = img[0]  # The 'xref' index of the image
-                
-                # Extract image data
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-
-                # Load into PIL for processing
-                image = Image.open(io.BytesIO(image_bytes))
-
-                # Calculate new dimensions
-                new_width = int(image.width * scale)
-                new_height = int(image.height * scale)
-
-                # Skip if already tiny or would become invisible
-                if new_width < 50 or new_height < 50:
-                    continue 
-
-                # Resize
-                image = image.resize((new_width, new_height), Image.LANCZOS)
-
-                # Ensure RGB for JPEG (removes alpha channel issues)
-                if image.mode != "RGB":
-                    image = image.convert("RGB")
-
-                # Save compressed image to buffer
-                img_buffer = io.BytesIO()
-                image.save(
-                    img_buffer,
-                    format="JPEG",
-                    quality=quality,
-                    optimize=True
-                )
-                img_buffer.seek(0)
-
-                # CORRECTED LINE: Use page.replace_image instead of doc.update_image
-                page.replace_image(xref, stream=img_buffer.read())
+        # Opened from the path: objects are read on demand, not loaded up front
+        doc = fitz.open(input_path, filetype="pdf")
 
-        # Finalize and Save
-        output_buffer = io.BytesIO()
-        doc.save(
-            output_buffer,
-            garbage=4,
-            deflate=True,
-            clean=True,
+        # Distinct images are recompressed in the process pool, then replaced
+        stats = recompress_images(
+            doc, quality, scale=scale, min_dpi=min_dpi, min_side=50, progress=progress
         )
+
+        # Finalize and Save
+        _save_compressed(doc, output_path)
         doc.close()
-        
-        output_buffer.seek(0)
+
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
 
-        return output_buffer, len(file_bytes), processing_time_ms
+        return os.path.getsize(input_path), processing_time_ms, stats
 
     except Exception as e:
         logger.error(f"Aggressive Compression Error: {str(e)}")
         raise e
 
 
-async def compress_pdf_file(file, compression_level: str):
+def _sync_compress_upload(compress, file, *args):
+    """
+    Spools the upload (file object or bytes) to disk and runs `compress`
+    into a temp output file. Returns (output_path, *compress results).
+    """
+    output_path = temp_path(".pdf")
+
     try:
-        # IMPORTANT: file is already a file-like object
-        file.seek(0)
-        file_bytes = file.read()  # NO await here
+        with spooled_path(file, ".pdf") as input_path:
+            return (output_path, *compress(input_path, output_path, *args))
+    except Exception:
+        remove_file(output_path)
+        raise
 
-        output_buffer, original_size, processing_time_ms = await run_in_threadpool(
+
+async def compress_pdf_file(file, compression_level: str, image_stats=False):
+    try:
+        # IMPORTANT: file is already a file-like object
+        # It is spooled to disk and compressed file to file; the output is
+        # streamed from disk, so no copy of the PDF is held in memory
+        output_path, original_size, processing_time_ms, stats = await run_in_threadpool(
+            _sync_compress_upload,
             _sync_compress_pdf,
-            file_bytes,
+            file,
             compression_level
         )
 
         return {
-            "response": StreamingResponse(
-                output_buffer,
+            "response": temp_file_response(
+                output_path,
                 media_type="application/pdf",
-                headers={
-                    "Content-Disposition": "attachment; filename=compressed.pdf"
-                }
+                filename="compressed.pdf",
+                headers=stats_headers(stats, per_image=image_stats),
             ),
             "original_size": original_size,
             "processing_time_ms": processing_time_ms,
@@ -125,65 +111,28 @@ async def compress_pdf_file(file, compression_level: str):
             detail="Error during PDF processing."
         )
 
-def _sync_pro_compression(file_bytes: bytes, quality: int, dpi: int):
+def _sync_pro_compression(input_path: str, output_path: str, quality: int, dpi: int, progress=None):
     """Heavy CPU-bound PDF processing logic."""
     start_time = time.perf_counter()
     try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
+        doc = fitz.open(input_path, filetype="pdf")
         doc.set_metadata({}) # Strip metadata for Pro version
 
-        for page in doc:
-            image_list = page.get_images(full=True)
-            for img in image_list:
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                
-                # Open with PIL
-                img_obj = Image.open(io.BytesIO(image_bytes))
-                
-                # Calculate scaling factor based on 300 DPI as baseline
-                # Note: This is a simplified ratio; usually PDFs are 72 points per inch
-                scaling_factor = dpi / 300.0
-                if scaling_factor >= 1.0:
-                    continue # Don't upscale
-                
-                new_size = (
-                    max(1, int(img_obj.width * scaling_factor)),
-                    max(1, int(img_obj.height * scaling_factor))
-                )
-
-                # Only resize if it's actually a significant change
-                img_obj = img_obj.resize(new_size, Image.LANCZOS)
-
-                if img_obj.mode != "RGB":
-                    img_obj = img_obj.convert("RGB")
-
-                img_buffer = io.BytesIO()
-                img_obj.save(img_buffer, format="JPEG", quality=quality, optimize=True)
-                img_buffer.seek(0)
-
-                # FIX: Use page.replace_image instead of doc.update_stream
-                page.replace_image(xref, stream=img_buffer.read())
-
-        output_buffer = io.BytesIO()
-        doc.save(
-            output_buffer,
-            garbage=4,
-            deflate=True,
-            clean=True,
-        )
+        # Images are scaled to `dpi` at the size they are drawn on the page
+        # (never upscaled), so a thumbnail and a full-page scan both end up there
+        stats = recompress_images(doc, quality, target_dpi=dpi, progress=progress)
+
+        _save_compressed(doc, output_path)
         doc.close()
-        output_buffer.seek(0)
-        
+
         processing_time_ms = int((time.perf_counter() - start_time) * 1000)
-        return output_buffer, processing_time_ms
+        return os.path.getsize(input_path), processing_time_ms, stats
 
     except Exception as e:
         logger.error(f"Sync Pro Compression Logic Error: {str(e)}")
         raise e
 
-async def compress_pdf_pro_service(file, quality: int, dpi: int):
+async def compress_pdf_pro_service(file, quality: int, dpi: int, image_stats=False):
     try:
         # Input Validation
         if not (30 <= quality <= 95):
@@ -192,36 +141,23 @@ async def compress_pdf_pro_service(file, quality: int, dpi: int):
             raise HTTPException(status_code=400, detail="DPI must be 72-300")
 
         # ---------------------------------------------------------
-        # SAFE BYTE EXTRACTION
+        # DISK-BACKED INPUT AND OUTPUT
         # ---------------------------------------------------------
-        if hasattr(file, "read"):
-            # Check if it's an async FastAPI UploadFile
-            import inspect
-            if inspect.iscoroutinefunction(file.read):
-                await file.seek(0)
-                original_bytes = await file.read()
-            else:
-                # It's a standard file-like object
-                file.seek(0)
-                original_bytes = file.read()
-        else:
-            # It's already bytes
-            original_bytes = file
-
-        original_size = len(original_bytes)
+        # Bytes, a FastAPI UploadFile or its spooled file object
+        if not isinstance(file, (bytes, bytearray)):
+            file = getattr(file, "file", file)
 
         # Offload to thread pool
-        output_buffer, processing_time_ms = await run_in_threadpool(
-            _sync_pro_compression, original_bytes, quality, dpi
+        output_path, original_size, processing_time_ms, stats = await run_in_threadpool(
+            _sync_compress_upload, _sync_pro_compression, file, quality, dpi
         )
+
         return {
-            "response": StreamingResponse(
-                output_buffer,
+            "response": temp_file_response(
+                output_path,
                 media_type="application/pdf",
-                headers={
-                    "Content-Disposition": "attachment; filename=compressed-pro.pdf",
-                    "Content-Type": "application/pdf"
-                }
+                filename="compressed-pro.pdf",
+                headers=stats_headers(stats, per_image=image_stats),
             ),
             "original_size": original_size,
             "processing_time_ms": processing_time_ms,
@@ -232,4 +168,4 @@ async def compress_pdf_pro_service(file, quality: int, dpi: int):
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred during advanced compression: {str(e)}"
-        )
\ No newline at end of file
+        )
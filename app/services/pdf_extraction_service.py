@@ -1,83 +1,265 @@
 import io
+import json
 import time
 import fitz
-import zipfile
-from fastapi.responses import StreamingResponse
+from PIL import Image
 from fastapi import HTTPException
-from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.core.config import CPU_WORKERS
 from app.core.logging import logger
+from app.core.worker_pool import imap
+from app.services.pdf_image_recompressor import content_hash
+from app.services.pdf_rasterizer import worker_document
+from app.utils.upload_buffer import spooled_path, upload_size
+from app.utils.zip_stream import stream_zip, prime_chunks
 
-def _sync_extract_images(file_bytes: bytes):
-    """Synchronous CPU-bound task to extract raw images from PDF XRefs."""
-    start_time = time.perf_counter()
+# ─────────────────────────────────────────────
+# PARALLEL PDF IMAGE EXTRACTION
+# ─────────────────────────────────────────────
+# One pass over the page image lists finds every distinct image: an xref
+# shown on 300 pages is extracted once, and different xrefs holding
+# identical bytes (same stream + dictionary, see content_hash) share one
+# file. Distinct images are grouped by the page that first shows them and
+# extracted per page range in the shared CPU process pool (PyMuPDF holds
+# the GIL and its documents are not thread-safe, so threads would run one
+# at a time); workers open the spooled PDF by path. Ranges come back in page
+# order and go straight into the streamed zip, at most EXTRACT_WINDOW in
+# flight. manifest.json closes the archive and maps every page to its files.
+#
+# With normalize, the workers also convert images to plain web formats:
+# CMYK JPEGs become RGB JPEGs, images with a soft mask become RGBA PNGs and
+# other codecs (JPEG 2000, JBIG2, fax, PNM...) become PNG.
+
+PAGES_PER_TASK = 4
+EXTRACT_WINDOW = CPU_WORKERS + 2
+
+# Below this many distinct images the pool round trip costs more than it saves
+PARALLEL_MIN_IMAGES = 4
+
+NORMALIZED_JPEG_QUALITY = 95
+WEB_COLORSPACES = {1, 3}  # components: gray, RGB
+
+
+def _plan_extraction(doc):
+    """
+    (images, pages). `images`: canonical xref -> {"smask", "page", "index",
+    "xrefs", "pages"} in order of first appearance, where page/index name
+    the first placement and `xrefs` lists byte-identical duplicates. `pages`:
+    page index -> canonical xrefs shown there, in placement order.
+    """
+    images = {}
+    pages = {}
+    canonical_of = {}
+    by_content = {}
+    memo = {}
+    sizes = {}
+
+    for page_index in range(len(doc)):
+        shown = []
+
+        for img in doc.get_page_images(page_index):
+            xref, smask = img[:2]
+            canonical = canonical_of.get(xref)
+
+            if canonical is None:
+                digest = content_hash(doc, xref, memo, sizes)
+                canonical = canonical_of[xref] = by_content.setdefault(digest, xref)
+
+                if canonical == xref:
+                    images[xref] = {
+                        "smask": smask,
+                        "page": page_index,
+                        "index": len(shown) + 1,
+                        "xrefs": [xref],
+                        "pages": [],
+                    }
+                else:
+                    images[canonical]["xrefs"].append(xref)
+
+            if canonical not in shown:
+                shown.append(canonical)
+                images[canonical]["pages"].append(page_index + 1)
+
+        if shown:
+            pages[page_index] = shown
+
+    return images, pages
+
+
+def _normalize(doc, xref: int, smask: int, image: dict):
+    """(ext, bytes) of the image in a web format, or None if it already is one."""
+    if not smask and image["ext"] in ("jpeg", "png") and image["colorspace"] in WEB_COLORSPACES:
+        return None
+
+    # Decoded with the PDF's colour space and Decode array applied
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.colorspace is None or pix.n not in WEB_COLORSPACES:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+
+    if smask:
+        base = Image.frombytes("L" if pix.n == 1 else "RGB", (pix.width, pix.height), pix.samples)
+        mask = fitz.Pixmap(doc, smask)
+        alpha = Image.frombytes("L", (mask.width, mask.height), mask.samples)
+
+        # Soft masks may have their own resolution
+        if alpha.size != base.size:
+            alpha = alpha.resize(base.size, Image.BILINEAR)
+
+        base.putalpha(alpha)
+        buffer = io.BytesIO()
+        base.save(buffer, format="PNG")
+        return "png", buffer.getvalue()
+
+    if image["ext"] == "jpeg":
+        return "jpeg", pix.tobytes("jpg", jpg_quality=NORMALIZED_JPEG_QUALITY)
+
+    return "png", pix.tobytes("png")
+
+
+def _extract(doc, xref: int, smask: int, normalize: bool):
+    image = doc.extract_image(xref)
+    ext, data, normalized = image["ext"], image["image"], False
+
+    if normalize:
+        try:
+            converted = _normalize(doc, xref, smask, image)
+            if converted is not None:
+                (ext, data), normalized = converted, True
+        except Exception as e:
+            # Exotic colour spaces and stencil masks are kept as stored
+            logger.warning(f"Image {xref} not normalized: {e}")
+
+    return xref, ext, data, {
+        "width": image["width"],
+        "height": image["height"],
+        "source_colorspace": image["cs-name"],
+        "normalized": normalized,
+    }
+
+
+def _extract_range(doc, images, normalize: bool):
+    extracted = [_extract(doc, xref, smask, normalize) for xref, smask in images]
+
+    # Normalizing decodes images into MuPDF's store
+    fitz.TOOLS.store_shrink(100)
+    return extracted
+
+
+def _extract_images(input_path: str, images, normalize: bool):
+    """Pool worker: [(xref, ext, bytes, info)] for a range of distinct images."""
+    with worker_document(input_path) as doc:
+        return _extract_range(doc, images, normalize)
+
+
+def extract_images(input_path: str, doc, images: dict, normalize=False):
+    """Yields (xref, ext, bytes, info) per distinct image, in order of first appearance."""
+    if len(images) < PARALLEL_MIN_IMAGES:
+        yield from _extract_range(doc, [(x, i["smask"]) for x, i in images.items()], normalize)
+        return
+
+    ranges = {}
+    for xref, image in images.items():
+        ranges.setdefault(image["page"] // PAGES_PER_TASK, []).append((xref, image["smask"]))
+
+    tasks = ((input_path, images_in_range, normalize) for images_in_range in ranges.values())
+
+    for extracted in imap(_extract_images, tasks, window=EXTRACT_WINDOW):
+        yield from extracted
+
+
+def _archive_entries(input_path: str, doc, normalize: bool):
+    """Yields (filename, bytes) for every distinct image, then manifest.json."""
+    images, pages = _plan_extraction(doc)
+
+    if not images:
+        raise ValueError("No images found in the provided PDF.")
+
+    files = {}
+    listed = []
+
+    for xref, ext, data, info in extract_images(input_path, doc, images, normalize):
+        image = images[xref]
+        files[xref] = f"page{image['page'] + 1}_img{image['index']}.{ext}"
+        listed.append({
+            "file": files[xref],
+            "xrefs": image["xrefs"],
+            "pages": image["pages"],
+            "size": len(data),
+            **info,
+        })
+        yield files[xref], data
+
+    placements = sum(len(shown) for shown in pages.values())
+    merged = sum(len(image["xrefs"]) - 1 for image in images.values())
+
+    logger.info(
+        f"Extracted {len(images)} images for {placements} page placements "
+        f"({merged} duplicate xrefs merged)"
+    )
+
+    manifest = {
+        "normalized": normalize,
+        "pages": [
+            {"page": page_index + 1, "images": [files[xref] for xref in shown]}
+            for page_index, shown in pages.items()
+        ],
+        "images": listed,
+        "totals": {
+            "pages": len(doc),
+            "page_placements": placements,
+            "images": len(images),
+            "merged_xrefs": merged,
+        },
+    }
+
+    yield "manifest.json", json.dumps(manifest, indent=2).encode()
+
+
+def _sync_extract_images(file, normalize=False):
+    """
+    Synchronous CPU-bound task to extract raw images from PDF XRefs.
+    The upload (file object or bytes) is spooled to disk, the PDF is opened
+    from that path and the zip is yielded chunk by chunk, one image at a time.
+    """
     try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        zip_buffer = io.BytesIO()
-        
-        image_count = 0
-        
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            for page_index in range(len(doc)):
-                # Get list of images on the page
-                image_list = doc.get_page_images(page_index)
-                
-                for img_index, img in enumerate(image_list):
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    ext = base_image["ext"]  # e.g., 'png', 'jpeg'
-                    
-                    image_count += 1
-                    filename = f"page{page_index+1}_img{img_index+1}.{ext}"
-                    zip_file.writestr(filename, image_bytes)
-
-        doc.close()
-        
-        if image_count == 0:
-            raise ValueError("No images found in the provided PDF.")
-
-        zip_buffer.seek(0)
-        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
-        
-        return zip_buffer, len(file_bytes), processing_time_ms
+        with spooled_path(file, ".pdf") as input_path:
+            with fitz.open(input_path, filetype="pdf") as doc:
+                yield from stream_zip(_archive_entries(input_path, doc, normalize))
 
     except Exception as e:
         logger.error(f"Sync Extraction Error: {str(e)}")
         raise e
 
-async def extract_pdf_images_service(file):
+async def extract_pdf_images_service(file, normalize: bool = False):
+    start_time = time.perf_counter()
+
     try:
-        # Standardize file reading based on your previous structure
-        if hasattr(file, "read"):
-            import inspect
-            if inspect.iscoroutinefunction(file.read):
-                await file.seek(0)
-                original_bytes = await file.read()
-            else:
-                file.seek(0)
-                original_bytes = file.read()
-        else:
-            original_bytes = file
-
-        # Run in threadpool to prevent blocking the event loop
-        zip_output, original_size, processing_time = await run_in_threadpool(
-            _sync_extract_images, original_bytes
-        )
+        # Bytes, an UploadFile or its spooled file: spooled to disk in the
+        # threadpool, and the zip is streamed while images are extracted
+        if not isinstance(file, (bytes, bytearray)):
+            file = getattr(file, "file", file)
+
+        original_size = len(file) if isinstance(file, (bytes, bytearray)) else upload_size(file)
+
+        # The first images are extracted before responding, so a PDF without
+        # images or a broken one is still a normal error response
+        body = await prime_chunks(_sync_extract_images(file, normalize))
 
         return {
             "response": StreamingResponse(
-                zip_output,
+                body,
                 media_type="application/zip",
-                headers={
-                    "Content-Disposition": "attachment; filename=extracted_images.zip"
-                }
+                headers={"Content-Disposition": "attachment; filename=extracted_images.zip"},
             ),
             "original_size": original_size,
-            "processing_time_ms": processing_time,
+            # Time to first image; the rest is extracted while the zip streams
+            "processing_time_ms": int((time.perf_counter() - start_time) * 1000),
         }
 
     except ValueError as ve:
         raise HTTPException(status_code=404, detail=str(ve))
     except Exception as e:
         logger.error(f"Async Wrapper Extraction Error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to extract images from PDF.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to extract images from PDF.")
@@ -0,0 +1,432 @@
+import hashlib
+import io
+import json
+import re
+import time
+import zlib
+
+import fitz
+from PIL import Image, ImageChops
+
+from app.core.logging import logger
+from app.core.worker_pool import imap_unordered
+
+
+# ─────────────────────────────────────────────
+# PARALLEL PDF IMAGE RECOMPRESSION
+# ─────────────────────────────────────────────
+# Four passes over the document:
+#   1. collect: every distinct image, with the first page that shows it. An
+#      xref reused on 300 pages is seen once, and different xrefs holding
+#      identical bytes (same stream + same dictionary, by sha256) are grouped
+#      under the first one
+#   2. decide: per image, from its filter, bit depth, effective DPI on the
+#      page and a predicted JPEG size (see plan_image); images that cannot
+#      shrink are never extracted
+#   3. recompress: the planned image streams are extracted lazily and encoded
+#      in the shared CPU process pool, a bounded window at a time; the worker
+#      picks the codec and drops results that are not smaller than the stream
+#      already stored
+#   4. apply: each result is written back with one replace_image call, which
+#      updates the xref for every page that references it; duplicate xrefs
+#      are then copied from it, and garbage=4 on save merges the copies into
+#      one object
+# PyMuPDF documents are not thread-safe, so only the calling thread touches
+# the document; the workers only ever see bytes.
+
+# Below this many images the pool round trip costs more than it saves
+PARALLEL_MIN_IMAGES = 4
+PROGRESS_LOG_STEP = 0.1
+SLOWEST_IMAGES_LOGGED = 3
+
+# Entries in the opt-in X-PDF-Image-Stats header, slowest first; keeps the
+# header well under common proxy limits
+STATS_HEADER_IMAGES = 32
+STATS_HEADER_FIELDS = ("xref", "page", "decision", "time_ms", "original_size", "new_size")
+
+# Bitonal codecs and 1-bit line art only grow when turned into JPEG
+BITONAL_FILTERS = {"JBIG2Decode", "CCITTFaxDecode"}
+JPEG_FILTERS = {"DCTDecode", "JPXDecode"}
+
+# Predicted JPEG bytes per pixel ~ a * quality + b (photographic content);
+# greyscale drops the chroma planes
+JPEG_BPP_SLOPE = 0.0025
+JPEG_BPP_OFFSET = -0.006
+JPEG_GRAY_FACTOR = 0.7
+
+# Only re-encode an image at its current size if the prediction is clearly smaller
+PREDICTED_GAIN = 0.8
+
+# Images with at most this many distinct colours (line art, charts, UI
+# screenshots) are kept lossless (Flate); JPEG rings around their edges
+LINE_ART_MAX_COLORS = 64
+
+_REFERENCE = re.compile(r"(\d+) \d+ R")
+
+
+def content_hash(doc, xref, memo, sizes) -> str:
+    """
+    sha256 of an object's dictionary and raw stream. References inside the
+    dictionary are replaced by the hash of the object they point to, so two
+    copies of an image whose colour spaces or masks were also copied (e.g.
+    merged documents) still match. Raw stream sizes are recorded in `sizes`.
+    """
+    if xref in memo:
+        return memo[xref]
+
+    memo[xref] = f"cycle:{xref}"
+
+    source = _REFERENCE.sub(
+        lambda match: content_hash(doc, int(match.group(1)), memo, sizes),
+        doc.xref_object(xref, compressed=True),
+    )
+
+    digest = hashlib.sha256(source.encode())
+    if doc.xref_is_stream(xref):
+        raw = doc.xref_stream_raw(xref)
+        sizes[xref] = len(raw)
+        digest.update(raw)
+
+    memo[xref] = digest.hexdigest()
+    return memo[xref]
+
+
+def collect_images(doc) -> dict:
+    """
+    Distinct images in page order: canonical xref -> {"page", "xrefs",
+    "references", "size", "width", "height", "bpc", "filter", "smask", "dpi"}.
+    `xrefs` lists the canonical xref followed by any byte-identical
+    duplicates; `references` counts page placements. `dpi` is the lowest
+    effective resolution over all placements (the largest one on paper), or
+    None when no placement has a measurable area.
+    """
+    images = {}
+    canonical_of = {}
+    by_content = {}
+    memo = {}
+    sizes = {}
+
+    for page_index in range(len(doc)):
+        page_images = doc.get_page_images(page_index, full=True)
+        if not page_images:
+            continue
+
+        for img in page_images:
+            xref, smask, width, height, bpc = img[:5]
+            canonical = canonical_of.get(xref)
+
+            if canonical is None:
+                digest = content_hash(doc, xref, memo, sizes)
+                canonical = canonical_of[xref] = by_content.setdefault(digest, xref)
+
+                if canonical == xref:
+                    images[xref] = {
+                        "page": page_index,
+                        "xrefs": [xref],
+                        "references": 0,
+                        "size": sizes.get(xref, 0),
+                        "width": width,
+                        "height": height,
+                        "bpc": bpc,
+                        "filter": img[8],
+                        "smask": smask,
+                        "dpi": None,
+                    }
+                else:
+                    images[canonical]["xrefs"].append(xref)
+
+            images[canonical]["references"] += 1
+
+        # Placement sizes need the page content parsed
+        for info in doc[page_index].get_image_info(xrefs=True):
+            image = images.get(canonical_of.get(info["xref"]))
+            bbox = fitz.Rect(info["bbox"])
+            if image is None or bbox.is_empty:
+                continue
+
+            dpi = min(info["width"] / bbox.width, info["height"] / bbox.height) * 72
+            if image["dpi"] is None or dpi < image["dpi"]:
+                image["dpi"] = dpi
+
+        # Measuring placements decodes the page's images into MuPDF's store;
+        # empty it per page so a large document never accumulates them
+        fitz.TOOLS.store_shrink(100)
+
+    return images
+
+
+def new_stats(images: dict = None) -> dict:
+    images = images or {}
+    references = sum(image["references"] for image in images.values())
+    xrefs = sum(len(image["xrefs"]) for image in images.values())
+
+    return {
+        "images": len(images),
+        "replaced": 0,
+        "skipped": 0,
+        "original_bytes": 0,
+        "new_bytes": 0,
+        "image_time_ms": 0,
+        "wall_time_ms": 0,
+        "decisions": {},
+        "dedupe": {
+            "page_references": references,
+            "unique_xrefs": xrefs,
+            "merged_xrefs": xrefs - len(images),
+            "bytes_saved": 0,
+            "time_saved_ms": 0,
+        },
+        "timings": [],
+    }
+
+
+def predict_jpeg_size(width: int, height: int, quality: int, gray=False) -> int:
+    bytes_per_pixel = max(JPEG_BPP_SLOPE * quality + JPEG_BPP_OFFSET, 0.02)
+    if gray:
+        bytes_per_pixel *= JPEG_GRAY_FACTOR
+    return int(width * height * bytes_per_pixel)
+
+
+def plan_image(image: dict, quality: int, scale=1.0, target_dpi=None, min_dpi=None, min_side=1):
+    """
+    Decision for one image: (plan, None) to recompress it, or (None, reason)
+    to keep the stored stream.
+
+    With `target_dpi` the image is scaled to that effective resolution on the
+    page; otherwise by `scale`, but not below `min_dpi`. Never upscales.
+    """
+    if image["filter"] in BITONAL_FILTERS or image["bpc"] == 1:
+        return None, "bitonal"
+
+    if image["bpc"] not in (2, 4, 8):
+        return None, "unsupported_depth"
+
+    dpi = image["dpi"]
+
+    if target_dpi is not None:
+        # Without a measurable placement, assume the 300 DPI baseline
+        scale = target_dpi / (dpi or 300.0)
+    elif min_dpi is not None and dpi:
+        scale = max(scale, min_dpi / dpi)
+
+    scale = min(scale, 1.0)
+
+    size = (
+        max(1, int(image["width"] * scale)),
+        max(1, int(image["height"] * scale)),
+    )
+
+    # Skip if already tiny or would become invisible
+    if size[0] < min_side or size[1] < min_side:
+        return None, "too_small"
+
+    # Same pixel count: only worth decoding if a JPEG is predicted to be clearly
+    # smaller (colour prediction; the worker may still find it is greyscale)
+    if size == (image["width"], image["height"]):
+        if predict_jpeg_size(*size, quality) >= image["size"] * PREDICTED_GAIN:
+            return None, "predicted_larger"
+
+    return {"size": size, "quality": quality, "limit": image["size"]}, None
+
+
+def _is_gray(image: Image.Image) -> bool:
+    if image.mode in ("1", "L", "LA", "I", "F"):
+        return True
+    if image.mode != "RGB":
+        return False
+
+    red, green, blue = image.split()
+    return (
+        ImageChops.difference(red, green).getbbox() is None
+        and ImageChops.difference(green, blue).getbbox() is None
+    )
+
+
+def _recompress_image(xref: int, image_bytes: bytes, plan: dict):
+    """
+    Pool worker: resize one image stream and encode it with the best codec:
+      - at most LINE_ART_MAX_COLORS colours (line art, charts): lossless Flate
+      - greyscale content: single-channel JPEG
+      - anything else: RGB JPEG
+    Returns (xref, new bytes or None, milliseconds, decision). The result is
+    None unless the new stream is smaller than plan["limit"].
+    """
+    start = time.perf_counter()
+
+    image = Image.open(io.BytesIO(image_bytes))
+
+    if image.mode not in ("1", "L", "RGB"):
+        image = image.convert("RGB")
+
+    # Counted before resampling, which adds in-between shades
+    line_art = image.getcolors(LINE_ART_MAX_COLORS) is not None
+
+    if tuple(plan["size"]) != image.size:
+        image = image.resize(plan["size"], Image.LANCZOS)
+
+    gray = _is_gray(image)
+    if gray:
+        image = image.convert("L")
+
+    if line_art:
+        decision = "flate"
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        # PyMuPDF stores the pixels re-deflated, not the PNG itself
+        stored_size = len(zlib.compress(image.tobytes()))
+    else:
+        decision = "jpeg_gray" if gray else "jpeg"
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=plan["quality"], optimize=True)
+        stored_size = buffer.tell()
+
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+
+    if stored_size >= plan["limit"]:
+        return xref, None, elapsed_ms, "not_smaller"
+
+    return xref, buffer.getvalue(), elapsed_ms, decision
+
+
+def recompress_images(
+    doc, quality: int, scale=1.0, target_dpi=None, min_dpi=None, min_side=1, progress=None
+) -> dict:
+    """
+    Recompresses every distinct image in `doc` in place, following
+    plan_image. `progress`, if given, is called as progress(done, total)
+    after each image. Returns stats with decisions and per-image timings.
+    """
+    start = time.perf_counter()
+    images = collect_images(doc)
+    total = len(images)
+
+    stats = new_stats(images)
+    dedupe = stats["dedupe"]
+    decisions = stats["decisions"]
+
+    if not total:
+        return stats
+
+    plans = {}
+    done = 0
+    next_log = PROGRESS_LOG_STEP
+
+    def advance():
+        nonlocal done, next_log
+        done += 1
+
+        if progress is not None:
+            progress(done, total)
+
+        if done / total >= next_log and total >= PARALLEL_MIN_IMAGES:
+            logger.info(f"PDF images: {done}/{total} processed")
+            while next_log <= done / total:
+                next_log += PROGRESS_LOG_STEP
+
+    for xref, image in images.items():
+        plan, reason = plan_image(image, quality, scale, target_dpi, min_dpi, min_side)
+        if plan is None:
+            decisions[reason] = decisions.get(reason, 0) + 1
+            stats["skipped"] += 1
+            stats["original_bytes"] += image["size"]
+            stats["new_bytes"] += image["size"]
+            advance()
+        else:
+            plans[xref] = plan
+
+    def jobs():
+        for xref, plan in plans.items():
+            yield xref, doc.extract_image(xref)["image"], plan
+
+    if len(plans) < PARALLEL_MIN_IMAGES:
+        results = (_recompress_image(*job) for job in jobs())
+    else:
+        results = imap_unordered(_recompress_image, jobs())
+
+    for xref, new_bytes, elapsed_ms, decision in results:
+        image = images[xref]
+        original_size = image["size"]
+        decisions[decision] = decisions.get(decision, 0) + 1
+
+        if new_bytes is None:
+            stats["skipped"] += 1
+            new_size = original_size
+        else:
+            doc[image["page"]].replace_image(xref, stream=new_bytes)
+
+            # replace_image drops the soft mask; the original one still fits
+            if image["smask"]:
+                doc.xref_set_key(xref, "SMask", f"{image['smask']} 0 R")
+
+            # Duplicates become copies of the new stream; save(garbage=4) merges them
+            for duplicate in image["xrefs"][1:]:
+                doc.xref_copy(xref, duplicate)
+
+            stats["replaced"] += 1
+            new_size = len(new_bytes)
+
+        stats["original_bytes"] += original_size
+        stats["new_bytes"] += new_size
+        stats["image_time_ms"] += elapsed_ms
+
+        # Work the per-placement loop would have repeated, and duplicate
+        # streams that are no longer stored
+        dedupe["time_saved_ms"] += elapsed_ms * (image["references"] - 1)
+        dedupe["bytes_saved"] += image["size"] * (len(image["xrefs"]) - 1)
+
+        stats["timings"].append({
+            "xref": xref,
+            "page": image["page"] + 1,
+            "references": image["references"],
+            "duplicates": len(image["xrefs"]) - 1,
+            "decision": decision,
+            "time_ms": elapsed_ms,
+            "original_size": original_size,
+            "new_size": new_size,
+        })
+
+        advance()
+
+    stats["wall_time_ms"] = int((time.perf_counter() - start) * 1000)
+
+    slowest = sorted(stats["timings"], key=lambda t: t["time_ms"], reverse=True)
+    slowest = ", ".join(
+        f"xref {t['xref']} (page {t['page']}) {t['time_ms']}ms"
+        for t in slowest[:SLOWEST_IMAGES_LOGGED]
+    )
+    logger.info(
+        f"PDF images: {stats['replaced']} replaced, {stats['skipped']} skipped of {total} "
+        f"in {stats['wall_time_ms']}ms ({stats['image_time_ms']}ms encode time); "
+        f"decisions: {decisions}; slowest: {slowest}"
+    )
+    logger.info(
+        f"PDF images: {dedupe['page_references']} placements, {dedupe['unique_xrefs']} xrefs, "
+        f"{total} distinct; saved {dedupe['bytes_saved']} bytes, ~{dedupe['time_saved_ms']}ms"
+    )
+
+    return stats
+
+
+def stats_headers(stats: dict, per_image=False) -> dict:
+    """
+    Summary of recompression stats as response headers. per_image adds
+    X-PDF-Image-Stats, a compact JSON list of the STATS_HEADER_IMAGES
+    slowest images (codec decision, timing and sizes).
+    """
+    headers = {
+        "X-PDF-Images": str(stats["images"]),
+        "X-PDF-Images-Replaced": str(stats["replaced"]),
+        "X-PDF-Image-Time-Ms": str(stats["image_time_ms"]),
+        "X-PDF-Images-Merged": str(stats["dedupe"]["merged_xrefs"]),
+        "X-PDF-Dedupe-Bytes-Saved": str(stats["dedupe"]["bytes_saved"]),
+        "X-PDF-Dedupe-Time-Saved-Ms": str(stats["dedupe"]["time_saved_ms"]),
+    }
+
+    if per_image:
+        slowest = sorted(stats["timings"], key=lambda t: t["time_ms"], reverse=True)
+        headers["X-PDF-Image-Stats"] = json.dumps(
+            [{field: t[field] for field in STATS_HEADER_FIELDS} for t in slowest[:STATS_HEADER_IMAGES]],
+            separators=(",", ":"),
+        )
+
+    return headers
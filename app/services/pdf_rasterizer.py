@@ -0,0 +1,154 @@
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+import fitz
+
+from app.core.config import CPU_WORKERS
+from app.core.worker_pool import imap
+
+
+# ─────────────────────────────────────────────
+# PARALLEL PDF RASTERIZATION
+# ─────────────────────────────────────────────
+# The selected pages are split into small ranges rendered in the shared CPU
+# process pool. Workers get the path of the spooled PDF, not its bytes, and
+# open the document themselves. It stays open for the next range of the same
+# file, and is closed after DOCUMENT_IDLE_SECONDS without use, so a worker
+# that gets no more PDF work does not pin the deleted spool file. Results
+# come back in page order with at most RENDER_WINDOW ranges in flight, so
+# memory holds a handful of rendered pages whatever the page count.
+
+DEFAULT_DPI = 144  # the former fixed 2x zoom
+MIN_DPI = 36
+MAX_DPI = 600
+
+# A page is rendered at a lower DPI rather than beyond this many pixels
+MAX_RENDER_PIXELS = 40_000_000
+
+PAGES_PER_TASK = 2
+RENDER_WINDOW = CPU_WORKERS + 2
+
+# Below this many pages the pool round trip costs more than it saves
+PARALLEL_MIN_PAGES = 4
+
+FORMATS = {"png": "png", "jpg": "jpg", "jpeg": "jpg"}
+
+# Per worker process: (file identity, document) of the last PDF opened
+_open_document = None
+_document_lock = threading.Lock()
+_close_timer = None
+
+DOCUMENT_IDLE_SECONDS = 5
+
+
+def parse_page_range(spec, page_count: int) -> list:
+    """
+    0-based page indexes for a 1-based spec like "1-3,7,10-". None or "" is
+    every page. Raises ValueError for malformed or out-of-range specs.
+    """
+    if not spec:
+        return list(range(page_count))
+
+    pages = []
+
+    for part in spec.replace(" ", "").split(","):
+        first, dash, last = part.partition("-")
+
+        try:
+            start = int(first) if first else 1
+            stop = (int(last) if last else page_count) if dash else start
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part}")
+
+        if start > stop:
+            raise ValueError(f"Invalid page range: {part}")
+
+        if start < 1 or stop > page_count:
+            raise ValueError(f"Page range {part} is outside 1-{page_count}")
+
+        pages.extend(range(start - 1, stop))
+
+    return pages
+
+
+def page_count(input_path: str) -> int:
+    with fitz.open(input_path, filetype="pdf") as doc:
+        return len(doc)
+
+
+def _close_document():
+    global _open_document
+
+    with _document_lock:
+        if _open_document is not None:
+            _open_document[1].close()
+            _open_document = None
+
+
+@contextmanager
+def worker_document(input_path: str):
+    """Pool workers: the PDF at input_path, kept open for the next task on it."""
+    global _open_document, _close_timer
+
+    with _document_lock:
+        if _close_timer is not None:
+            _close_timer.cancel()
+
+        # Temp paths get reused, so the file itself identifies the document
+        stat = os.stat(input_path)
+        identity = (input_path, stat.st_ino, stat.st_mtime_ns)
+
+        if _open_document is None or _open_document[0] != identity:
+            if _open_document is not None:
+                _open_document[1].close()
+            _open_document = (identity, fitz.open(input_path, filetype="pdf"))
+
+        try:
+            yield _open_document[1]
+        finally:
+            _close_timer = threading.Timer(DOCUMENT_IDLE_SECONDS, _close_document)
+            _close_timer.daemon = True
+            _close_timer.start()
+
+
+def _render_range(doc, page_numbers, dpi: int, fmt: str):
+    rendered = []
+
+    for number in page_numbers:
+        page = doc[number]
+        zoom = dpi / 72
+
+        pixels = page.rect.width * page.rect.height * zoom * zoom
+        if pixels > MAX_RENDER_PIXELS:
+            zoom *= math.sqrt(MAX_RENDER_PIXELS / pixels)
+
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        rendered.append((number, pix.tobytes(fmt)))
+
+    # Drop the range's decoded images from MuPDF's cache
+    fitz.TOOLS.store_shrink(100)
+    return rendered
+
+
+def _render_pages(input_path: str, page_numbers, dpi: int, fmt: str):
+    """Pool worker: [(page index, encoded image bytes)] for a range of pages."""
+    with worker_document(input_path) as doc:
+        return _render_range(doc, page_numbers, dpi, fmt)
+
+
+def render_pages(input_path: str, pages: list, dpi=DEFAULT_DPI, fmt="png"):
+    """Yields (page index, encoded image bytes) in the order of `pages`."""
+    if len(pages) < PARALLEL_MIN_PAGES:
+        with fitz.open(input_path, filetype="pdf") as doc:
+            yield from _render_range(doc, pages, dpi, fmt)
+        return
+
+    ranges = (
+        (input_path, pages[i:i + PAGES_PER_TASK], dpi, fmt)
+        for i in range(0, len(pages), PAGES_PER_TASK)
+    )
+
+    for rendered in imap(_render_pages, ranges, window=RENDER_WINDOW):
+        yield from rendered
@@ -1,7 +1,7 @@
 import io
+import math
 import os
 import tempfile
-import asyncio
 import time
 
 from PIL import Image
@@ -10,7 +10,10 @@ from starlette.concurrency import run_in_threadpool
 from fastapi import HTTPException, BackgroundTasks
 
 from app.core.logging import logger
+from app.core.ffmpeg_scheduler import ffmpeg_slot, run_ffmpeg, stream_ffmpeg
 from app.utils.profiler import profile_performance
+from app.utils.image_loader import open_for_target_size
+from app.utils.upload_buffer import upload_size, pipe_readable_video
 
 # Constants
 MAX_DURATION = 6
@@ -18,9 +21,6 @@ STICKER_SIZE = 512
 TARGET_SIZE = 512 * 1024
 MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB Safety Limit
 
-# Concurrency limiting for CPU-heavy FFmpeg tasks
-FFMPEG_SEMAPHORE = asyncio.Semaphore(2)
-
 QUALITY_PRESETS = {
     "hd": [
         (15, 80, 512),
@@ -43,7 +43,9 @@ QUALITY_PRESETS = {
 }
 
 
-async def run_ffmpeg_async(input_path, output_path, fps, quality, scale, start_time, duration, reverse):
+async def run_ffmpeg_async(
+    input_path, output_path, fps, quality, scale, start_time, duration, reverse, request=None
+):
     filters = (
         f"fps={fps},"
         f"scale={scale}:{scale}:force_original_aspect_ratio=decrease,"
@@ -69,20 +71,11 @@ async def run_ffmpeg_async(input_path, output_path, fps, quality, scale, start_t
         output_path
     ]
 
-    # Run natively in the async event loop without blocking threads
-    process = await asyncio.create_subprocess_exec(
-        *command,
-        stdout=asyncio.subprocess.DEVNULL,
-        stderr=asyncio.subprocess.PIPE
-    )
-    
-    _, stderr = await process.communicate()
-    
-    if process.returncode != 0:
-        raise Exception(f"FFmpeg failed: {stderr.decode()}")
+    await run_ffmpeg(command, request)
 
 
-async def adaptive_sticker_encode_async(input_path, start_time, duration, quality, reverse, file_size):
+def sticker_attempts(quality, file_size, duration):
+    """(fps, quality, scale) ladder tried in order until the sticker fits."""
     attempts = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["medium"])
 
     # Early-exit heuristic: Skip high-quality attempts if the source file is massive
@@ -95,6 +88,14 @@ async def adaptive_sticker_encode_async(input_path, start_time, duration, qualit
     if duration < 2:
         attempts = attempts[:1]
 
+    return attempts
+
+
+async def adaptive_sticker_encode_async(
+    input_path, start_time, duration, quality, reverse, file_size, request=None
+):
+    attempts = sticker_attempts(quality, file_size, duration)
+
     best_output = None
     best_size = float("inf")
 
@@ -111,7 +112,8 @@ async def adaptive_sticker_encode_async(input_path, start_time, duration, qualit
                 scale,
                 start_time,
                 duration,
-                reverse
+                reverse,
+                request
             )
 
             size = os.path.getsize(output_path)
@@ -147,7 +149,8 @@ async def process_video_to_sticker_async(
     start_time: float,
     end_time: float,
     quality: str,
-    reverse: bool
+    reverse: bool,
+    request=None
 ):
     start_process = time.perf_counter()
     duration = min(end_time - start_time, MAX_DURATION)
@@ -158,13 +161,90 @@ async def process_video_to_sticker_async(
         duration,
         quality,
         reverse,
-        file_size
+        file_size,
+        request
     )
 
     processing_time_ms = int((time.perf_counter() - start_process) * 1000)
 
     return output_path, file_size, processing_time_ms
 
+# Pipe mode (stream=true): upload on ffmpeg stdin, sticker from stdout, no
+# temp files. libwebp_anim writes the whole file at the end, so unlike the
+# GIF pipe this saves disk I/O rather than time to first byte, and the
+# output can be collected and checked before anything is sent. Pipe mode is
+# a single attempt with the first step of the file path's ladder; when it
+# comes out over TARGET_SIZE the request falls back to the full ladder.
+async def _stream_video_to_sticker(file, fps, quality_value, scale, start_time, duration, reverse, request):
+    filters = (
+        f"fps={fps},"
+        f"scale={scale}:{scale}:force_original_aspect_ratio=decrease,"
+        f"pad={STICKER_SIZE}:{STICKER_SIZE}:(ow-iw)/2:(oh-ih)/2:color=0x00000000"
+    )
+
+    if reverse:
+        filters += ",reverse"
+
+    command = [
+        "ffmpeg",
+        "-loglevel", "error",
+        "-ss", str(start_time),
+        "-t", str(duration),
+        "-i", "pipe:0",
+        "-vf", filters,
+        "-an",
+        "-vcodec", "libwebp_anim",
+        "-preset", "picture",
+        "-qscale", str(quality_value),
+        "-loop", "0",
+        "-f", "webp",
+        "pipe:1"
+    ]
+
+    async with ffmpeg_slot(duration):
+        async for chunk in stream_ffmpeg(command, file, request):
+            yield chunk
+
+
+async def _video_to_sticker_stream_response(
+    file, start_time, end_time, quality, reverse, request
+):
+    """The piped sticker response, or None if it exceeds TARGET_SIZE."""
+    start = time.perf_counter()
+    file_size = upload_size(file.file)
+
+    if file_size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="Video file too large (max 20MB)")
+
+    duration = min(end_time - start_time, MAX_DURATION)
+    fps, quality_value, scale = sticker_attempts(quality, file_size, duration)[0]
+
+    chunks = []
+    async for chunk in _stream_video_to_sticker(
+        file, fps, quality_value, scale, start_time, duration, reverse, request
+    ):
+        chunks.append(chunk)
+    data = b"".join(chunks)
+
+    if len(data) > TARGET_SIZE:
+        logger.info(f"Piped sticker is {len(data)} bytes, retrying with the size ladder")
+        return None
+
+    filename_base = os.path.splitext(file.filename)[0]
+
+    return {
+        "response": StreamingResponse(
+            io.BytesIO(data),
+            media_type="image/webp",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename_base}.webp"
+            }
+        ),
+        "original_size": file_size,
+        "processing_time_ms": int((time.perf_counter() - start) * 1000)
+    }
+
+
 @profile_performance
 async def video_to_sticker_service(
     file,
@@ -172,12 +252,22 @@ async def video_to_sticker_service(
     start_time: float,
     end_time: float,
     quality: str,
-    reverse: bool
+    reverse: bool,
+    request=None,
+    stream: bool = False
 ):
     input_path = None
     output_path = None
 
     try:
+        if stream:
+            if not pipe_readable_video(file.file):
+                logger.info("Video needs seeking (moov at end), using temp file path")
+            elif result := await _video_to_sticker_stream_response(
+                file, start_time, end_time, quality, reverse, request
+            ):
+                return result
+
         await file.seek(0)
         file_size = 0
         
@@ -191,8 +281,8 @@ async def video_to_sticker_service(
                 tmp.write(chunk)
             input_path = tmp.name
 
-        # Native async concurrency limit (no threadpool needed anymore!)
-        async with FFMPEG_SEMAPHORE:
+        # One global ffmpeg slot; shorter clips are scheduled first
+        async with ffmpeg_slot(min(end_time - start_time, MAX_DURATION)):
             output_path, original_size, processing_time_ms = await process_video_to_sticker_async(
                 input_path,
                 file_size,
@@ -200,7 +290,8 @@ async def video_to_sticker_service(
                 start_time,
                 end_time,
                 quality,
-                reverse
+                reverse,
+                request
             )
 
         filename_base = os.path.splitext(file.filename)[0]
@@ -238,23 +329,190 @@ async def video_to_sticker_service(
             os.remove(input_path)
 
 
+def _fit_to_sticker(img):
+    """Scales an image (or animation frame) into the centred 512x512 transparent canvas."""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    else:
+        img = img.copy()
+
+    img.thumbnail((STICKER_SIZE, STICKER_SIZE), Image.BILINEAR)
+
+    canvas = Image.new("RGBA", (STICKER_SIZE, STICKER_SIZE), (0, 0, 0, 0))
+
+    x = (STICKER_SIZE - img.width) // 2
+    y = (STICKER_SIZE - img.height) // 2
+    canvas.paste(img, (x, y), img)
+
+    return canvas
+
+
+# ─────────────────────────────────────────────
+# ANIMATED IMAGE → STICKER (no ffmpeg)
+# ─────────────────────────────────────────────
+# Animated GIF / APNG / WebP inputs are re-encoded in process with Pillow's
+# WebP save_all. Frames are decoded and fitted lazily, but Pillow collects
+# append_images before encoding, so at most MAX_ANIMATED_FRAMES are kept.
+# The quality is predicted from a short sample run encoded at two qualities
+# (WebP size is close to exponential in quality), so the full animation is
+# normally encoded once; one corrected encode follows only on a miss. If
+# that is still over TARGET_SIZE, frames are halved until it fits.
+ANIMATED_QUALITY_MAX = 80
+ANIMATED_QUALITY_MIN = 30
+SAMPLE_QUALITY_LOW = 50
+SAMPLE_FRAMES = 8
+MAX_FRAME_STEP = 4
+MAX_ANIMATED_FRAMES = 60
+ANIMATED_METHOD = 4
+DEFAULT_FRAME_DELAY = 100
+
+
+def _frame_plan(img):
+    """[frame index, delay ms] for the frames within MAX_DURATION."""
+    plan = []
+    elapsed = 0
+
+    for index in range(img.n_frames):
+        if elapsed >= MAX_DURATION * 1000:
+            break
+        img.seek(index)
+        delay = img.info.get("duration") or DEFAULT_FRAME_DELAY
+        plan.append([index, delay])
+        elapsed += delay
+
+    return plan
+
+
+def _decimate(plan, step):
+    """Keeps every step-th frame; dropped frames extend the kept one's delay."""
+    kept = []
+    for position, (index, delay) in enumerate(plan):
+        if position % step == 0:
+            kept.append([index, delay])
+        else:
+            kept[-1][1] += delay
+    return kept
+
+
+def _open_animation(file_obj):
+    # Every pass reopens the source and only seeks forward: Pillow's APNG
+    # reader cannot reliably seek back
+    file_obj.seek(0)
+    return Image.open(file_obj)
+
+
+def _fitted_frames(file_obj, plan):
+    img = _open_animation(file_obj)
+    for index, _ in plan:
+        img.seek(index)
+        yield _fit_to_sticker(img)
+
+
+def _encode_animation(file_obj, plan, quality):
+    """Encodes the planned frames as an animated WebP at one quality."""
+    frames = _fitted_frames(file_obj, plan)
+    buffer = io.BytesIO()
+
+    next(frames).save(
+        buffer,
+        format="WEBP",
+        save_all=True,
+        append_images=frames,
+        duration=[delay for _, delay in plan],
+        loop=0,
+        background=(0, 0, 0, 0),
+        quality=quality,
+        method=ANIMATED_METHOD,
+    )
+
+    return buffer.getvalue()
+
+
+def _quality_for(size_at_max, slope, target):
+    """Quality predicted to land on target, from size at ANIMATED_QUALITY_MAX."""
+    if size_at_max <= target:
+        return ANIMATED_QUALITY_MAX
+    return ANIMATED_QUALITY_MAX - math.log(size_at_max / target) / slope
+
+
+def _sync_animated_to_sticker(file_obj, file_size: int, start_time: float):
+    target = TARGET_SIZE * 0.95
+    plan = _frame_plan(_open_animation(file_obj))
+
+    # Contiguous run from the middle: keeps inter-frame compression realistic
+    first = max(0, (len(plan) - SAMPLE_FRAMES) // 2)
+    sample = plan[first:first + SAMPLE_FRAMES]
+    scale = sum(delay for _, delay in plan) / sum(delay for _, delay in sample)
+
+    sample_high = _encode_animation(file_obj, sample, ANIMATED_QUALITY_MAX)
+    sample_low = _encode_animation(file_obj, sample, SAMPLE_QUALITY_LOW)
+    size_high = len(sample_high) * scale
+    size_low = len(sample_low) * scale
+    slope = max(math.log(size_high / size_low) / (ANIMATED_QUALITY_MAX - SAMPLE_QUALITY_LOW), 0.005)
+
+    # Long or high frame rate animations are thinned to the frame cap
+    step = 1
+    while len(plan) > step * MAX_ANIMATED_FRAMES:
+        step *= 2
+
+    # Below the quality floor, drop frames first (size roughly follows frame count)
+    quality = _quality_for(size_high / step, slope, target)
+    while quality < ANIMATED_QUALITY_MIN and step < MAX_FRAME_STEP and len(plan) > step:
+        step *= 2
+        quality = _quality_for(size_high / step, slope, target)
+
+    plan = _decimate(plan, step)
+    quality = int(max(quality, ANIMATED_QUALITY_MIN))
+
+    if len(sample) == len(plan) and quality == ANIMATED_QUALITY_MAX:
+        # Short animation: the sample already was the full encode
+        data = sample_high
+    else:
+        data = _encode_animation(file_obj, plan, quality)
+
+    if len(data) > TARGET_SIZE and quality > ANIMATED_QUALITY_MIN:
+        corrected = quality - math.log(len(data) / target) / slope
+        corrected = int(max(corrected, ANIMATED_QUALITY_MIN))
+        logger.info(f"Animated sticker {len(data)} bytes at q{quality}, retrying at q{corrected}")
+
+        retry = _encode_animation(file_obj, plan, corrected)
+        if len(retry) < len(data):
+            data, quality = retry, corrected
+
+    # Still too big: halve the frames, re-predicting the quality from the last encode
+    while len(data) > TARGET_SIZE and len(plan) > 1:
+        step *= 2
+        plan = _decimate(plan, 2)
+        quality = int(max(quality - math.log(len(data) / 2 / target) / slope, ANIMATED_QUALITY_MIN))
+        quality = min(quality, ANIMATED_QUALITY_MAX)
+        data = _encode_animation(file_obj, plan, quality)
+
+    if len(data) > TARGET_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail="Animation cannot be compressed under the 512KB sticker limit."
+        )
+
+    logger.info(
+        f"Animated sticker: {len(plan)} frames (step {step}), q{quality}, {len(data)} bytes"
+    )
+
+    processing_time_ms = int((time.perf_counter() - start_time) * 1000)
+    return io.BytesIO(data), file_size, processing_time_ms
+
+
 def _sync_image_to_sticker(file_obj, file_size: int):
     start_time = time.perf_counter()
 
     try:
         # Pass FastAPI's SpooledTemporaryFile directly to Pillow (Zero-copy RAM)
-        img = Image.open(file_obj)
-        
-        if img.mode != "RGBA":
-            img = img.convert("RGBA")
-
-        img.thumbnail((STICKER_SIZE, STICKER_SIZE), Image.BILINEAR)
+        # JPEGs decode at reduced scale, the sticker is only 512px
+        img = open_for_target_size(file_obj, STICKER_SIZE)
 
-        canvas = Image.new("RGBA", (STICKER_SIZE, STICKER_SIZE), (0, 0, 0, 0))
+        if getattr(img, "is_animated", False):
+            return _sync_animated_to_sticker(file_obj, file_size, start_time)
 
-        x = (STICKER_SIZE - img.width) // 2
-        y = (STICKER_SIZE - img.height) // 2
-        canvas.paste(img, (x, y), img)
+        canvas = _fit_to_sticker(img)
 
         output_buffer = io.BytesIO()
 
@@ -284,9 +542,8 @@ async def image_to_sticker_service(file):
         # 1. Reset pointer just in case
         await file.seek(0)
         
-        # 2. Read the bytes directly
-        image_bytes = await file.read()
-        file_size = len(image_bytes)
+        # 2. Size from the spool; Pillow reads the file handle itself
+        file_size = upload_size(file.file)
         
         if file_size > MAX_FILE_SIZE:
             raise HTTPException(status_code=400, detail="Image file too large (max 20MB)")
@@ -45,10 +45,11 @@ def _calculate_position(base_size, wm_size, pos_name, margin=20):
 # ─────────────────────────────────────────────────────────────
 # CORE PROCESSOR (optimized)
 # ─────────────────────────────────────────────────────────────
-def _sync_watermark(base_bytes, wm_type, wm_bytes=None, **kwargs):
+def _sync_watermark(base_file, wm_type, wm_file=None, **kwargs):
     start = time.perf_counter()
 
-    with Image.open(io.BytesIO(base_bytes)) as base_img:
+    base_file.seek(0)
+    with Image.open(base_file) as base_img:
         # Avoid unnecessary conversion
         base = base_img if base_img.mode == "RGBA" else base_img.convert("RGBA")
 
@@ -103,7 +104,8 @@ def _sync_watermark(base_bytes, wm_type, wm_bytes=None, **kwargs):
 
         # ───────── IMAGE WATERMARK ─────────
         else:
-            with Image.open(io.BytesIO(wm_bytes)) as wm_img:
+            wm_file.seek(0)
+            with Image.open(wm_file) as wm_img:
                 wm = wm_img if wm_img.mode == "RGBA" else wm_img.convert("RGBA")
 
                 scale = kwargs.get("scale", 0.3)
@@ -175,14 +177,14 @@ def _sync_watermark(base_bytes, wm_type, wm_bytes=None, **kwargs):
 # ─────────────────────────────────────────────────────────────
 async def watermark_service(file, watermark_type, disposition="inline", watermark_file=None, **kwargs):
 
-    base_bytes = await file.read()
-    wm_bytes = await watermark_file.read() if watermark_file else None
+    # Spooled uploads go straight to Pillow, no extra copies
+    wm_file = watermark_file.file if watermark_file else None
 
     buffer, proc_time = await run_in_threadpool(
         _sync_watermark,
-        base_bytes,
+        file.file,
         watermark_type,
-        wm_bytes,
+        wm_file,
         **kwargs
     )
 
@@ -1,6 +1,6 @@
 from fastapi import UploadFile, HTTPException
 from app.core.config import MAX_FILE_SIZE, ALLOWED_EXTENSIONS, MAX_FILE_SIZE_VIDEO
-import io
+from app.utils.upload_buffer import upload_size
 from PIL import Image
 from fastapi import UploadFile, HTTPException
 from pillow_heif import register_heif_opener
@@ -29,15 +29,15 @@ ALLOWED_FORMATS_MAP = {
     "gif": "GIF",
     "avif": "AVIF",
 }
-async def validate_file_size(file: UploadFile):
-    contents = await file.read()
-    if len(contents) > MAX_FILE_SIZE:
+async def validate_file_size(file: UploadFile, max_size=MAX_FILE_SIZE):
+    # Size comes from the spooled upload; the content is never read here
+    size = file.size if file.size is not None else upload_size(file.file)
+    if size > max_size:
         raise HTTPException(status_code=413, detail="File too large")
     await file.seek(0)
 
 async def validate_file_size_video(file: UploadFile):
-    file.file.seek(0, 2)  # move to end
-    size = file.file.tell()
+    size = upload_size(file.file)
 
     if size > MAX_FILE_SIZE_VIDEO:
         raise HTTPException(
@@ -72,14 +72,11 @@ async def validate_real_image(file: UploadFile):
     try:
         await file.seek(0)
 
-        # Read minimal bytes (efficient)
-        content = await file.read()
-
-        if not content:
+        if upload_size(file.file) == 0:
             raise HTTPException(status_code=400, detail="Empty file uploaded.")
 
-        # Use BytesIO (safe + consistent)
-        img = Image.open(io.BytesIO(content))
+        # Pillow only parses the header from the spooled file (no copy)
+        img = Image.open(file.file)
 
         real_format = (img.format or "").upper()
         if not real_format:
@@ -115,8 +112,8 @@ async def validate_real_image(file: UploadFile):
                 detail=f"Fake file detected. Extension is {ext.upper()}, but actual format is {real_format}."
             )
 
-        # Lightweight validation (faster than verify())
-        img.close()
+        # Lightweight validation (faster than verify()).
+        # img.close() would also close the spooled upload, so it is left to GC.
 
         return True
 
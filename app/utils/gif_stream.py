@@ -0,0 +1,196 @@
+import numpy as np
+from PIL import Image, ImageSequence, GifImagePlugin
+
+
+# ─────────────────────────────────────────────
+# STREAMING ANIMATED GIF WRITER
+# ─────────────────────────────────────────────
+# Pillow's save_all keeps every frame in memory and quantizes each one
+# separately. Here frames are written as they arrive:
+#   - one global palette (255 colours sampled across the animation), plus
+#     index 255 reserved for transparency
+#   - each frame is cropped to the region that changed since the previous
+#     one, and unchanged pixels inside the crop are written as transparent
+#     so they keep the previous frame's colour (and compress to runs)
+#   - identical frames are merged into the previous frame's delay
+# At most two full frames are held: the one waiting to be written and the
+# one being compared against it.
+
+TRANSPARENT_INDEX = 255
+PALETTE_COLORS = 255
+PALETTE_SAMPLE_FRAMES = 32
+PALETTE_SAMPLE_SIZE = 128
+ALPHA_THRESHOLD = 128
+DEFAULT_DURATION = 100
+
+# GIF disposal methods
+DISPOSE_NONE = 1
+DISPOSE_BACKGROUND = 2
+
+
+def _rgba_array(frame: Image.Image) -> np.ndarray:
+    """Full-canvas RGBA with binary alpha; transparent pixels are all zero."""
+    rgba = np.array(frame.convert("RGBA"))
+    transparent = rgba[..., 3] < ALPHA_THRESHOLD
+    rgba[..., 3] = 255
+    rgba[transparent] = 0
+    return rgba
+
+
+def _bbox(mask: np.ndarray):
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _union(a, b):
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def build_palette(image: Image.Image) -> bytes:
+    """Global 256-entry palette from a sample of downscaled frames."""
+    n_frames = getattr(image, "n_frames", 1)
+    step = max(1, -(-n_frames // PALETTE_SAMPLE_FRAMES))
+    samples = []
+
+    for index in range(0, n_frames, step):
+        image.seek(index)
+        frame = image.convert("RGBA")
+        frame.thumbnail((PALETTE_SAMPLE_SIZE, PALETTE_SAMPLE_SIZE))
+        pixels = np.asarray(frame).reshape(-1, 4)
+        samples.append(pixels[pixels[:, 3] >= ALPHA_THRESHOLD, :3])
+
+    image.seek(0)
+
+    pixels = np.concatenate(samples)
+    if not len(pixels):
+        pixels = np.zeros((1, 3), dtype=np.uint8)
+
+    mosaic = Image.fromarray(np.ascontiguousarray(pixels).reshape(-1, 1, 3))
+    palette = mosaic.quantize(PALETTE_COLORS, method=Image.Quantize.MEDIANCUT).getpalette()
+    palette = palette[:PALETTE_COLORS * 3]
+
+    # Unused entries (and the transparency slot) repeat colour 0
+    return bytes(palette + palette[:3] * (256 - len(palette) // 3))
+
+
+class _Frame:
+    __slots__ = ("rgba", "image", "box", "duration", "disposal")
+
+    def __init__(self, rgba, image, box, duration):
+        self.rgba = rgba
+        self.image = image
+        self.box = box
+        self.duration = duration
+        self.disposal = DISPOSE_NONE
+
+
+class AnimatedGifWriter:
+    """
+    Writes an animated GIF to fp frame by frame. Frames must all be the
+    canvas size; add_frame() takes the delay in milliseconds.
+    """
+
+    def __init__(self, fp, size, palette: bytes, loop=0):
+        self.fp = fp
+        self.size = size
+        self._canvas = (0, 0) + tuple(size)
+        self._pending = None
+
+        self._palette_image = Image.new("P", (1, 1))
+        self._palette_image.putpalette(palette)
+
+        width, height = size
+        fp.write(
+            b"GIF89a"
+            + width.to_bytes(2, "little")
+            + height.to_bytes(2, "little")
+            + bytes((0xF7, TRANSPARENT_INDEX, 0))  # 256-colour global table
+            + palette
+            # NETSCAPE2.0 looping extension
+            + b"!\xff\x0bNETSCAPE2.0\x03\x01" + loop.to_bytes(2, "little") + b"\x00"
+        )
+
+    def _encode(self, rgba, box, unchanged=None) -> Image.Image:
+        x0, y0, x1, y1 = box
+        crop = rgba[y0:y1, x0:x1]
+
+        rgb = Image.fromarray(np.ascontiguousarray(crop[..., :3]))
+        indices = np.array(rgb.quantize(palette=self._palette_image, dither=Image.Dither.FLOYDSTEINBERG))
+
+        indices[indices == TRANSPARENT_INDEX] = 0
+        indices[crop[..., 3] == 0] = TRANSPARENT_INDEX
+        if unchanged is not None:
+            indices[unchanged[y0:y1, x0:x1]] = TRANSPARENT_INDEX
+
+        image = Image.frombytes("P", (x1 - x0, y1 - y0), indices.tobytes())
+        image.putpalette(self._palette_image.getpalette())
+        return image
+
+    def _write(self, frame: _Frame):
+        self.fp.write(b"".join(GifImagePlugin.getdata(
+            frame.image,
+            offset=frame.box[:2],
+            duration=frame.duration,
+            disposal=frame.disposal,
+            transparency=TRANSPARENT_INDEX,
+        )))
+
+    def add_frame(self, frame: Image.Image, duration=DEFAULT_DURATION):
+        rgba = _rgba_array(frame)
+        pending = self._pending
+
+        if pending is None:
+            self._pending = _Frame(rgba, self._encode(rgba, self._canvas), self._canvas, duration)
+            return
+
+        reference = pending.rgba
+        changed = np.any(rgba != reference, axis=2)
+
+        if not changed.any():
+            pending.duration += duration
+            return
+
+        # Pixels turning transparent cannot be drawn over: the pending frame
+        # is written in full over their area and disposed to background
+        to_clear = (reference[..., 3] != 0) & (rgba[..., 3] == 0)
+
+        if to_clear.any():
+            pending.box = _union(pending.box, _bbox(to_clear))
+            pending.image = self._encode(reference, pending.box)
+            pending.disposal = DISPOSE_BACKGROUND
+
+            x0, y0, x1, y1 = pending.box
+            reference[y0:y1, x0:x1] = 0
+            changed = np.any(rgba != reference, axis=2)
+
+        self._write(pending)
+        self._pending = None
+
+        if not changed.any():
+            # Only transparency changed, and disposal already handled it
+            box = (0, 0, 1, 1)
+        else:
+            box = _bbox(changed)
+
+        self._pending = _Frame(rgba, self._encode(rgba, box, ~changed), box, duration)
+
+    def close(self):
+        if self._pending is not None:
+            self._write(self._pending)
+            self._pending = None
+
+        self.fp.write(b";")
+
+
+def write_animated_gif(image: Image.Image, fp, duration=None, loop=0):
+    """
+    Streams every frame of a (possibly single-frame) Pillow image to fp as a
+    GIF. `duration` overrides the per-frame delays stored in the source.
+    """
+    writer = AnimatedGifWriter(fp, image.size, build_palette(image), loop=loop)
+
+    for frame in ImageSequence.Iterator(image):
+        writer.add_frame(frame, duration or frame.info.get("duration") or DEFAULT_DURATION)
+
+    writer.close()
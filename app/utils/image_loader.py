@@ -0,0 +1,35 @@
+import math
+from PIL import Image
+
+# EXIF orientations that swap width and height on display
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def open_for_target_size(source, size, cover=False):
+    """
+    Open an image that will be downscaled to `size` (longest side as int, or a
+    (width, height) box) and let JPEG/MPO decode straight at 1/2, 1/4 or 1/8
+    scale through Image.draft. The draft never goes below the final output
+    size, so callers still resize as before. Other formats are left untouched.
+
+    cover=True sizes the draft for a fill/crop (ImageOps.fit) instead of a fit.
+    """
+    image = Image.open(source)
+
+    if not size or image.format not in ("JPEG", "MPO"):
+        return image
+
+    box = (size, size) if isinstance(size, int) else tuple(size)
+
+    # Box is in display orientation; the stored pixels may be rotated
+    if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+        box = box[::-1]
+
+    width, height = image.size
+    scales = (box[0] / width, box[1] / height)
+    scale = max(scales) if cover else min(scales)
+
+    if scale < 1:
+        image.draft(None, (math.ceil(width * scale), math.ceil(height * scale)))
+
+    return image
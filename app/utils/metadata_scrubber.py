@@ -0,0 +1,353 @@
+import io
+from PIL import Image
+
+# ─────────────────────────────────────────────
+# METADATA SCRUBBING
+# ─────────────────────────────────────────────
+# JPEG / PNG / WebP are scrubbed losslessly at the segment / chunk level:
+# the input is read as a stream and copied to the output in bounded chunks,
+# skipping the segments that carry metadata. Image data is never decoded.
+# Other formats: pixel buffer copied in C, metadata left behind.
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+JPEG_SIGNATURE = b"\xff\xd8"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# JPEG markers
+EOI = 0xD9
+SOS = 0xDA
+COM = 0xFE
+APP0 = 0xE0    # JFIF
+APP1 = 0xE1    # EXIF / XMP
+APP2 = 0xE2    # ICC profile / MPF
+APP14 = 0xEE   # Adobe (colour transform, needed to decode CMYK/YCCK)
+
+# Markers without a length field
+STANDALONE_MARKERS = {0x01, *range(0xD0, 0xD8)}
+
+KEEP_APP_MARKERS = {APP0, APP14}
+
+# PNG ancillary chunks carrying metadata
+PNG_METADATA_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME", b"dSIG"}
+
+# WebP extended-format chunks and their VP8X flag bits
+WEBP_METADATA_CHUNKS = {b"EXIF": 0x08, b"XMP ": 0x04}
+WEBP_ICC_CHUNK = (b"ICCP", 0x20)
+
+ORIENTATION_TAG = 0x0112
+
+# Info keys that describe pixels rather than metadata
+PIXEL_INFO_KEYS = {"transparency"}
+
+
+class _StreamReader:
+    """Small look-ahead buffer over a binary stream; memory stays bounded."""
+
+    def __init__(self, src):
+        self.src = src
+        self.buffer = bytearray()
+
+    def _fill(self, size):
+        while len(self.buffer) < size:
+            chunk = self.src.read(max(COPY_CHUNK_SIZE, size - len(self.buffer)))
+            if not chunk:
+                return False
+            self.buffer += chunk
+        return True
+
+    def read(self, size):
+        self._fill(size)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def copy(self, dst, size):
+        while size > 0:
+            if not self.buffer and not self._fill(1):
+                break
+            take = min(size, len(self.buffer))
+            if dst is not None:
+                dst.write(self.buffer[:take])
+            del self.buffer[:take]
+            size -= take
+
+    def skip(self, size):
+        self.copy(None, size)
+
+    def copy_entropy_data(self, dst):
+        """
+        Copies JPEG entropy-coded data up to (not including) the next marker.
+        0xFF00 is byte stuffing, 0xFFD0-D7 are restart markers, 0xFFFF is fill.
+        """
+        pos = 0
+        while True:
+            pos = self.buffer.find(b"\xff", pos)
+
+            if pos < 0:
+                dst.write(self.buffer)
+                self.buffer.clear()
+                pos = 0
+                if not self._fill(1):
+                    return
+                continue
+
+            if pos + 1 >= len(self.buffer):
+                # Marker split across reads: flush up to it and read more
+                dst.write(self.buffer[:pos])
+                del self.buffer[:pos]
+                pos = 0
+                if not self._fill(2):
+                    dst.write(self.buffer)
+                    self.buffer.clear()
+                    return
+                continue
+
+            following = self.buffer[pos + 1]
+            if following == 0x00 or 0xD0 <= following <= 0xD7:
+                pos += 2
+            elif following == 0xFF:
+                pos += 1
+            else:
+                dst.write(self.buffer[:pos])
+                del self.buffer[:pos]
+                return
+
+
+# ─────────────────────────────────────────────
+# JPEG
+# ─────────────────────────────────────────────
+
+def _minimal_exif_segment(orientation):
+    """APP1 segment carrying only the orientation tag, so photos keep their rotation."""
+    exif = Image.Exif()
+    exif[ORIENTATION_TAG] = orientation
+    payload = b"Exif\x00\x00" + exif.tobytes()
+    return bytes([0xFF, APP1]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def _read_orientation(segment_payload):
+    if not segment_payload.startswith(b"Exif\x00\x00"):
+        return None
+    try:
+        exif = Image.Exif()
+        exif.load(segment_payload[6:])
+        return exif.get(ORIENTATION_TAG)
+    except Exception:
+        return None
+
+
+def scrub_jpeg_stream(src, dst, keep_icc=False, keep_orientation=True):
+    """
+    Removes EXIF/XMP (APP1), ICC (APP2, unless keep_icc), IPTC (APP13), other
+    APPn segments and comments from a JPEG without re-encoding it.
+    Anything after EOI (e.g. MPO secondary images) is dropped.
+    """
+    reader = _StreamReader(src)
+
+    if reader.read(2) != JPEG_SIGNATURE:
+        raise ValueError("Not a JPEG file")
+
+    dst.write(JPEG_SIGNATURE)
+    orientation_written = not keep_orientation
+
+    while True:
+        prefix = reader.read(1)
+        if not prefix:
+            break
+        if prefix != b"\xff":
+            raise ValueError("Corrupted JPEG marker stream")
+
+        marker_byte = reader.read(1)
+        if not marker_byte:
+            break
+        marker = marker_byte[0]
+
+        # Fill bytes before a marker
+        if marker == 0xFF:
+            reader.buffer[:0] = b"\xff"
+            continue
+
+        if marker == EOI:
+            dst.write(b"\xff\xd9")
+            break
+
+        if marker in STANDALONE_MARKERS:
+            dst.write(bytes([0xFF, marker]))
+            continue
+
+        length_bytes = reader.read(2)
+        payload_len = int.from_bytes(length_bytes, "big") - 2
+
+        if marker == APP1:
+            # Bounded by the 64KB segment limit
+            payload = reader.read(payload_len)
+            orientation = _read_orientation(payload)
+            if not orientation_written and orientation and orientation != 1:
+                dst.write(_minimal_exif_segment(orientation))
+                orientation_written = True
+            continue
+
+        if marker == APP2 and keep_icc:
+            signature = reader.read(min(12, payload_len))
+            if signature == b"ICC_PROFILE\x00":
+                dst.write(bytes([0xFF, marker]) + length_bytes + signature)
+                reader.copy(dst, payload_len - len(signature))
+            else:
+                reader.skip(payload_len - len(signature))
+            continue
+
+        if (0xE0 <= marker <= 0xEF and marker not in KEEP_APP_MARKERS) or marker == COM:
+            reader.skip(payload_len)
+            continue
+
+        dst.write(bytes([0xFF, marker]) + length_bytes)
+        reader.copy(dst, payload_len)
+
+        if marker == SOS:
+            reader.copy_entropy_data(dst)
+
+
+def scrub_jpeg(data, keep_icc=False, keep_orientation=True) -> bytes:
+    """In-memory convenience wrapper around scrub_jpeg_stream."""
+    output = io.BytesIO()
+    scrub_jpeg_stream(io.BytesIO(data), output, keep_icc=keep_icc, keep_orientation=keep_orientation)
+    return output.getvalue()
+
+
+# ─────────────────────────────────────────────
+# PNG
+# ─────────────────────────────────────────────
+
+def scrub_png_stream(src, dst, keep_icc=False):
+    """Drops tEXt/zTXt/iTXt/eXIf/tIME chunks (and iCCP unless keep_icc)."""
+    reader = _StreamReader(src)
+
+    if reader.read(8) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+
+    dst.write(PNG_SIGNATURE)
+
+    dropped = set(PNG_METADATA_CHUNKS)
+    if not keep_icc:
+        dropped.add(b"iCCP")
+
+    while True:
+        header = reader.read(8)
+        if len(header) < 8:
+            break
+
+        length = int.from_bytes(header[:4], "big")
+        chunk_type = header[4:]
+
+        # data + CRC
+        if chunk_type in dropped:
+            reader.skip(length + 4)
+            continue
+
+        dst.write(header)
+        reader.copy(dst, length + 4)
+
+        if chunk_type == b"IEND":
+            break
+
+
+# ─────────────────────────────────────────────
+# WEBP
+# ─────────────────────────────────────────────
+
+def _webp_chunks(src, start):
+    """Yields (offset, fourcc, padded_size) by seeking over chunk payloads."""
+    src.seek(start)
+    while True:
+        header = src.read(8)
+        if len(header) < 8:
+            return
+        size = int.from_bytes(header[4:], "little")
+        padded = size + (size & 1)
+        yield src.tell() - 8, header[:4], padded
+        src.seek(padded, io.SEEK_CUR)
+
+
+def scrub_webp_stream(src, dst, keep_icc=False):
+    """
+    Drops EXIF and XMP chunks (and ICCP unless keep_icc), clearing their VP8X
+    flags and fixing the RIFF size. The input must be seekable: chunk headers
+    are scanned first so the new RIFF size can be written up front.
+    """
+    start = src.tell()
+    riff = src.read(12)
+    if riff[:4] != b"RIFF" or riff[8:] != b"WEBP":
+        raise ValueError("Not a WebP file")
+
+    dropped = dict(WEBP_METADATA_CHUNKS)
+    if not keep_icc:
+        dropped[WEBP_ICC_CHUNK[0]] = WEBP_ICC_CHUNK[1]
+
+    chunks = list(_webp_chunks(src, start + 12))
+    removed = sum(8 + padded for _, fourcc, padded in chunks if fourcc in dropped)
+    cleared_flags = 0
+    for _, fourcc, _ in chunks:
+        cleared_flags |= dropped.get(fourcc, 0)
+
+    riff_size = int.from_bytes(riff[4:8], "little") - removed
+    dst.write(b"RIFF" + riff_size.to_bytes(4, "little") + b"WEBP")
+
+    reader = _StreamReader(src)
+    for offset, fourcc, padded in chunks:
+        if fourcc in dropped:
+            continue
+
+        src.seek(offset)
+        reader.buffer.clear()
+
+        if fourcc == b"VP8X":
+            chunk = reader.read(8 + padded)
+            flags = chunk[8] & ~cleared_flags
+            dst.write(chunk[:8] + bytes([flags]) + chunk[9:])
+        else:
+            reader.copy(dst, 8 + padded)
+
+
+# ─────────────────────────────────────────────
+# DISPATCH
+# ─────────────────────────────────────────────
+
+def sniff_scrubbable_format(head: bytes):
+    if head.startswith(JPEG_SIGNATURE):
+        return "jpeg"
+    if head.startswith(PNG_SIGNATURE):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def scrub_stream(src, dst, keep_icc=False):
+    """
+    Losslessly scrubs a JPEG, PNG or WebP stream into dst.
+    Returns the detected format, or None (nothing written) for other formats.
+    """
+    start = src.tell()
+    head = src.read(12)
+    src.seek(start)
+
+    fmt = sniff_scrubbable_format(head)
+    if fmt == "jpeg":
+        scrub_jpeg_stream(src, dst, keep_icc=keep_icc)
+    elif fmt == "png":
+        scrub_png_stream(src, dst, keep_icc=keep_icc)
+    elif fmt == "webp":
+        scrub_webp_stream(src, dst, keep_icc=keep_icc)
+
+    return fmt
+
+
+def strip_image_metadata(image: Image.Image) -> Image.Image:
+    """
+    Returns a copy of the decoded image without EXIF/XMP/ICC/comments.
+    The pixel buffer is copied in C; no per-pixel Python objects are created.
+    """
+    clean = image.copy()
+    clean.info = {k: v for k, v in image.info.items() if k in PIXEL_INFO_KEYS}
+    return clean
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+
+# ─────────────────────────────────────────────
+# TEMP OUTPUT FILES
+# ─────────────────────────────────────────────
+# Large outputs (PDFs, zips of pages) are written straight to disk and sent
+# with FileResponse, which streams the file in chunks; the file is deleted
+# once the response is over, whether it was sent, rejected (bad Range
+# headers answer 400/416 without running background tasks) or failed.
+
+
+def temp_path(suffix="") -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def remove_file(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+class TempFileResponse(FileResponse):
+    """FileResponse that removes its file once the response is over."""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await run_in_threadpool(remove_file, self.path)
+
+
+def temp_file_response(path, media_type: str, filename: str, headers=None) -> FileResponse:
+    """Streams `path` as an attachment and removes it afterwards."""
+    return TempFileResponse(
+        path=path,
+        media_type=media_type,
+        filename=filename,
+        headers=headers,
+    )
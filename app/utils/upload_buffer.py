@@ -0,0 +1,218 @@
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from fastapi import UploadFile, HTTPException
+
+from app.core.config import MAX_FILE_SIZE
+
+
+# ─────────────────────────────────────────────
+# UPLOAD INGESTION
+# ─────────────────────────────────────────────
+# Starlette already spools every uploaded part into a SpooledTemporaryFile
+# (memory up to 1MB, disk beyond), and the request body itself is capped by
+# BodySizeLimitMiddleware while it is being received. From there the upload
+# is never read into a new bytes object just to be checked: its size comes
+# from the spool, its format from the first bytes, and services get either
+# the file handle or a zero-copy view of it.
+
+SNIFF_BYTES = 32
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# (offset, signature, format)
+SIGNATURES = [
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (0, b"BM", "bmp"),
+    (0, b"II*\x00", "tiff"),
+    (0, b"MM\x00*", "tiff"),
+    (0, b"\x00\x00\x01\x00", "ico"),
+    (0, b"%PDF-", "pdf"),
+    (0, b"PK\x03\x04", "zip"),
+    (0, b"\x1a\x45\xdf\xa3", "webm"),
+]
+
+RIFF_FORMATS = {b"WEBP": "webp", b"AVI ": "avi"}
+
+# ISO BMFF brands (ftyp box)
+FTYP_BRANDS = {
+    b"heic": "heic", b"heix": "heic", b"hevc": "heic", b"heim": "heic",
+    b"mif1": "heif", b"msf1": "heif",
+    b"avif": "avif", b"avis": "avif",
+    b"qt  ": "mov",
+}
+
+
+def sniff_format(head: bytes):
+    """Detects the real container format from the first bytes of a file."""
+    for offset, signature, fmt in SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return fmt
+
+    if head[:4] == b"RIFF":
+        return RIFF_FORMATS.get(head[8:12])
+
+    if head[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(head[8:12], "mp4")
+
+    stripped = head.lstrip()
+    if stripped.startswith((b"<svg", b"<?xml")):
+        return "svg"
+
+    return None
+
+
+def upload_size(file_obj) -> int:
+    """Size of a seekable file object, without reading it."""
+    position = file_obj.tell()
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(position)
+    return size
+
+
+def peek(file_obj, size=SNIFF_BYTES) -> bytes:
+    position = file_obj.tell()
+    file_obj.seek(0)
+    head = file_obj.read(size)
+    file_obj.seek(position)
+    return head
+
+
+def _in_memory_buffer(file_obj):
+    """The BytesIO behind a file object that has not rolled over to disk."""
+    if isinstance(file_obj, io.BytesIO):
+        return file_obj
+    inner = getattr(file_obj, "_file", None)
+    return inner if isinstance(inner, io.BytesIO) else None
+
+
+def moov_before_mdat(file_obj) -> bool:
+    """
+    Walks the top-level MP4/MOV boxes. ffmpeg can only read the file from a
+    pipe when the index (moov) comes before the media data (mdat).
+    """
+    position = file_obj.tell()
+    offset = 0
+
+    try:
+        while True:
+            file_obj.seek(offset)
+            header = file_obj.read(8)
+            if len(header) < 8:
+                return False
+
+            size = int.from_bytes(header[:4], "big")
+            box = header[4:8]
+
+            if box == b"moov":
+                return True
+            if box == b"mdat":
+                return False
+
+            if size == 1:  # 64-bit size follows the type
+                size = int.from_bytes(file_obj.read(8), "big")
+            if size < 8:  # 0 = box runs to end of file
+                return False
+
+            offset += size
+    finally:
+        file_obj.seek(position)
+
+
+def pipe_readable_video(file_obj) -> bool:
+    """True if ffmpeg can decode the upload sequentially from stdin."""
+    fmt = sniff_format(peek(file_obj))
+
+    if fmt in ("mp4", "mov"):
+        return moov_before_mdat(file_obj)
+
+    return fmt == "webm"
+
+
+@contextmanager
+def upload_buffer(file_obj):
+    """
+    Zero-copy read-only view of a whole upload. In-memory spools expose their
+    buffer, on-disk spools are memory-mapped. The view is only valid inside
+    the `with` block.
+    """
+    memory = _in_memory_buffer(file_obj)
+
+    if memory is not None:
+        view = memory.getbuffer()
+        try:
+            yield view
+        finally:
+            view.release()
+        return
+
+    file_obj.flush()
+    if upload_size(file_obj) == 0:
+        yield memoryview(b"")
+        return
+
+    mapped = mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        yield view
+    finally:
+        view.release()
+        mapped.close()
+
+
+@contextmanager
+def spooled_path(source, suffix=""):
+    """
+    Filesystem path holding the upload (a file object or bytes), for
+    libraries that work best from a path: PyMuPDF opened from a file reads
+    objects on demand instead of holding the whole document in memory. The
+    copy is chunked and removed when the block exits.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix)
+
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                spool.write(source)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, spool, COPY_CHUNK_SIZE)
+                source.seek(0)
+
+        yield path
+
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def ingest_upload(file: UploadFile, max_size=MAX_FILE_SIZE, allowed_formats=None):
+    """
+    Validates an upload in place: size from the spool, format from the first
+    bytes. Returns (size, sniffed format); the file is left at position 0.
+    """
+    size = file.size if file.size is not None else upload_size(file.file)
+
+    if size > max_size:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty file uploaded.")
+
+    fmt = sniff_format(peek(file.file))
+
+    if allowed_formats is not None and fmt not in allowed_formats:
+        raise HTTPException(
+            status_code=400,
+            detail="File content does not match a supported format."
+        )
+
+    await file.seek(0)
+    return size, fmt
@@ -0,0 +1,128 @@
+import io
+import zipfile
+
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+
+
+# ─────────────────────────────────────────────
+# STREAMING ZIP WRITER
+# ─────────────────────────────────────────────
+# zipfile writes data descriptors (no seeking back to patch local headers)
+# when its target cannot tell()/seek(), so the archive can be sent to the
+# client entry by entry instead of being assembled in memory first.
+#
+# Compression is chosen per entry by a policy (name -> zipfile constant).
+# The default one only deflates formats that are not entropy-coded already:
+# uncompressed bitmaps (BMP, TIFF, PNM family) and text. Everything else,
+# JPEG, PNG, WebP, JPEG 2000, JBIG2, fax streams, unknown binaries, is
+# stored: deflating it again costs CPU for next to no gain.
+
+DEFLATE_EXTENSIONS = {
+    # raw bitmaps
+    "bmp", "tif", "tiff", "pnm", "ppm", "pgm", "pbm", "pam",
+    # text
+    "txt", "json", "csv", "xml", "html", "svg", "webmanifest",
+}
+
+
+def default_policy(name: str) -> int:
+    ext = name.rpartition(".")[2].lower()
+    return zipfile.ZIP_DEFLATED if ext in DEFLATE_EXTENSIONS else zipfile.ZIP_STORED
+
+
+def deflate_all(name: str) -> int:
+    return zipfile.ZIP_DEFLATED
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable buffer drained after every entry."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def tell(self):
+        raise OSError("unseekable")
+
+    def flush(self):
+        # Nothing is buffered; an abandoned writer may also be closed after the sink
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Incremental zip builder. Each add() returns the bytes that can be sent
+    right away; close() returns the central directory. `policy` picks the
+    compression of entries added without an explicit compress_type.
+    """
+
+    def __init__(self, policy=default_policy):
+        self._sink = _ChunkSink()
+        self._policy = policy
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+        self._names = set()
+
+    def unique_name(self, name: str) -> str:
+        """Avoids duplicate entries when two inputs share a filename."""
+        candidate = name
+        stem, dot, ext = name.rpartition(".")
+        if not dot:
+            stem, ext = name, ""
+
+        counter = 1
+        while candidate in self._names:
+            candidate = f"{stem}-{counter}{dot}{ext}"
+            counter += 1
+
+        self._names.add(candidate)
+        return candidate
+
+    def add(self, name: str, data: bytes, compress_type=None) -> bytes:
+        if compress_type is None:
+            compress_type = self._policy(name)
+
+        self._names.add(name)
+        self._zip.writestr(name, data, compress_type=compress_type)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._zip.close()
+        return self._sink.drain()
+
+
+def stream_zip(entries, policy=default_policy):
+    """Yields the zip of (name, bytes) entries chunk by chunk, one per entry."""
+    writer = ZipStreamWriter(policy)
+
+    for name, data in entries:
+        yield writer.add(writer.unique_name(name), data)
+
+    yield writer.close()
+
+
+async def prime_chunks(chunks):
+    """
+    Produces the first chunk of a sync generator in the threadpool before
+    returning, so input errors still become normal error responses, then
+    returns an async body yielding it and the rest (also in the threadpool).
+    """
+    first = await run_in_threadpool(next, chunks, b"")
+
+    async def body():
+        yield first
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+
+    return body()
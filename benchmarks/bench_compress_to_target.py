@@ -0,0 +1,127 @@
+"""
+Benchmark: predictive compress_to_target vs the legacy quality binary search.
+
+Usage:
+    python -m benchmarks.bench_compress_to_target [image ...]
+
+Without arguments a small synthetic corpus is generated. Reports full-size
+JPEG encode counts, wall time and the final size / quality for each target.
+"""
+import io
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services import image_optimizer
+from app.services.image_optimizer import compress_to_target, resize_longest_side
+
+TARGETS_KB = (150, 400, 1000)
+
+
+def legacy_compress_to_target(image, target_kb, min_q=20, max_q=95):
+    best_buffer = io.BytesIO()
+
+    while min_q <= max_q:
+        mid_q = (min_q + max_q) // 2
+        tmp_buffer = io.BytesIO()
+        image.save(tmp_buffer, format="JPEG", quality=mid_q, optimize=True, progressive=True)
+        size_kb = tmp_buffer.tell() / 1024
+
+        if size_kb <= target_kb:
+            best_buffer = tmp_buffer
+            min_q = mid_q + 1
+        else:
+            max_q = mid_q - 1
+
+    if best_buffer.tell() == 0:
+        image.save(best_buffer, format="JPEG", quality=20, optimize=True)
+
+    best_buffer.seek(0)
+    return best_buffer
+
+
+def synthetic_corpus():
+    rng = np.random.default_rng(42)
+    corpus = {}
+
+    for name, (w, h), noise in (
+        ("smooth-4000x3000", (4000, 3000), 4),
+        ("detailed-4000x3000", (4000, 3000), 40),
+        ("mixed-1600x1200", (1600, 1200), 18),
+    ):
+        y, x = np.mgrid[0:h, 0:w]
+        base = np.stack([
+            (x / w) * 255,
+            (y / h) * 255,
+            (np.sin(x / 37.0) * np.cos(y / 53.0) + 1) * 127,
+        ], axis=-1)
+        base += rng.normal(0, noise, base.shape)
+        corpus[name] = Image.fromarray(np.clip(base, 0, 255).astype("uint8"))
+
+    return corpus
+
+
+class EncodeCounter:
+    """Counts JPEG encodes made at the full image size."""
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self._save = Image.Image.save
+
+    def __enter__(self):
+        counter = self
+
+        def save(image, *args, **kwargs):
+            if image.size == counter.size:
+                counter.count += 1
+            return counter._save(image, *args, **kwargs)
+
+        Image.Image.save = save
+        return self
+
+    def __exit__(self, *exc):
+        Image.Image.save = self._save
+
+
+def run(func, image, target_kb):
+    with EncodeCounter(image.size) as counter:
+        start = time.perf_counter()
+        buffer = func(image, target_kb)
+        elapsed = time.perf_counter() - start
+
+    # Pillow does not record the quality setting; the first luma quantizer is a good proxy
+    q_table = Image.open(buffer).quantization[0][0]
+    return counter.count, elapsed, len(buffer.getvalue()) / 1024, q_table
+
+
+def main(paths):
+    if paths:
+        corpus = {path: Image.open(path).convert("RGB") for path in paths}
+    else:
+        corpus = synthetic_corpus()
+
+    print(f"{'image':<24}{'target':>8}  {'impl':<10}{'encodes':>8}{'time(s)':>10}{'size(kb)':>10}{'q-table':>9}")
+
+    totals = {"legacy": [0, 0.0], "predictive": [0, 0.0]}
+
+    for name, image in corpus.items():
+        image = resize_longest_side(image, 1600)
+
+        for target_kb in TARGETS_KB:
+            for label, func in (("legacy", legacy_compress_to_target), ("predictive", compress_to_target)):
+                encodes, elapsed, size_kb, quality = run(func, image, target_kb)
+                totals[label][0] += encodes
+                totals[label][1] += elapsed
+                print(f"{name:<24}{target_kb:>8}  {label:<10}{encodes:>8}{elapsed:>10.3f}{size_kb:>10.1f}{quality:>9}")
+
+    print()
+    print(f"probe budget: {image_optimizer.PROBE_MAX_PIXELS} px")
+    for label, (encodes, elapsed) in totals.items():
+        print(f"{label:<10} total encodes={encodes:<4} total time={elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+"""
+Benchmark: metadata scrubbing, legacy getdata/putdata vs the new engine.
+
+Usage:
+    python -m benchmarks.bench_metadata_scrub [megapixels ...]
+
+Each case runs in a fresh process so peak RSS (VmHWM) is attributable to it.
+Reports wall time and extra peak memory, both per megapixel.
+"""
+import io
+import multiprocessing
+import sys
+import time
+
+from PIL import Image
+
+from app.utils.metadata_scrubber import scrub_jpeg, strip_image_metadata
+
+DEFAULT_MEGAPIXELS = (1, 2, 4)
+
+
+def legacy_strip(image):
+    data = list(image.getdata())
+    clean = Image.new(image.mode, image.size)
+    clean.putdata(data)
+    return clean
+
+
+def make_jpeg(megapixels):
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    exif[0x0112] = 6
+
+    buffer = io.BytesIO()
+    Image.effect_noise((width, height), 40).convert("RGB").save(
+        buffer, format="JPEG", quality=90, exif=exif, comment=b"benchmark"
+    )
+    return buffer.getvalue()
+
+
+def _memory_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def _case(name, data, queue):
+    cases = {
+        "legacy getdata/putdata": lambda: legacy_strip(Image.open(io.BytesIO(data))).save(io.BytesIO(), format="JPEG", quality=95),
+        "buffer copy + re-encode": lambda: strip_image_metadata(Image.open(io.BytesIO(data))).save(io.BytesIO(), format="JPEG", quality=95),
+        "jpeg marker-level": lambda: scrub_jpeg(data),
+    }
+
+    baseline = _memory_kb("VmRSS")
+    start = time.perf_counter()
+    cases[name]()
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, max(0, _memory_kb("VmHWM") - baseline)))
+
+
+def run_case(name, data):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_case, args=(name, data, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main(megapixel_list):
+    print(f"{'MP':>4}  {'method':<26}{'time(s)':>9}{'s/MP':>9}{'peak MB':>10}{'MB/MP':>9}")
+
+    for megapixels in megapixel_list:
+        data = make_jpeg(megapixels)
+
+        for name in ("legacy getdata/putdata", "buffer copy + re-encode", "jpeg marker-level"):
+            elapsed, peak_kb = run_case(name, data)
+            peak_mb = peak_kb / 1024
+            print(
+                f"{megapixels:>4}  {name:<26}{elapsed:>9.3f}{elapsed / megapixels:>9.3f}"
+                f"{peak_mb:>10.1f}{peak_mb / megapixels:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main([float(a) for a in sys.argv[1:]] or DEFAULT_MEGAPIXELS)
@@ -0,0 +1,171 @@
+"""
+Benchmark: sampled GIF encoding ladder vs the legacy one-encode-per-preset loop.
+
+Usage:
+    python -m benchmarks.bench_video_to_gif [video ...]
+
+Requires the ffmpeg binary. Without arguments a few synthetic clips are
+generated with ffmpeg's lavfi sources. Reports full-length encodes, palettes
+generated (cache hits are not counted; they are computed inside the encode
+run), sample runs, wall time and the final GIF size for each clip and
+quality.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.services import gif_service
+from app.services.gif_service import (
+    QUALITY_PRESETS,
+    TARGET_SIZE,
+    adaptive_gif_encode_async,
+    run_ffmpeg_async,
+)
+
+QUALITIES = ("hd", "medium", "low")
+CLIP_DURATION = 8
+
+SYNTHETIC_SOURCES = {
+    "testsrc2-720p": "testsrc2=size=1280x720:rate=30",
+    "mandelbrot-480p": "mandelbrot=size=854x480:rate=25",
+    "noise-720p": "nullsrc=size=1280x720:rate=30,geq=random(1)*255:128:128",
+}
+
+
+async def legacy_gif_encode(input_path, start_time, duration, quality, reverse, file_size):
+    attempts = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["medium"])
+
+    if file_size > 5 * 1024 * 1024:
+        attempts = QUALITY_PRESETS["low"]
+    elif file_size > 2 * 1024 * 1024:
+        attempts = QUALITY_PRESETS["medium"]
+
+    if duration < 2:
+        attempts = attempts[:1]
+
+    best_output = None
+    best_size = float("inf")
+
+    for fps, width, colors in attempts:
+        fd, output_path = tempfile.mkstemp(suffix=".gif")
+        os.close(fd)
+        await run_ffmpeg_async(input_path, output_path, fps, width, colors, start_time, duration, reverse)
+        size = os.path.getsize(output_path)
+
+        if size <= TARGET_SIZE:
+            if best_output:
+                os.remove(best_output)
+            return output_path
+
+        if size < best_size:
+            if best_output:
+                os.remove(best_output)
+            best_output, best_size = output_path, size
+        else:
+            os.remove(output_path)
+
+    return best_output
+
+
+def synthetic_clips(tmp_dir):
+    clips = {}
+
+    for name, source in SYNTHETIC_SOURCES.items():
+        path = os.path.join(tmp_dir, f"{name}.mp4")
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", source,
+                "-t", str(CLIP_DURATION),
+                "-pix_fmt", "yuv420p",
+                path,
+            ],
+            check=True,
+        )
+        clips[name] = path
+
+    return clips
+
+
+class FFmpegCounter:
+    """Counts ffmpeg runs: full-length encodes, palette passes and ladder samples."""
+
+    def __init__(self):
+        self.full = 0
+        self.palettes = 0
+        self.samples = 0
+        self._run = gif_service.run_ffmpeg
+
+    def __enter__(self):
+        counter = self
+
+        async def run(command, request=None):
+            if "[pc]" in command:
+                # Full encode that also generates the palette
+                counter.full += 1
+                counter.palettes += 1
+            elif "-filter_complex" in command:
+                counter.samples += 1
+            elif command[-1].endswith(".png"):
+                counter.palettes += 1
+            else:
+                counter.full += 1
+            return await counter._run(command, request)
+
+        gif_service.run_ffmpeg = run
+        return self
+
+    def __exit__(self, *exc):
+        gif_service.run_ffmpeg = self._run
+
+
+def run(func, path, quality):
+    file_size = os.path.getsize(path)
+
+    with FFmpegCounter() as counter:
+        start = time.perf_counter()
+        output = asyncio.run(func(path, 0, CLIP_DURATION, quality, False, file_size))
+        elapsed = time.perf_counter() - start
+
+    size_kb = os.path.getsize(output) / 1024
+    os.remove(output)
+    return counter.full, counter.palettes, counter.samples, elapsed, size_kb
+
+
+def main(paths):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clips = {os.path.basename(p): p for p in paths} if paths else synthetic_clips(tmp_dir)
+
+        print(f"{'clip':<24}{'quality':>8}  {'impl':<8}{'full':>6}{'palette':>9}{'sample':>8}{'time(s)':>10}{'size(kb)':>10}")
+
+        totals = {"legacy": [0, 0, 0, 0.0], "ladder": [0, 0, 0, 0.0]}
+        runs = 0
+
+        for name, path in clips.items():
+            for quality in QUALITIES:
+                runs += 1
+                for label, func in (("legacy", legacy_gif_encode), ("ladder", adaptive_gif_encode_async)):
+                    full, palettes, samples, elapsed, size_kb = run(func, path, quality)
+                    totals[label][0] += full
+                    totals[label][1] += palettes
+                    totals[label][2] += samples
+                    totals[label][3] += elapsed
+                    print(
+                        f"{name:<24}{quality:>8}  {label:<8}{full:>6}{palettes:>9}"
+                        f"{samples:>8}{elapsed:>10.2f}{size_kb:>10.1f}"
+                    )
+
+    print()
+    print(f"target: {TARGET_SIZE // 1024} kb, sample: {gif_service.SAMPLE_DURATION}s")
+    for label, (full, palettes, samples, elapsed) in totals.items():
+        print(
+            f"{label:<8} full encodes/clip={full / runs:.2f} palette passes={palettes:<4} "
+            f"sample runs={samples:<4} total time={elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,131 @@
+"""
+Benchmark: per-entry zip compression policy vs deflating every entry.
+
+Usage:
+    python -m benchmarks.bench_zip_policy [pdf ...]
+
+Without arguments a synthetic scanned-document corpus is generated: 300 DPI
+letter pages as grayscale and colour JPEG scans and 1-bit (Flate) scans.
+For each PDF, the images it contains (PDF image extraction) and its pages
+rendered at 150 DPI (PDF to image) are archived with both policies. Only
+the zip step is timed; reports archive size and time per policy.
+"""
+import io
+import sys
+import time
+
+import fitz
+import numpy as np
+from PIL import Image
+
+from app.services.pdf_rasterizer import _render_range
+from app.utils.zip_stream import default_policy, deflate_all, stream_zip
+
+PAGE_SIZE = (2550, 3300)  # letter at 300 DPI
+PAGES = 12
+RENDER_DPI = 150
+ROUNDS = 3
+
+
+def scanned_page(rng, mode):
+    width, height = PAGE_SIZE
+    page = np.full((height, width), 235, dtype=np.float32)
+
+    # Lines of "text": short dark runs on a ruled grid
+    for top in range(300, height - 300, 60):
+        left = 250
+        while left < width - 400:
+            word = int(rng.integers(60, 260))
+            page[top:top + 28, left:left + word] = 30
+            left += word + int(rng.integers(20, 40))
+
+    # Paper texture and scanner noise
+    page += rng.normal(0, 6, page.shape)
+    page = np.clip(page, 0, 255).astype(np.uint8)
+
+    if mode == "1":
+        return Image.fromarray(page).point(lambda v: 255 if v > 128 else 0).convert("1")
+
+    image = Image.fromarray(page)
+    if mode == "RGB":
+        # Yellowed paper
+        image = Image.merge("RGB", (image, image, image.point(lambda v: v * 0.9)))
+    return image
+
+
+def synthetic_corpus():
+    rng = np.random.default_rng(7)
+    corpus = {}
+
+    for name, mode, fmt in (
+        ("gray-jpeg-scan", "L", "JPEG"),
+        ("color-jpeg-scan", "RGB", "JPEG"),
+        ("bitonal-scan", "1", "PNG"),
+    ):
+        doc = fitz.open()
+
+        for _ in range(PAGES):
+            buffer = io.BytesIO()
+            scanned_page(rng, mode).save(buffer, format=fmt, quality=75)
+            page = doc.new_page(width=612, height=792)
+            page.insert_image(page.rect, stream=buffer.getvalue())
+
+        corpus[name] = doc.tobytes(garbage=3, deflate=True)
+        doc.close()
+
+    return corpus
+
+
+def extracted_entries(doc):
+    entries = []
+    for page_index in range(len(doc)):
+        for img_index, img in enumerate(doc.get_page_images(page_index)):
+            image = doc.extract_image(img[0])
+            entries.append((f"page{page_index + 1}_img{img_index + 1}.{image['ext']}", image["image"]))
+    return entries
+
+
+def rendered_entries(doc):
+    return [
+        (f"page_{number + 1}.png", data)
+        for number, data in _render_range(doc, range(len(doc)), RENDER_DPI, "png")
+    ]
+
+
+def time_zip(entries, policy):
+    best, size = None, 0
+
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in stream_zip(entries, policy))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, size
+
+
+def main(paths):
+    if paths:
+        corpus = {path: open(path, "rb").read() for path in paths}
+    else:
+        corpus = synthetic_corpus()
+
+    print(f"{'document':<22}{'archive':<10}{'policy':<14}{'entries MB':>11}{'zip MB':>9}{'zip ms':>9}")
+
+    for name, data in corpus.items():
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            archives = {"extract": extracted_entries(doc), "render": rendered_entries(doc)}
+
+        for archive, entries in archives.items():
+            raw_mb = sum(len(d) for _, d in entries) / 1024 / 1024
+
+            for policy_name, policy in (("deflate all", deflate_all), ("per entry", default_policy)):
+                elapsed, size = time_zip(entries, policy)
+                print(
+                    f"{name[-22:]:<22}{archive:<10}{policy_name:<14}"
+                    f"{raw_mb:>11.2f}{size / 1024 / 1024:>9.2f}{elapsed * 1000:>9.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
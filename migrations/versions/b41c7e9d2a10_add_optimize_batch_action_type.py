@@ -0,0 +1,27 @@
+"""add optimize batch action type
+
+Revision ID: b41c7e9d2a10
+Revises: 570b5ce516b1
+Create Date: 2026-10-18 10:12:44.318027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41c7e9d2a10'
+down_revision: Union[str, Sequence[str], None] = '570b5ce516b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE actiontype ADD VALUE IF NOT EXISTS 'OPTIMIZE_BATCH';")
+
+
+def downgrade() -> None:
+    # Postgres cannot drop a value from an enum type
+    pass
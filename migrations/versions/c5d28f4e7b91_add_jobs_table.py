@@ -0,0 +1,63 @@
+"""add jobs table
+
+Revision ID: c5d28f4e7b91
+Revises: b41c7e9d2a10
+Create Date: 2026-10-18 11:02:17.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d28f4e7b91'
+down_revision: Union[str, Sequence[str], None] = 'b41c7e9d2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JOB_STATUSES = ('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', 'EXPIRED')
+
+
+def upgrade() -> None:
+    job_status = postgresql.ENUM(*JOB_STATUSES, name='jobstatus')
+    job_status.create(op.get_bind(), checkfirst=True)
+
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        # Reuses the enum type created for usage_logs
+        sa.Column('action_type', postgresql.ENUM(name='actiontype', create_type=False), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('status', postgresql.ENUM(name='jobstatus', create_type=False), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('input_path', sa.String(length=500), nullable=True),
+        sa.Column('output_path', sa.String(length=500), nullable=True),
+        sa.Column('original_filename', sa.String(length=255), nullable=True),
+        sa.Column('output_filename', sa.String(length=255), nullable=True),
+        sa.Column('media_type', sa.String(length=100), nullable=True),
+        sa.Column('original_size', sa.Integer(), nullable=True),
+        sa.Column('output_size', sa.Integer(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('processing_time_ms', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(op.f('ix_jobs_action_type'), 'jobs', ['action_type'], unique=False)
+    op.create_index(op.f('ix_jobs_status'), 'jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_jobs_created_at'), 'jobs', ['created_at'], unique=False)
+    op.create_index(op.f('ix_jobs_expires_at'), 'jobs', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_jobs_expires_at'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_created_at'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_status'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_action_type'), table_name='jobs')
+    op.drop_table('jobs')
+    postgresql.ENUM(name='jobstatus').drop(op.get_bind(), checkfirst=True)
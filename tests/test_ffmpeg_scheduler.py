@@ -0,0 +1,93 @@
+import asyncio
+import io
+
+from starlette.datastructures import UploadFile
+
+from app.core import ffmpeg_scheduler
+from app.services import gif_service, sticker_service
+
+
+async def _fake_stream_ffmpeg(command, upload, request=None):
+    yield b"chunk-1"
+    yield b"chunk-2"
+
+
+async def _send_response(response):
+    """Runs the response like uvicorn does: in its own task, ASGI spec 2.3."""
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}}
+    body = []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await asyncio.create_task(response(scope, receive, send))
+    return b"".join(body)
+
+
+def _isolate_slots(monkeypatch, tmp_path):
+    monkeypatch.setattr(ffmpeg_scheduler, "FFMPEG_LOCK_DIR", str(tmp_path))
+    monkeypatch.setattr(ffmpeg_scheduler, "FFMPEG_SLOTS", 2)
+    monkeypatch.setattr(ffmpeg_scheduler, "_slot_files", {})
+    monkeypatch.setattr(ffmpeg_scheduler, "_held", set())
+
+
+def test_streamed_gif_releases_slot(monkeypatch, tmp_path):
+    _isolate_slots(monkeypatch, tmp_path)
+    monkeypatch.setattr(gif_service, "stream_ffmpeg", _fake_stream_ffmpeg)
+
+    async def main():
+        # More requests than slots: each one must give its slot back
+        for _ in range(ffmpeg_scheduler.FFMPEG_SLOTS + 2):
+            upload = UploadFile(file=io.BytesIO(b"video"), filename="clip.mp4")
+            result = await gif_service._video_to_gif_stream_response(
+                upload, 10, 320, 0, 2, "medium", False, None
+            )
+
+            assert await _send_response(result["response"]) == b"chunk-1chunk-2"
+            assert ffmpeg_scheduler._held == set()
+
+    asyncio.run(main())
+
+
+def test_streamed_sticker_releases_slot(monkeypatch, tmp_path):
+    _isolate_slots(monkeypatch, tmp_path)
+    monkeypatch.setattr(sticker_service, "stream_ffmpeg", _fake_stream_ffmpeg)
+
+    async def main():
+        for _ in range(ffmpeg_scheduler.FFMPEG_SLOTS + 2):
+            upload = UploadFile(file=io.BytesIO(b"video"), filename="clip.mp4")
+            result = await sticker_service._video_to_sticker_stream_response(
+                upload, 0, 2, "medium", False, None
+            )
+
+            assert await _send_response(result["response"]) == b"chunk-1chunk-2"
+            assert ffmpeg_scheduler._held == set()
+
+    asyncio.run(main())
+
+
+def test_oversized_piped_sticker_falls_back(monkeypatch, tmp_path):
+    _isolate_slots(monkeypatch, tmp_path)
+
+    async def oversized(command, upload, request=None):
+        assert "fps=10," in command[command.index("-vf") + 1]
+        yield b"x" * (sticker_service.TARGET_SIZE + 1)
+
+    monkeypatch.setattr(sticker_service, "stream_ffmpeg", oversized)
+
+    async def main():
+        upload = UploadFile(file=io.BytesIO(b"video"), filename="clip.mp4")
+        result = await sticker_service._video_to_sticker_stream_response(
+            upload, 0, 2, "medium", False, None
+        )
+
+        assert result is None
+        assert ffmpeg_scheduler._held == set()
+
+    asyncio.run(main())